@@ -0,0 +1,179 @@
+import json
+import socket
+from pathlib import Path
+from ..tracker.counts import CommitCount
+from ..tracker.status import STATUS_FIELDS, new_status
+from ..utils.utils import LOG_DIR
+
+DAEMON_SOCKET_PATH = Path(LOG_DIR, 'daemon.sock')
+# bump whenever the format of requests/responses changes, so clients
+# never misread a response from a daemon started by an older version
+PROTOCOL_VERSION = 4
+# seconds to wait for the daemon before falling back to collecting
+# statuses directly
+CLIENT_TIMEOUT = 2
+# status fields holding lists of (change type, path, new path) tuples,
+# which are sent as JSON arrays
+_CHANGED_FILES_FIELDS = ('files_staged', 'files_not_staged')
+# status fields holding `CommitCount`s, which are sent as [count,
+# truncated] arrays so lower bounds aren't mistaken for exact counts
+_COMMIT_COUNT_FIELDS = ('n_commits_ahead', 'n_commits_behind')
+
+
+def request_daemon(command='status', socket_path=DAEMON_SOCKET_PATH,
+                   timeout=CLIENT_TIMEOUT):
+    """
+    Sends a command to a running GitTracker daemon (see
+    `gittracker.daemon.daemon`)
+    :param command: str {'status', 'stop'} (default: 'status')
+            the request to send
+    :param socket_path: pathlib.Path (optional)
+            path to the daemon's Unix domain socket
+    :param timeout: float (optional)
+            seconds to wait for a response
+    :return: dict or None
+            the daemon's response, or None if no (compatible)
+            daemon is running
+    """
+    if not hasattr(socket, 'AF_UNIX') or not socket_path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(f'{command}\n'.encode())
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        response = decode_response(b''.join(chunks))
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        # no daemon listening (e.g., stale socket file left by a killed
+        # daemon), daemon too busy to respond, or garbled response
+        return None
+    return response
+
+
+def encode_response(response):
+    """
+    Serializes a daemon's response as JSON (never pickle, so a
+    client can't be made to run code by whatever is listening on
+    the socket, and vice versa)
+    :param response: dict
+            {"version": int, ...}, plus "options" & "statuses"
+            ({path: status}) for status requests
+    :return: bytes
+            the encoded response
+    """
+    response = dict(response)
+    if 'statuses' in response:
+        response['statuses'] = {path: _encode_status(status)
+                                for path, status in response['statuses'].items()}
+    return json.dumps(response, separators=(',', ':')).encode()
+
+
+def decode_response(data):
+    """
+    Deserializes a response encoded by `encode_response`
+    :param data: bytes
+            the encoded response
+    :return: dict or None
+            the response, with statuses restored to the same
+            types returned by `get_status`, or None if it's from
+            an incompatible daemon
+    :raises ValueError, TypeError, KeyError, AttributeError: if the
+            response is garbled
+    """
+    response = json.loads(data.decode())
+    if not isinstance(response, dict) or response.get('version') != PROTOCOL_VERSION:
+        return None
+    if 'statuses' in response:
+        response['statuses'] = {path: _decode_status(record)
+                                for path, record in response['statuses'].items()}
+    return response
+
+
+def _encode_status(status):
+    record = dict(status.items())
+    for field in _COMMIT_COUNT_FIELDS:
+        count = record[field]
+        if isinstance(count, CommitCount):
+            record[field] = [int(count), count.truncated]
+    submodules = record['submodules']
+    if submodules is not None:
+        record['submodules'] = {
+            sm_path: [None if sm_status is None else _encode_status(sm_status), msg]
+            for sm_path, (sm_status, msg) in submodules.items()
+        }
+    return record
+
+
+def _decode_status(record):
+    status = new_status()
+    for field in STATUS_FIELDS:
+        status[field] = record[field]
+    for field in _COMMIT_COUNT_FIELDS:
+        if isinstance(status[field], list):
+            status[field] = CommitCount(*status[field])
+    for field in _CHANGED_FILES_FIELDS:
+        if status[field] is not None:
+            status[field] = [tuple(change) for change in status[field]]
+    submodules = status['submodules']
+    if submodules is not None:
+        status['submodules'] = {
+            sm_path: (None if sm_record is None else _decode_status(sm_record), msg)
+            for sm_path, (sm_record, msg) in submodules.items()
+        }
+    return status
+
+
+def daemon_status(repo_paths, verbose=2, follow_submodules=0, max_count=None,
+                  socket_path=DAEMON_SOCKET_PATH):
+    """
+    Gets statuses for a set of repositories from a running daemon,
+    if one is running and can provide all of them with the given
+    options
+    :param repo_paths: list-like
+            absolute paths to the tracked repositories
+    :param verbose: int (default 2)
+            verbosity level
+    :param follow_submodules: int (default 0)
+            maximum recursion depth for submodules
+    :param max_count: int or None (default None)
+            commit counting limit (see
+            `gittracker.tracker.tracker.get_status`)
+    :param socket_path: pathlib.Path (optional)
+            path to the daemon's Unix domain socket
+    :return: dict or None
+            a dictionary of {path: changes} in the same format
+            (and order) returned by `get_status`, or None if the
+            statuses need to be collected directly
+    """
+    response = request_daemon('status', socket_path)
+    if response is None:
+        return None
+    options = response['options']
+    if options['max_count'] != max_count:
+        return None
+    if follow_submodules not in (0, options['follow_submodules']):
+        return None
+    statuses = response['statuses']
+    if not all(path in statuses for path in repo_paths):
+        # daemon hasn't picked up newly tracked repositories yet (or
+        # couldn't get the status of one)
+        return None
+
+    changes = {}
+    for path in repo_paths:
+        # daemon collects statuses at the highest verbosity level; prune
+        # info that wouldn't be collected at the requested level
+        status = statuses[path].copy()
+        if verbose < 3:
+            for field in ('files_staged', 'files_not_staged', 'files_untracked'):
+                status[field] = None
+        if follow_submodules == 0:
+            status['submodules'] = None
+        changes[path] = status
+    return changes
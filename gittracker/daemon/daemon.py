@@ -0,0 +1,428 @@
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from errno import ENOSPC
+from os.path import isdir, join as pjoin
+from select import select
+from subprocess import DEVNULL, PIPE, run
+from sys import exit
+from threading import Lock, current_thread, main_thread
+from time import monotonic
+from .client import (DAEMON_SOCKET_PATH, PROTOCOL_VERSION, encode_response,
+                     request_daemon)
+from .defaults import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+from .inotify import (IN_CREATE, IN_IGNORED, IN_ISDIR, IN_MODIFY,
+                      IN_MOVED_TO, IN_Q_OVERFLOW, Inotify, InotifyUnavailable)
+from ..repofile.repofile import load_tracked_repos
+from ..repofile.store import TRACKED_REPOS_DB_FPATH
+from ..tracker.cache import fingerprint
+from ..tracker.durations import DurationLog
+from ..tracker.gitdir import find_common_dir, find_git_dir
+from ..tracker.tracker import get_status
+from ..utils.utils import log_error
+
+
+@log_error(show=True)
+def run_daemon(
+        submodules=0,
+        debounce=DEFAULT_DEBOUNCE,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        jobs=None,
+        backend='gitpython',
+        max_count=None,
+        stop=False
+):
+    if stop:
+        if request_daemon('stop') is None:
+            exit("no GitTracker daemon is running")
+        print("\033[32mGitTracker daemon stopped\033[0m")
+        return
+    if not hasattr(socket, 'AF_UNIX'):
+        exit("the GitTracker daemon requires Unix domain socket support, "
+             "which isn't available on this platform")
+    daemon = StatusDaemon(follow_submodules=submodules,
+                          debounce=debounce,
+                          poll_interval=poll_interval,
+                          jobs=jobs,
+                          backend=backend,
+                          max_count=max_count)
+    daemon.serve_forever()
+
+
+class StatusDaemon:
+    def __init__(
+            self,
+            socket_path=DAEMON_SOCKET_PATH,
+            follow_submodules=0,
+            debounce=DEFAULT_DEBOUNCE,
+            poll_interval=DEFAULT_POLL_INTERVAL,
+            jobs=None,
+            backend='gitpython',
+            max_count=None
+    ):
+        """
+        Background process that keeps the statuses of all tracked
+        repositories up to date and serves them over a Unix domain
+        socket, so `gittracker status` can display them instantly.
+        Each repository's working tree, git directory, and refs are
+        watched with inotify (or polled, where that isn't possible),
+        and a repository's status is only recomputed after it
+        receives filesystem events
+        :param socket_path: pathlib.Path (optional)
+                path at which to create the socket
+        :param follow_submodules: int (default 0)
+                maximum recursion depth for submodules
+        :param debounce: float (optional)
+                seconds to wait after a repository's last event
+                before recomputing its status
+        :param poll_interval: float (optional)
+                seconds between checks of repositories that
+                aren't watched with inotify
+        :param jobs: int or None (default None)
+                number of repositories to check concurrently
+        :param backend: str (default "gitpython")
+                method used to collect statuses (see
+                `gittracker.tracker.tracker.BACKENDS`)
+        :param max_count: int or None (default None)
+                commit counting limit (see `get_status`)
+        """
+        self.socket_path = socket_path
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.status_kwargs = dict(verbose=3,
+                                  follow_submodules=follow_submodules,
+                                  jobs=jobs,
+                                  backend=backend,
+                                  max_count=max_count,
+                                  # slowest repositories first (kept in
+                                  # memory only)
+                                  durations=DurationLog(fpath=None))
+        self.tracked = []
+        self.statuses = {}
+        self._lock = Lock()
+        self._stopping = False
+        # {path: time of most recent event} for repos awaiting a refresh
+        self._dirty = {}
+        # statuses are refreshed in the background so the socket stays
+        # responsive (one refresh at a time; get_status parallelizes)
+        self._refresher = ThreadPoolExecutor(max_workers=1)
+        self._refreshing = None
+        # {wd: (repo path, directory, whether to watch new subdirectories)}
+        self._watches = {}
+        # {repo path: fingerprint} for repos being polled
+        self._polled = {}
+        # whether fs.inotify.max_user_watches was reached, after which
+        # newly tracked repos are polled rather than watched
+        self._watch_limit_hit = False
+        self._last_poll = monotonic()
+        try:
+            self.inotify = Inotify()
+        except InotifyUnavailable:
+            self.inotify = None
+        self._log_dir_wd = None
+        self.server = None
+
+    def serve_forever(self):
+        self._bind_socket()
+        if current_thread() is main_thread():
+            # SIGTERM (e.g., from `kill`) exits the same way as Ctrl+C
+            signal.signal(signal.SIGTERM, lambda signum, frame: exit(0))
+        try:
+            if self.inotify is not None:
+                # watch for changes to the list of tracked repositories
+                self._log_dir_wd = self.inotify.add_watch(
+                    str(TRACKED_REPOS_DB_FPATH.parent)
+                )
+            self._reload_tracked(initial=True)
+            watch_method = 'polling' if self.inotify is None else 'inotify'
+            print(f"\033[32mGitTracker daemon: watching {len(self.tracked)} "
+                  f"repositories ({watch_method})\033[0m\nlistening on "
+                  f"{self.socket_path}")
+            while not self._stopping:
+                fds = [self.server]
+                if self.inotify is not None:
+                    fds.append(self.inotify.fd)
+                readable, _, _ = select(fds, [], [], self._select_timeout())
+                if self.inotify is not None and self.inotify.fd in readable:
+                    self._handle_events()
+                if self.server in readable:
+                    self._handle_client()
+                self._poll_unwatched()
+                self._refresh_due()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._shutdown()
+
+    def _bind_socket(self):
+        if self.socket_path.exists():
+            if request_daemon('status', self.socket_path) is not None:
+                exit(f"a GitTracker daemon is already running (socket: "
+                     f"{self.socket_path})")
+            # left behind by a daemon that didn't exit cleanly
+            self.socket_path.unlink()
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # statuses can include file paths -- only the owner may connect.
+        # The socket is created with these permissions (rather than
+        # chmod-ed after), so it's never open to other users
+        old_umask = os.umask(0o077)
+        try:
+            self.server.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        self.server.listen()
+
+    def _shutdown(self):
+        self._refresher.shutdown(wait=False)
+        if self.server is not None:
+            self.server.close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+        if self.inotify is not None:
+            self.inotify.close()
+
+    def _select_timeout(self):
+        # wake up in time for the next due refresh or poll
+        now = monotonic()
+        timeouts = [self.debounce - (now - t) for t in self._dirty.values()]
+        if self._polled:
+            timeouts.append(self.poll_interval - (now - self._last_poll))
+        if not timeouts:
+            return None
+        timeout = max(0, min(timeouts))
+        if self._refreshing is not None and not self._refreshing.done():
+            # due repos can't be refreshed until the current refresh
+            # finishes, so don't spin in the meantime
+            timeout = max(timeout, 0.1)
+        return timeout
+
+    ############################## CLIENTS ##############################
+    def _handle_client(self):
+        conn, _ = self.server.accept()
+        with conn:
+            conn.settimeout(1)
+            try:
+                command = conn.makefile('rb').readline().strip()
+                if command == b'stop':
+                    self._stopping = True
+                    response = {'version': PROTOCOL_VERSION}
+                else:
+                    with self._lock:
+                        statuses = dict(self.statuses)
+                    response = {
+                        'version': PROTOCOL_VERSION,
+                        'options': {
+                            k: self.status_kwargs[k]
+                            for k in ('follow_submodules', 'max_count')
+                        },
+                        'statuses': statuses
+                    }
+                conn.sendall(encode_response(response))
+            except OSError:
+                # client disconnected or timed out -- nothing to do
+                pass
+
+    ########################## TRACKED REPOS ############################
+    def _reload_tracked(self, initial=False):
+        # starts watching newly tracked repositories and stops watching
+        # untracked ones. Initially, statuses are collected before the
+        # daemon starts serving them; afterward, in the background
+        tracked = load_tracked_repos(init_on_fail=False)
+        added = [p for p in tracked if p not in self.tracked]
+        removed = set(self.tracked).difference(tracked)
+        self.tracked = tracked
+        for path in removed:
+            self._unwatch_repo(path)
+            self._dirty.pop(path, None)
+            with self._lock:
+                self.statuses.pop(path, None)
+        for path in added:
+            self._watch_repo(path)
+        if initial:
+            self._refresh(added)
+        else:
+            now = monotonic()
+            for path in added:
+                self._dirty[path] = now
+
+    ############################ WATCHING ###############################
+    def _watch_repo(self, repo_path):
+        if self.inotify is not None and not self._watch_limit_hit:
+            try:
+                # working tree (recursively, except for ignored
+                # directories), top-level git directory (index, HEAD,
+                # packed-refs, config), and refs
+                git_dir = find_git_dir(repo_path)
+                self._watch_tree(repo_path, repo_path, _ignored_dirs(repo_path))
+                self._add_watch(repo_path, git_dir, recursive=False)
+                common_dir = find_common_dir(git_dir)
+                if common_dir != git_dir:
+                    # worktrees share refs, packed-refs & config
+                    self._add_watch(repo_path, common_dir, recursive=False)
+                self._watch_tree(repo_path, pjoin(common_dir, 'refs'))
+                return
+            except OSError as e:
+                self._watch_failed(repo_path, e)
+                return
+        self._poll_repo(repo_path)
+
+    def _watch_failed(self, repo_path, error):
+        # falls back to polling a repository that can't be (fully)
+        # watched. Once the watch limit is reached, so are all repos
+        # tracked from then on
+        if error.errno == ENOSPC and not self._watch_limit_hit:
+            self._watch_limit_hit = True
+            print("\033[31mreached the inotify watch limit "
+                  "(fs.inotify.max_user_watches); polling repositories that "
+                  "can't be watched\033[0m")
+        elif error.errno != ENOSPC:
+            print(f"\033[31munable to watch {repo_path} ({error.strerror}); "
+                  "polling it instead\033[0m")
+        self._unwatch_repo(repo_path)
+        self._poll_repo(repo_path)
+
+    def _poll_repo(self, repo_path):
+        try:
+            self._polled[repo_path] = fingerprint(repo_path)
+        except OSError:
+            self._polled[repo_path] = None
+
+    def _watch_tree(self, repo_path, top, ignored=frozenset()):
+        for dirpath, dirs, _ in os.walk(top):
+            # nested repositories' (e.g., submodules') git directories
+            # aren't part of this repository's working tree, and changes
+            # in ignored directories don't affect its status
+            dirs[:] = [d for d in dirs
+                       if d != '.git' and pjoin(dirpath, d) not in ignored]
+            self._add_watch(repo_path, dirpath, recursive=True)
+
+    def _add_watch(self, repo_path, directory, recursive):
+        wd = self.inotify.add_watch(directory)
+        self._watches[wd] = (repo_path, directory, recursive)
+
+    def _unwatch_repo(self, repo_path):
+        self._polled.pop(repo_path, None)
+        if self.inotify is None:
+            return
+        for wd, (path, _, _) in list(self._watches.items()):
+            if path == repo_path:
+                self.inotify.rm_watch(wd)
+                del self._watches[wd]
+
+    def _handle_events(self):
+        now = monotonic()
+        for wd, mask, name in self.inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped, so any repository may have changed
+                for path in self.tracked:
+                    self._dirty[path] = now
+                continue
+            if wd == self._log_dir_wd:
+                # only writes count -- the daemon's own reads of the
+                # database also close it (IN_CLOSE_WRITE)
+                if name == TRACKED_REPOS_DB_FPATH.name and mask & (IN_MODIFY | IN_CREATE):
+                    self._reload_tracked()
+                continue
+            try:
+                repo_path, directory, recursive = self._watches[wd]
+            except KeyError:
+                # event for a watch that was just removed
+                continue
+            if mask & IN_IGNORED:
+                # directory was deleted (watch removed automatically)
+                del self._watches[wd]
+            elif (recursive and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO)
+                    and name != '.git'):
+                # watch new subdirectories (and anything moved in with
+                # them), unless they're ignored
+                new_dir = pjoin(directory, name)
+                ignored = _ignored_dirs(repo_path, new_dir)
+                if new_dir in ignored:
+                    continue
+                if isdir(new_dir):
+                    try:
+                        self._watch_tree(repo_path, new_dir, ignored)
+                    except OSError as e:
+                        self._watch_failed(repo_path, e)
+            self._dirty[repo_path] = now
+
+    def _poll_unwatched(self):
+        now = monotonic()
+        if not self._polled or now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+        for path, old_fingerprint in self._polled.items():
+            try:
+                new_fingerprint = fingerprint(path)
+            except OSError:
+                new_fingerprint = None
+            # (repositories that can't be fingerprinted are always
+            # refreshed)
+            if new_fingerprint is None or new_fingerprint != old_fingerprint:
+                self._polled[path] = new_fingerprint
+                self._dirty[path] = now
+
+    ########################### REFRESHING ##############################
+    def _refresh_due(self):
+        if self._refreshing is not None and not self._refreshing.done():
+            # wait for previous refresh to finish; repos stay marked dirty
+            return
+        now = monotonic()
+        due = [p for p, t in self._dirty.items() if now - t >= self.debounce]
+        if not due:
+            return
+        for path in due:
+            del self._dirty[path]
+        self._refreshing = self._refresher.submit(self._refresh, due)
+
+    def _refresh(self, repo_paths):
+        try:
+            updated = get_status(repo_paths, **self.status_kwargs)
+        except Exception:
+            # at least one repository failed (e.g., was deleted); refresh
+            # the rest individually. Failed repos are dropped, so clients
+            # fall back to collecting statuses (and validating) directly
+            updated = {}
+            for path in repo_paths:
+                try:
+                    updated.update(get_status([path], **self.status_kwargs))
+                except Exception:
+                    updated[path] = None
+        with self._lock:
+            for path, status in updated.items():
+                if status is None or path not in self.tracked:
+                    self.statuses.pop(path, None)
+                else:
+                    self.statuses[path] = status
+
+
+def _ignored_dirs(repo_path, top=None):
+    # absolute paths of the directories in a repository's working tree
+    # (or just under `top`, including `top` itself) that are ignored,
+    # e.g., node_modules/, build/, .venv/. Empty if git can't tell (e.g.,
+    # isn't installed)
+    cmd = ['git', 'ls-files', '--others', '--ignored', '--exclude-standard',
+           '--directory', '-z']
+    if top is not None:
+        cmd.extend(['--', top])
+    try:
+        listed = run(cmd, cwd=repo_path, stdout=PIPE, stderr=DEVNULL)
+        # ls-files also lists directories that merely contain nothing but
+        # ignored files (which may get tracked files later), so keep only
+        # those matched by an ignore pattern themselves
+        candidates = [entry for entry in listed.stdout.split(b'\0')
+                      if entry.endswith(b'/')]
+        if listed.returncode != 0 or not candidates:
+            return set()
+        checked = run(['git', 'check-ignore', '-z', '--stdin'], cwd=repo_path,
+                      input=b'\0'.join(candidates), stdout=PIPE, stderr=DEVNULL)
+    except OSError:
+        return set()
+    # (exits with 1 if none are ignored)
+    if checked.returncode not in (0, 1):
+        return set()
+    return {pjoin(repo_path, os.fsdecode(entry).rstrip('/'))
+            for entry in checked.stdout.split(b'\0') if entry}
@@ -0,0 +1,9 @@
+# daemon options' defaults, kept separate from the daemon itself so the
+# command line parser can use them without importing it
+# seconds to wait after a repository's last filesystem event before
+# recomputing its status (a single git command can trigger dozens of
+# events in quick succession)
+DEFAULT_DEBOUNCE = 0.5
+# seconds between checks of repositories that can't be watched with
+# inotify (non-Linux platforms, or fs.inotify.max_user_watches exceeded)
+DEFAULT_POLL_INTERVAL = 5
@@ -0,0 +1,107 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+from sys import platform
+
+# event masks from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+# flags for inotify_init1
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# any change to a directory's contents (or the directory itself)
+CHANGE_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+               | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+               | IN_MOVE_SELF | IN_ONLYDIR)
+
+# struct inotify_event {int wd; uint32_t mask, cookie, len; char name[]}
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+class InotifyUnavailable(OSError):
+    pass
+
+
+class Inotify:
+    def __init__(self):
+        """
+        Minimal ctypes wrapper around Linux's inotify API, used to
+        watch (non-recursively) individual directories for changes
+        """
+        if not platform.startswith('linux'):
+            raise InotifyUnavailable("inotify is only available on Linux")
+        libc_path = ctypes.util.find_library('c') or 'libc.so.6'
+        try:
+            self._libc = ctypes.CDLL(libc_path, use_errno=True)
+            init1 = self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise InotifyUnavailable("unable to load inotify from libc") from e
+        self.fd = init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise InotifyUnavailable(errno, os.strerror(errno))
+
+    def add_watch(self, path, mask=CHANGE_MASK):
+        """
+        Starts watching a directory
+        :param path: str
+                the directory to watch
+        :param mask: int (optional)
+                the events to watch for. Defaults to any change
+                to the directory's contents
+        :return: int
+                the watch descriptor, included in events for the
+                directory
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            # notably ENOSPC if fs.inotify.max_user_watches is exceeded
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd):
+        # errors mean the watch was already removed (e.g., its
+        # directory was deleted), which is fine
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """
+        Reads all currently queued events without blocking
+        (use `select` on `self.fd` to wait for events)
+        :return: list
+                list of (wd, mask, name) tuples. `name` is the
+                name of the changed entry within the watched
+                directory, or '' if the event is for the directory
+                itself
+        """
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
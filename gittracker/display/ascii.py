@@ -1,6 +1,4 @@
 # just for fun :)
-import random
-
 # NOTE: this module raises some DepreciationWarnings in the CI tests
 # that may eventually be upgraded to SyntaxWarnings or SyntaxErrors in
 # Python 3.9+ (see https://bugs.python.org/issue32912). However, until
@@ -105,4 +103,10 @@ _  / __ __  /_  __/_  /  __  ___/  __ `/  ___/_  //_/  _ \_  ___/
 ]
 
 DEFAULT_LOGO = LOGOS_ASCII[0]
-RANDOM_LOGO = random.choice(LOGOS_ASCII)
+
+
+def random_logo():
+    # picked when a display is created rather than when this module is
+    # imported, so commands that don't show a logo don't import `random`
+    import random
+    return random.choice(LOGOS_ASCII)
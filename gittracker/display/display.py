@@ -1,8 +1,11 @@
+from collections.abc import Mapping
 from os.path import basename
 from shutil import get_terminal_size
-from .ascii import RANDOM_LOGO
+from .ascii import random_logo
 from .templates import (ANSI_SEQS,
                         OUTER_TEMPLATE,
+                        STREAM_HEADER_TEMPLATE,
+                        STREAM_FOOTER_TEMPLATE,
                         SINGLE_REPO_SIMPLE,
                         SINGLE_REPO_COMPLEX,
                         BRANCH_INFO_STANDARD,
@@ -11,6 +14,7 @@ from .templates import (ANSI_SEQS,
                         SINGLE_CHANGE_STATE,
                         SINGLE_FILE_CHANGE,
                         SINGLE_SUBMODULE)
+from ..tracker.status import SUBMODULE_TIMED_OUT_MSG, is_clean
 from ..utils.utils import clear_display
 
 
@@ -20,11 +24,13 @@ class Displayer:
         Class that handles formatting and displaying information
         for tracked repositories according to the given
         `verbose` level
-        :param repos: dict
+        :param repos: dict or iterable
                 dictionaries of {path: changes} for each repository.
                 `changes` typically contains "git-status"-like
                 information. See `gittracker.tracker.tracker` for
-                further details
+                further details. For `stream_display`, may instead
+                be an iterable of (path, changes) tuples (e.g., from
+                `gittracker.tracker.tracker.iter_status`)
         :param verbose: int {1, 2, 3} (default: 2)
                 verbosity level of output (1 is least verbose)
         :param outfile: pathlib.Path (optional)
@@ -39,7 +45,7 @@ class Displayer:
         self.outfile = outfile
         self.plain = plain
         self.outer_template = OUTER_TEMPLATE
-        self.logo = RANDOM_LOGO
+        self.logo = random_logo()
 
         if self.verbose == 1:
             self.repo_template = SINGLE_REPO_SIMPLE
@@ -101,23 +107,9 @@ class Displayer:
             if is_clean:
                 n_clean += 1
 
-        n_total_fmt = self.apply_style(len(filled_repo_templates), 'bold')
-        if n_clean == len(filled_repo_templates):
-            # no repos have unpushed or uncommitted changes
-            summary_msg = "all up-to-date"
-            summary_msg_fmt = self.apply_style(summary_msg, 'green')
-        elif n_clean == 0:
-            # all repos have unpushed and/or uncommitted changes
-            summary_msg = "all with changes"
-            summary_msg_fmt = self.apply_style(summary_msg, 'red')
-        else:
-            # standard case (mix of repos with & without changes):
-            # color "good"/"bad" counts separately
-            n_dirty = len(filled_repo_templates) - n_clean
-            n_clean_fmt = self.apply_style(n_clean, ('bold', 'green'))
-            n_dirty_fmt = self.apply_style(n_dirty, ('bold', 'red'))
-            summary_msg_fmt = f"{n_clean_fmt} up-to-date, {n_dirty_fmt} with changes"
-
+        n_total_fmt, summary_msg_fmt = self._format_summary(
+            len(filled_repo_templates), n_clean
+        )
         # mapping for self.outer_template
         template_mapping = {
             'ascii_logo': self.logo,
@@ -132,19 +124,36 @@ class Displayer:
         # in cases where repos have no uncommitted changes
         self.full_template = full_template.replace('    \n', '\n')
 
+    def _format_summary(self, n_total, n_clean):
+        # returns the formatted total number of repos and summary
+        # message for the outer template
+        n_total_fmt = self.apply_style(n_total, 'bold')
+        if n_clean == n_total:
+            # no repos have unpushed or uncommitted changes
+            summary_msg = "all up-to-date"
+            summary_msg_fmt = self.apply_style(summary_msg, 'green')
+        elif n_clean == 0:
+            # all repos have unpushed and/or uncommitted changes
+            summary_msg = "all with changes"
+            summary_msg_fmt = self.apply_style(summary_msg, 'red')
+        else:
+            # standard case (mix of repos with & without changes):
+            # color "good"/"bad" counts separately
+            n_dirty = n_total - n_clean
+            n_clean_fmt = self.apply_style(n_clean, ('bold', 'green'))
+            n_dirty_fmt = self.apply_style(n_dirty, ('bold', 'red'))
+            summary_msg_fmt = f"{n_clean_fmt} up-to-date, {n_dirty_fmt} with changes"
+        return n_total_fmt, summary_msg_fmt
+
     def _format_simple(self, repo_info):
         # repo_info is a tuple of (key, value) from self.repos
         repo_path, status = repo_info
         repo_name = basename(repo_path)
-        if any(status[k] for k in ('is_detached', 'n_commits_ahead',
-                                   'n_commits_behind', 'n_staged',
-                                   'n_not_staged', 'n_untracked')):
-            repo_clean = False
-            style = 'red'
-        else:
-            repo_clean = True
-            style = 'green'
+        repo_clean = is_clean(status)
+        style = 'green' if repo_clean else 'red'
         repo_name_fmt = self.apply_style(repo_name, style=style)
+        if status['timed_out']:
+            repo_name_fmt = f"{repo_name_fmt} {self._format_timed_out(status)}"
         template_mapping = {'repo_name': repo_name_fmt}
         filled_template = self.repo_template.safe_substitute(template_mapping)
         return filled_template, repo_clean
@@ -153,15 +162,24 @@ class Displayer:
         # repo_info is a tuple of (key, value) from self.repos
         repo_path, status = repo_info
         repo_name = basename(repo_path)
-        if status['is_detached']:
-            branch_format_func = self._format_branch_detached
+        if status['timed_out'] and not _has_data(status):
+            # nothing to show but the timeout
+            branch_info = self.apply_style("status unknown", 'red')
+            local_changes = "no earlier status to fall back on"
+            repo_clean = False
         else:
-            branch_format_func = self._format_branch_standard
-        branch_info, branch_clean = branch_format_func(status)
-        local_changes, files_clean = self.local_format_func(status)
-        repo_clean = branch_clean and files_clean
+            if status['is_detached']:
+                branch_format_func = self._format_branch_detached
+            else:
+                branch_format_func = self._format_branch_standard
+            branch_info, branch_clean = branch_format_func(status)
+            local_changes, files_clean = self.local_format_func(status)
+            # (a stale status is never "up-to-date")
+            repo_clean = branch_clean and files_clean and not status['timed_out']
         color = 'green' if repo_clean else 'red'
         repo_name_fmt = self.apply_style(repo_name, (color, 'bold'))
+        if status['timed_out']:
+            repo_name_fmt = f"{repo_name_fmt} {self._format_timed_out(status)}"
 
         template_mapping = {
             'repo_name': repo_name_fmt,
@@ -172,6 +190,15 @@ class Displayer:
         filled_template = self.repo_template.safe_substitute(template_mapping)
         return filled_template, repo_clean
 
+    def _format_timed_out(self, repo_status):
+        # marker shown after the name of a repository whose status
+        # couldn't be collected in time
+        if _has_data(repo_status):
+            msg = "(timed out, showing last known status)"
+        else:
+            msg = "(timed out)"
+        return self.apply_style(msg, 'yellow')
+
     def _format_branch_detached(self, repo_status):
         sha_msg = f"HEAD detached at {repo_status['hexsha']}"
         ref_sha = repo_status['ref_sha']
@@ -319,7 +346,7 @@ class Displayer:
         """
         data for each submodule is a 2-tuple where one item is None
           regular case:
-              - item 0 is a dict of same (non-verbose) status-info
+              - item 0 is a RepoStatus of same (non-verbose) status-info
                 returned for regular repository
               - item 1 is None
           alternate case:
@@ -329,27 +356,84 @@ class Displayer:
         """
         filled_submodule_templates = []
         for path, (status, err_msg) in submodules.items():
-            scenario_1 = isinstance(status, dict) and err_msg is None
+            scenario_1 = isinstance(status, Mapping) and err_msg is None
             scenario_2 = status is None and isinstance(err_msg, str)
             assert scenario_1 or scenario_2
             if scenario_1:
-                if any(status[k] for k in ('is_detached', 'n_commits_ahead',
-                                           'n_commits_behind', 'n_staged',
-                                           'n_not_staged', 'n_untracked')):
-                    info = 'working tree is dirty'
-                    style = 'red'
-                else:
+                if is_clean(status):
                     info = 'working tree is clean'
                     style = 'green'
+                else:
+                    info = 'working tree is dirty'
+                    style = 'red'
             else:
                 info = err_msg
-                style = 'red' if err_msg.startswith('HEAD') else 'green'
+                if err_msg.startswith('HEAD') or err_msg == SUBMODULE_TIMED_OUT_MSG:
+                    style = 'red'
+                else:
+                    style = 'green'
             info_fmt = self.apply_style(info, style)
             sm_mapping = {'submodule_path': path, 'submodule_info': info_fmt}
             filled_sm_template = SINGLE_SUBMODULE.safe_substitute(sm_mapping)
             filled_submodule_templates.append(filled_sm_template)
         return '\n'.join(filled_submodule_templates)
 
+    def stream_display(self):
+        """
+        Alternative to `format_status_display` + `display` that
+        outputs each repository's status as soon as it's
+        available (i.e., as `self.repos` yields it), rather than
+        waiting for all repositories' statuses. The summary line
+        is written after the last repository
+        """
+        line_sep = '=' * self.display_width
+        if self.outfile is not None:
+            out = open(self.outfile, 'w')
+        else:
+            clear_display()
+            out = None
+        try:
+            header_mapping = {'ascii_logo': self.logo, 'line_sep': line_sep}
+            self._write(STREAM_HEADER_TEMPLATE.safe_substitute(header_mapping), out)
+            repos = self.repos.items() if isinstance(self.repos, dict) else self.repos
+            n_total = n_clean = 0
+            for repo in repos:
+                filled_repo_template, is_clean = self.repo_format_func(repo)
+                # same cleanup as in `format_status_display`
+                filled_repo_template = filled_repo_template.replace('    \n', '\n')
+                sep = '\n' if n_total == 0 else self.repo_display_sep
+                self._write(sep + filled_repo_template, out)
+                n_total += 1
+                if is_clean:
+                    n_clean += 1
+
+            n_total_fmt, summary_msg_fmt = self._format_summary(n_total, n_clean)
+            footer_mapping = {
+                'line_sep': line_sep,
+                'n_repos_tracked': n_total_fmt,
+                'summary_msg': summary_msg_fmt
+            }
+            footer = STREAM_FOOTER_TEMPLATE.safe_substitute(footer_mapping)
+            self._write(f'\n{footer}\n', out)
+        finally:
+            if out is not None:
+                out.close()
+
+        if self.outfile is not None:
+            confirm_msg = f"GitTracker: output written to file at {self.outfile}"
+            confirm_msg = self.apply_style(value=confirm_msg, style='green')
+            print(confirm_msg)
+        else:
+            print()
+
+    @staticmethod
+    def _write(text, out):
+        # writes streamed output to the file (if given) or the screen
+        if out is None:
+            print(text, end='', flush=True)
+        else:
+            out.write(text)
+
     def display(self):
         if self.outfile is not None:
             # either write the output to a file...
@@ -361,3 +445,9 @@ class Displayer:
             # ...or print it to the screen
             clear_display()
             print(self.full_template, end='\n\n')
+
+
+def _has_data(status):
+    # whether a timed-out status holds a repository's last cached
+    # (i.e., stale) status, or is empty
+    return status['is_detached'] or status['local_branch'] is not None
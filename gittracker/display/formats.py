@@ -0,0 +1,130 @@
+import csv
+import json
+import sys
+from ..tracker.counts import CommitCount
+from ..tracker.status import STATUS_FIELDS, is_clean
+
+# output formats for `gittracker status`. "text" is the regular
+# (`Displayer`) output; the others serialize statuses directly
+FORMATS = ('text', 'json', 'ndjson', 'csv')
+# fields holding commit counts, which are written as plain numbers in
+# every format (see `status_record`)
+_COMMIT_COUNT_FIELDS = ('n_commits_ahead', 'n_commits_behind')
+# CSV columns. Lists of files & submodules don't fit in a single cell,
+# so only their counts are included
+CSV_FIELDS = ('path',
+              'is_clean',
+              'commits_truncated',
+              *(f for f in STATUS_FIELDS
+                if not f.startswith('files_') and f != 'submodules'),
+              'n_submodules')
+# compact separators, since output is meant for machines
+_JSON_SEPARATORS = (',', ':')
+
+
+def status_record(path, status):
+    """
+    Converts a repository's status into a plain dict that can be
+    serialized as JSON
+    :param path: str
+            the repository's path
+    :param status: Mapping
+            the repository's status (see
+            `gittracker.tracker.tracker.get_status`)
+    :return: dict
+            {"path": path, "is_clean": bool, "commits_truncated":
+            bool, **status}. Commit counts are plain numbers;
+            "commits_truncated" is true if counting them stopped at
+            the `max_count` limit, in which case the non-zero counts
+            are lower bounds. Each submodule is a dict of {"path":
+            str, "message": str or None, "status": dict or None},
+            where "status" is the submodule's own record (without
+            its path)
+    """
+    record = {'path': path, 'is_clean': is_clean(status), 'commits_truncated': False}
+    record.update(status.items())
+    for field in _COMMIT_COUNT_FIELDS:
+        count = record[field]
+        if isinstance(count, CommitCount):
+            record['commits_truncated'] |= count.truncated
+            record[field] = int(count)
+    submodules = record['submodules']
+    if submodules is not None:
+        record['submodules'] = [_submodule_record(sm_path, sm_status, msg)
+                                for sm_path, (sm_status, msg) in submodules.items()]
+    return record
+
+
+def _submodule_record(path, status, message):
+    if status is not None:
+        status = status_record(path, status)
+        del status['path']
+    return {'path': path, 'message': message, 'status': status}
+
+
+def write_records(repos, fmt, outfile=None):
+    """
+    Writes repositories' statuses in a machine-readable format,
+    one record per repository, as soon as each is available (no
+    templates, styling, logo or summary)
+    :param repos: dict or iterable
+            {path: status} for each repository, or an iterable of
+            (path, status) tuples (e.g., from
+            `gittracker.tracker.tracker.iter_status`)
+    :param fmt: str
+            "json" (an array of records), "ndjson" (one JSON
+            record per line, flushed as it's written), or "csv" (a
+            header row, then one row per repository; see
+            `CSV_FIELDS`)
+    :param outfile: pathlib.Path (optional)
+            file to write to. If None [default], write to stdout
+    :return: int
+            the number of repositories written
+    """
+    writers = {'json': _write_json, 'ndjson': _write_ndjson, 'csv': _write_csv}
+    if fmt not in writers:
+        raise ValueError(f"fmt must be one of: {', '.join(writers)}. Got {fmt}")
+    repos = repos.items() if isinstance(repos, dict) else repos
+    if outfile is None:
+        return writers[fmt](repos, sys.stdout)
+    # newline='' so the csv module controls line endings
+    with open(outfile, 'w', newline='') as out:
+        return writers[fmt](repos, out)
+
+
+def _write_json(repos, out):
+    n_repos = 0
+    out.write('[')
+    for path, status in repos:
+        if n_repos > 0:
+            out.write(',')
+        out.write('\n')
+        out.write(json.dumps(status_record(path, status), separators=_JSON_SEPARATORS))
+        n_repos += 1
+    out.write('\n]\n')
+    return n_repos
+
+
+def _write_ndjson(repos, out):
+    n_repos = 0
+    for path, status in repos:
+        out.write(json.dumps(status_record(path, status), separators=_JSON_SEPARATORS))
+        out.write('\n')
+        # so consumers reading from a pipe get each record right away
+        out.flush()
+        n_repos += 1
+    return n_repos
+
+
+def _write_csv(repos, out):
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    n_repos = 0
+    for path, status in repos:
+        record = status_record(path, status)
+        submodules = record['submodules']
+        writer.writerow((*(record[f] for f in CSV_FIELDS[:-1]),
+                         # (empty if submodules weren't followed)
+                         None if submodules is None else len(submodules)))
+        n_repos += 1
+    return n_repos
@@ -0,0 +1,106 @@
+import re
+import sys
+from shutil import get_terminal_size
+
+# ANSI escape sequences (e.g., the colors added by `Displayer.apply_style`)
+_ANSI_RE = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
+_TAB_WIDTH = 8
+_HIDE_CURSOR = '\033[?25l'
+_SHOW_CURSOR = '\033[?25h'
+_CLEAR_SCREEN = '\033[H\033[2J'
+_RESET_STYLE = '\033[0m'
+
+
+class LiveScreen:
+    def __init__(self, out=None):
+        """
+        Keeps a block of text on the terminal up to date by only
+        rewriting the lines that changed since the last `render`,
+        using cursor-positioning escape sequences (no `clear`
+        subprocess, no full redraws). Lines are clipped to the
+        terminal's width & height so every line stays on a single
+        row of the screen
+        :param out: file-like object (optional)
+                the terminal to write to. Defaults to sys.stdout
+        """
+        self.out = sys.stdout if out is None else out
+        # lines currently on the screen, as written (i.e., clipped)
+        self.lines = None
+        self._size = None
+
+    def render(self, text):
+        """
+        Shows `text`, redrawing only the rows whose contents changed
+        :param text: str
+                the full text to show (may contain ANSI styling)
+        :return: int
+                the number of rows that were redrawn
+        """
+        size = get_terminal_size()
+        lines = [_clip(line, size.columns) for line in text.split('\n')]
+        # leave the bottom row free so the screen never scrolls
+        lines = lines[:max(1, size.lines - 1)]
+        chunks = []
+        if self.lines is None or size != self._size:
+            # first frame (or the terminal was resized): start from a
+            # blank screen
+            chunks.append(_HIDE_CURSOR + _CLEAR_SCREEN)
+            old_lines = []
+        else:
+            old_lines = self.lines
+        n_redrawn = 0
+        for row, line in enumerate(lines, start=1):
+            if row <= len(old_lines) and old_lines[row - 1] == line:
+                continue
+            # clear the whole row first: erasing from the end of a line
+            # that fills the row would also erase its last character
+            chunks.append(f'\033[{row};1H\033[2K{line}')
+            n_redrawn += 1
+        if len(old_lines) > len(lines):
+            # erase rows left over from a longer previous frame
+            chunks.append(f'\033[{len(lines) + 1};1H\033[J')
+        self.out.write(''.join(chunks))
+        self.out.flush()
+        self.lines = lines
+        self._size = size
+        return n_redrawn
+
+    def close(self):
+        """
+        Moves the cursor below the text and shows it again
+        """
+        if self.lines is not None:
+            self.out.write(f'\033[{len(self.lines) + 1};1H{_SHOW_CURSOR}')
+            self.out.flush()
+
+
+def _clip(line, width):
+    # expands tabs and cuts `line` to `width` visible columns, ignoring
+    # (but keeping) ANSI escape sequences
+    if '\t' not in line and len(line) <= width:
+        return line
+    parts = []
+    col = 0
+    pos = 0
+    clipped = False
+    while pos < len(line):
+        match = _ANSI_RE.match(line, pos)
+        if match is not None:
+            parts.append(match.group())
+            pos = match.end()
+            continue
+        char = line[pos]
+        pos += 1
+        if char == '\t':
+            n_spaces = _TAB_WIDTH - col % _TAB_WIDTH
+            char = ' ' * n_spaces
+        if col + len(char) > width:
+            parts.append(char[:width - col])
+            clipped = True
+            break
+        parts.append(char)
+        col += len(char)
+    if clipped:
+        # don't let styling from the cut-off part leak into the next row
+        parts.append(_RESET_STYLE)
+    return ''.join(parts)
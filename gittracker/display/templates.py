@@ -14,6 +14,22 @@ ${repos_status}\
 )
 
 
+# Wrapper templates for streamed output (`gittracker status --stream`):
+# repositories are displayed as their statuses are collected, so the
+# summary (which depends on all of them) is shown after the last one
+# =======================================================================
+STREAM_HEADER_TEMPLATE = Template(
+"""${ascii_logo}
+${line_sep}\
+"""
+)
+STREAM_FOOTER_TEMPLATE = Template(
+"""${line_sep}
+${n_repos_tracked} tracked repositories: ${summary_msg}\
+"""
+)
+
+
 # Single-repository template: verbosity level 1
 # =======================================================================
 # Only information shown is the repository's name. The name appears in
@@ -1,30 +1,205 @@
 #!/usr/bin/env python3
 
+import sys
+from time import monotonic, sleep, strftime
+from .daemon.client import daemon_status
 from .display.display import Displayer
+from .display.formats import FORMATS, write_records
+from .display.live import LiveScreen
 from .repofile.repofile import load_tracked_repos, validate_tracked
-from .tracker.tracker import get_status
-from .utils.utils import log_error, validate_writable_path
+from .tracker.cache import StatusCache
+from .tracker.durations import DurationLog
+from .tracker.profile import Profiler
+from .tracker.tracker import get_status, iter_status
+from .utils.utils import find_invalid_repos, log_error, validate_writable_path
 
 
 @log_error
-def track(verbose, submodules=0, outfile=None, plain=False):
+def track(
+        verbose,
+        submodules=0,
+        outfile=None,
+        plain=False,
+        jobs=None,
+        backend='gitpython',
+        max_count=None,
+        use_cache=True,
+        use_daemon=True,
+        stream=False,
+        profile=None,
+        fmt='text',
+        watch=None,
+        timeout=None,
+        deadline=None,
+        device_jobs=None
+):
     # first, tweak the verbose arg as a way of allowing a non-zero
     # default value with argparse's "count" action
     verbose = 2 if verbose is None else verbose
     if verbose > 3:
         exit("maximum verbosity level is 3 (i.e., `-vvv`)")
+    if jobs is not None and jobs < 1:
+        exit("number of jobs must be a positive integer")
+    if device_jobs is not None and device_jobs < 1:
+        exit("number of jobs per device must be a positive integer")
+    if max_count is not None and max_count < 1:
+        exit("maximum commit count must be a positive integer")
+    if timeout is not None and timeout <= 0:
+        exit("timeout must be a positive number of seconds")
+    if deadline is not None and deadline <= 0:
+        exit("deadline must be a positive number of seconds")
+    if fmt not in FORMATS:
+        exit(f"format must be one of: {', '.join(FORMATS)}")
+    # machine-readable formats get the statuses alone on stdout, so
+    # anything else goes to stderr
+    machine_readable = fmt != 'text'
+    info_out = sys.stderr if machine_readable else sys.stdout
+    if fmt == 'ndjson':
+        # one record per repository, as soon as it's available
+        stream = True
+    if watch is not None:
+        if watch <= 0:
+            exit("watch interval must be a positive number of seconds")
+        if machine_readable or stream or outfile is not None or profile is not None:
+            exit("--watch can't be combined with --format, --stream, --file, "
+                 "or --profile")
+        if submodules > 0:
+            # repositories with submodules are never cached (fingerprints
+            # don't cover submodules' states), so every refresh would
+            # check every repository again
+            exit("--watch can't be combined with --submodules")
     # validate filepath before running
     outfile = validate_writable_path(outfile)
+    # `profile` is '' to print a profile, or a path to also save it to
+    profiler = None
+    if profile is not None:
+        profiler = Profiler()
+        profile = validate_writable_path(profile or None)
+        # timings can only be recorded for statuses collected here
+        use_daemon = False
     # validate tracked repositories (if any)
     validate_tracked()
     # load in tracked repositories (has to be done separately from validation)
     tracked = load_tracked_repos()
-    # get info for each repository
-    # TODO: how many tracked repositories should be minimum for showing progress bar?
-    status_info = get_status(tracked, verbose=verbose, follow_submodules=submodules)
+    # start on the repositories expected to take longest first
+    durations = DurationLog()
+    status_kwargs = dict(verbose=verbose,
+                         follow_submodules=submodules,
+                         jobs=jobs,
+                         backend=backend,
+                         max_count=max_count,
+                         # only whether each repo is clean is shown at
+                         # verbosity level 1, so stop at the first change
+                         # (except for machine-readable formats, whose
+                         # records always have full counts)
+                         quick=verbose == 1 and not machine_readable,
+                         profiler=profiler,
+                         timeout=timeout,
+                         deadline=deadline,
+                         durations=durations,
+                         device_jobs=device_jobs)
+    if watch is not None:
+        # only repositories whose fingerprints changed are refreshed, so
+        # the cache is always used (in memory only, with --no-cache)
+        cache = StatusCache() if use_cache else StatusCache(fpath=None)
+        _watch(watch, plain, use_daemon, cache, status_kwargs)
+        durations.save()
+        return
+    cache = None
+    # use statuses kept up to date by the GitTracker daemon, if it's running
+    status_info = daemon_status(tracked,
+                                verbose=verbose,
+                                follow_submodules=submodules,
+                                max_count=max_count) if use_daemon else None
+    collected = status_info is None
+    if collected:
+        # reuse statuses of repositories that haven't changed since last run
+        cache = StatusCache() if use_cache else None
+        status_kwargs['cache'] = cache
+        if stream:
+            # statuses are collected as they're displayed
+            status_info = iter_status(tracked, **status_kwargs)
+        elif machine_readable:
+            # same (tracked) order as `get_status`, without its progress bar
+            status_info = dict.fromkeys(tracked)
+            status_info.update(iter_status(tracked, **status_kwargs))
+        else:
+            # get info for each repository
+            # TODO: how many tracked repositories should be minimum for showing progress bar?
+            status_info = get_status(tracked, **status_kwargs)
+    if machine_readable:
+        # serialize the statuses directly, skipping templates & styling
+        write_records(status_info, fmt, outfile=outfile)
+        if outfile is not None:
+            print(f"GitTracker: output written to file at {outfile}", file=info_out)
+    else:
+        _display(status_info, verbose, outfile, plain, stream)
+    if collected:
+        durations.save()
+    if cache is not None:
+        cache.save()
+        if cache.hits + cache.misses > 0:
+            print(f"status cache: {cache.hits} unchanged, "
+                  f"{cache.misses} refreshed", file=info_out)
+    if profiler is not None:
+        print(profiler.format_report(), file=info_out)
+        if profile is not None:
+            profiler.save(profile)
+            print(f"profile written to {profile}", file=info_out)
+
+
+def _display(status_info, verbose, outfile, plain, stream):
     # create Displayer object
     displayer = Displayer(status_info, verbose=verbose, outfile=outfile, plain=plain)
-    # format output for terminal window
-    displayer.format_status_display()
-    # display output
-    displayer.display()
+    if stream:
+        # display each repository as soon as its status is available
+        displayer.stream_display()
+    else:
+        # format output for terminal window
+        displayer.format_status_display()
+        # display output
+        displayer.display()
+
+
+def _watch(interval, plain, use_daemon, cache, status_kwargs):
+    # refreshes statuses every `interval` seconds and redraws the lines
+    # of the display that changed, until interrupted
+    verbose = status_kwargs['verbose']
+    # a single Displayer keeps the same logo from frame to frame
+    displayer = Displayer({}, verbose=verbose, plain=plain)
+    screen = LiveScreen()
+    try:
+        while True:
+            start = monotonic()
+            # repositories may be added, removed, or deleted while watching
+            tracked = load_tracked_repos(init_on_fail=False)
+            invalid = find_invalid_repos(tracked)
+            tracked = [path for path in tracked if path not in invalid]
+            status_info = daemon_status(
+                tracked,
+                verbose=verbose,
+                follow_submodules=status_kwargs['follow_submodules'],
+                max_count=status_kwargs['max_count']
+            ) if use_daemon else None
+            if status_info is None:
+                n_hits = cache.hits
+                # same (tracked) order as `get_status`, without its progress bar
+                status_info = dict.fromkeys(tracked)
+                status_info.update(iter_status(tracked, cache=cache, **status_kwargs))
+                n_refreshed = len(tracked) - (cache.hits - n_hits)
+                source = f"{n_refreshed} refreshed"
+            else:
+                source = "from daemon"
+            displayer.repos = status_info
+            displayer.format_status_display()
+            # shown first, since the display is cut off at the bottom of
+            # the screen if there are too many repositories to fit
+            header = (f"updated {strftime('%H:%M:%S')} ({source}), every "
+                      f"{interval:g}s. Press Ctrl+C to stop")
+            screen.render(f"{header}\n{displayer.full_template}")
+            sleep(max(0, interval - (monotonic() - start)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        screen.close()
+        cache.save()
@@ -1,4 +1,5 @@
 from argparse import ArgumentParser
+from importlib import import_module
 
 
 # noinspection PyProtectedMember
@@ -16,6 +17,9 @@ class CommandParser(ArgumentParser):
         if isinstance(aliases, str):
             aliases = [aliases]
         self.aliases = [] if aliases is None else aliases
+        # either the function itself, or a "module:function" string so the
+        # module (and its dependencies) is only imported if the command
+        # is actually run
         self.py_function = py_function
         if subcommands is None:
             subcommands = []
@@ -139,4 +143,12 @@ class CommandParser(ArgumentParser):
         except ValueError:
             # the args either belong to the present command or invalid
             parsed_args = self.parse_args(raw_args)
-            self.py_function(**vars(parsed_args))
+            self.resolve_function()(**vars(parsed_args))
+
+    def resolve_function(self):
+        # imports the command's function if it was given as a
+        # "module:function" string
+        if isinstance(self.py_function, str):
+            module_name, func_name = self.py_function.split(':')
+            self.py_function = getattr(import_module(module_name), func_name)
+        return self.py_function
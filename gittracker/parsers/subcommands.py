@@ -1,17 +1,18 @@
+# NOTE: commands' functions are passed as "module:function" strings and
+# only imported when the command is run, so commands that don't need
+# GitPython, tqdm, etc. don't pay to import them
 from .commandparser import CommandParser
-from ..gittracker import track
-from ..repofile.repofile import (
-    auto_find_repos,
-    manual_add,
-    manual_init,
-    manual_remove,
-    show_tracked
-)
+from ..daemon.defaults import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL
+from ..display.formats import FORMATS
+from ..tracker.status import BACKENDS
+
+# seconds between refreshes for `gittracker status --watch`
+DEFAULT_WATCH_INTERVAL = 2
 
 status_parser = CommandParser(
     name='status',
     aliases='show',
-    py_function=track,
+    py_function='gittracker.gittracker:track',
     description='show "git-status"-like output for each tracked repository',
     short_description='show the states of tracked repositories [default command]'
 )
@@ -49,6 +50,117 @@ status_parser.add_argument(
          "ignores all submodules, 1 includes only the outer repository's "
          "submodules, etc. NOTE: this option only applies to verbosity level 3."
 )
+status_parser.add_argument(
+    '-j',
+    '--jobs',
+    type=int,
+    metavar='N',
+    help='number of repositories to check concurrently. Defaults to a value '
+         'based on the number of CPUs (pass 1 to check repositories one at a '
+         'time)'
+)
+status_parser.add_argument(
+    '--device-jobs',
+    type=int,
+    metavar='N',
+    help='maximum number of repositories on the same disk or network mount to '
+         'check concurrently. By default, network mounts and spinning disks '
+         'start out with a low limit, and each device\'s limit is adjusted '
+         'based on how long its repositories take compared to previous runs'
+)
+status_parser.add_argument(
+    '--backend',
+    choices=BACKENDS,
+    default='gitpython',
+    help='how to collect each repository\'s status. "gitpython" [default] '
+         'queries branch info, staged, unstaged, and untracked changes '
+         'separately. "porcelain" gets all of them from a single `git status` '
+         'call per repository, which is usually faster for many repositories'
+)
+status_parser.add_argument(
+    '--max-count',
+    type=int,
+    metavar='N',
+    help='stop counting commits ahead of/behind remote branches after N '
+         'commits and report the counts as lower bounds (e.g., "1000+"). '
+         'Useful when some branches have diverged by many thousands of commits'
+)
+status_parser.add_argument(
+    '--no-cache',
+    action='store_false',
+    dest='use_cache',
+    help="recompute every repository's status rather than reusing cached "
+         "statuses of repositories whose git metadata hasn't changed since "
+         "the last run. NOTE: the cache may not notice new untracked files "
+         "in subdirectories until git next updates the repository's index. "
+         "Repositories with submodules, conflicts, or other index features "
+         "that can't be checked without git are never cached"
+)
+status_parser.add_argument(
+    '--stream',
+    action='store_true',
+    help='display each repository as soon as its status is collected, rather '
+         'than waiting for all of them. Repositories are shown in the order '
+         'they finish and the summary is shown last'
+)
+status_parser.add_argument(
+    '--no-daemon',
+    action='store_false',
+    dest='use_daemon',
+    help='collect statuses directly, even if the GitTracker daemon is running '
+         '(see `gittracker daemon --help`)'
+)
+status_parser.add_argument(
+    '--timeout',
+    type=float,
+    metavar='SECONDS',
+    help="maximum time to spend checking each repository (e.g., one on an "
+         "unresponsive network filesystem). Repositories that take longer are "
+         "shown as timed out, with their last cached status if there is one, "
+         "and their git processes are stopped"
+)
+status_parser.add_argument(
+    '--deadline',
+    type=float,
+    metavar='SECONDS',
+    help="maximum time to spend checking all repositories. Repositories that "
+         "haven't finished by then are shown as timed out, the same way as "
+         "for --timeout"
+)
+status_parser.add_argument(
+    '--watch',
+    nargs='?',
+    type=float,
+    const=DEFAULT_WATCH_INTERVAL,
+    metavar='SECONDS',
+    help='keep running and refresh the display every SECONDS seconds '
+         f'(default: {DEFAULT_WATCH_INTERVAL:g}). Only repositories whose git '
+         'metadata changed are checked again, and only the lines of the '
+         'display that changed are redrawn. Can\'t be combined with '
+         '--submodules. Press Ctrl+C to stop'
+)
+status_parser.add_argument(
+    '--profile',
+    nargs='?',
+    const='',
+    metavar='JSON_FILE',
+    help='after the normal output, show the repositories that took longest and '
+         'the time spent in each phase of collecting statuses (resolving HEAD, '
+         'staged/unstaged/untracked changes, commits ahead/behind, '
+         'submodules). Optionally also write the timings to JSON_FILE. '
+         'Implies --no-daemon'
+)
+status_parser.add_argument(
+    '--format',
+    choices=FORMATS,
+    default='text',
+    dest='fmt',
+    help='output format. "text" [default] is the regular display. "json" (an '
+         'array), "ndjson" (one JSON object per line, written as soon as each '
+         'repository\'s status is collected) and "csv" write one record per '
+         'repository, for scripts & monitoring tools, with the full status '
+         '(even with --quiet). Other messages go to stderr'
+)
 status_parser.add_argument(
     '-f',
     '--file',
@@ -67,7 +179,7 @@ status_parser.add_argument(
 find_parser = CommandParser(
     name='find',
     aliases='search',
-    py_function=auto_find_repos,
+    py_function='gittracker.repofile.repofile:auto_find_repos',
     description='let GitTracker search (a section of) the filesystem for '
                 'untracked repositories to start tracking. NOTE: the runtime '
                 'of this command can scale quickly with the scope of the '
@@ -105,6 +217,29 @@ opt_group.add_argument(
     help='directories to exclude from the search (useful to avoid recursing '
          'into a large directory that contains no git repositories)'
 )
+opt_group.add_argument(
+    '-x',
+    '--exclude',
+    nargs='*',
+    metavar='pattern',
+    help='gitignore-style patterns for directories to exclude from the search '
+         '(e.g., "node_modules", "build/", "**/vendor/**"). Patterns containing '
+         'a "/" are relative to top-dir. Patterns can also be listed (one per '
+         'line) in a "find-ignore" file in the log directory (see `gittracker '
+         '--log-dir`)'
+)
+opt_group.add_argument(
+    '--max-depth',
+    type=int,
+    metavar='N',
+    help='search at most N levels of directories below top-dir'
+)
+opt_group.add_argument(
+    '--one-file-system',
+    action='store_true',
+    help="don't search directories on other filesystems (e.g., network "
+         'mounts) than top-dir'
+)
 opt_group.add_argument(
     '--search-hidden',
     action='store_true',
@@ -117,6 +252,22 @@ opt_group.add_argument(
     help='pass to show live output of directories searched (can be useful for '
          'very large directory structures)'
 )
+opt_group.add_argument(
+    '-j',
+    '--jobs',
+    type=int,
+    metavar='N',
+    help='number of directories to search concurrently. Defaults to a value '
+         'based on the number of CPUs (pass 1 to search one directory at a '
+         'time)'
+)
+opt_group.add_argument(
+    '--full',
+    action='store_true',
+    dest='full_scan',
+    help='list every directory, rather than only those that have changed '
+         'since the last search under the same directories'
+)
 opt_group.add_argument(
     '--permission-err',
     choices=('ignore', 'show', 'raise'),
@@ -131,7 +282,7 @@ opt_group.add_argument(
 add_parser = CommandParser(
     name='add',
     aliases='track',
-    py_function=manual_add,
+    py_function='gittracker.repofile.repofile:manual_add',
     description='add new repositories to GitTracker'
 )
 add_parser.add_argument(
@@ -145,7 +296,7 @@ add_parser.add_argument(
 
 init_parser = CommandParser(
     name='init',
-    py_function=manual_init,
+    py_function='gittracker.repofile.repofile:manual_init',
     description='initialize GitTracker for the first time. Using this is '
                 'optional, as the `add` or `find/search` commands will achieve '
                 'the same effect, but `init` will guide you through adding '
@@ -159,7 +310,7 @@ init_parser = CommandParser(
 remove_parser = CommandParser(
     name='remove',
     aliases='rm',
-    py_function=manual_remove,
+    py_function='gittracker.repofile.repofile:manual_remove',
     description='',
     short_description='stop tracking a repository with GitTracker'
 )
@@ -182,7 +333,7 @@ remove_parser.add_argument(
 list_parser = CommandParser(
     name='list',
     aliases='ls',
-    py_function=show_tracked,
+    py_function='gittracker.repofile.repofile:show_tracked',
     description='list the currently tracked repositories'
 )
 list_parser.add_argument(
@@ -192,11 +343,76 @@ list_parser.add_argument(
     help='show only the repository name rather than the full path'
 )
 
+################################################################################
+
+daemon_parser = CommandParser(
+    name='daemon',
+    py_function='gittracker.daemon.daemon:run_daemon',
+    description='run a background process that watches tracked repositories '
+                'for changes and keeps their statuses up to date, so '
+                '`gittracker status` can display them instantly. While the '
+                'daemon is running, `gittracker status` gets statuses from it '
+                'automatically. The daemon runs in the foreground; use your '
+                'shell or service manager to run it in the background.',
+    short_description='keep statuses up to date in the background'
+)
+daemon_parser.add_argument(
+    '--submodules',
+    default=0,
+    type=int,
+    metavar='DEPTH',
+    help='maximum recursion depth for analyzing nested submodules (see '
+         '`gittracker status --help`)'
+)
+daemon_parser.add_argument(
+    '--debounce',
+    default=DEFAULT_DEBOUNCE,
+    type=float,
+    metavar='SECONDS',
+    help='how long to wait after the last change to a repository before '
+         f'updating its status (default: {DEFAULT_DEBOUNCE})'
+)
+daemon_parser.add_argument(
+    '--poll-interval',
+    default=DEFAULT_POLL_INTERVAL,
+    type=float,
+    metavar='SECONDS',
+    help='how often to check repositories that can\'t be watched for changes '
+         f'directly (default: {DEFAULT_POLL_INTERVAL})'
+)
+daemon_parser.add_argument(
+    '-j',
+    '--jobs',
+    type=int,
+    metavar='N',
+    help='number of repositories to check concurrently'
+)
+daemon_parser.add_argument(
+    '--backend',
+    choices=BACKENDS,
+    default='gitpython',
+    help='how to collect each repository\'s status (see `gittracker status '
+         '--help`)'
+)
+daemon_parser.add_argument(
+    '--max-count',
+    type=int,
+    metavar='N',
+    help='stop counting commits ahead of/behind remote branches after N '
+         'commits (see `gittracker status --help`)'
+)
+daemon_parser.add_argument(
+    '--stop',
+    action='store_true',
+    help='stop the running daemon'
+)
+
 SUBCOMMANDS = [
     status_parser,
     find_parser,
     add_parser,
     init_parser,
     remove_parser,
-    list_parser
+    list_parser,
+    daemon_parser
 ]
\ No newline at end of file
@@ -0,0 +1,147 @@
+import re
+from pathlib import Path
+from ..utils.utils import LOG_DIR
+
+# gitignore-style patterns for directories `gittracker find` should
+# never search, one per line, applied in addition to those passed with
+# `--exclude`
+FIND_IGNORE_FPATH = Path(LOG_DIR, 'find-ignore')
+
+
+class IgnorePatterns:
+    def __init__(self, patterns=()):
+        """
+        Matches directories' paths (relative to the top-level
+        directory being searched) against gitignore-style patterns:
+          - `*` and `?` match anything but a `/`, `[...]` matches a
+            character class, and `**` matches across directories
+            (e.g., `**/build`, `vendor/**`, `a/**/b`)
+          - patterns containing a `/` (other than a trailing one)
+            are anchored to the top-level directory; others match
+            a directory's name at any depth
+          - a leading `!` re-includes directories excluded by an
+            earlier pattern (the last matching pattern wins)
+          - blank lines and lines starting with `#` are ignored
+        All patterns are compiled into a single regular expression,
+        so matching a directory is one regex match regardless of the
+        number of patterns
+        :param patterns: iterable of str (optional)
+                the patterns, in order of increasing precedence
+        """
+        self.patterns = []
+        # whether each pattern is negated, in the order they appear in
+        # the compiled regex (highest precedence first)
+        self._negated = []
+        alternatives = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            self.patterns.append(pattern)
+            negated = pattern.startswith('!')
+            if negated:
+                pattern = pattern[1:]
+            pattern = pattern.rstrip('/')
+            if not pattern:
+                continue
+            alternatives.append(f'({_translate(pattern)})')
+            self._negated.append(negated)
+        # the last matching pattern takes precedence, and the first
+        # matching alternative is the one reported
+        alternatives.reverse()
+        self._negated.reverse()
+        if alternatives:
+            self._regex = re.compile('|'.join(alternatives), re.DOTALL)
+        else:
+            self._regex = None
+
+    @classmethod
+    def from_file(cls, fpath=FIND_IGNORE_FPATH, extra_patterns=()):
+        """
+        Reads patterns from a file (one per line), followed by
+        `extra_patterns` (which take precedence)
+        :param fpath: pathlib.Path (optional)
+                path to the patterns file. Defaults to
+                `FIND_IGNORE_FPATH`. A missing file has no patterns
+        :param extra_patterns: iterable of str (optional)
+                additional patterns, e.g., passed on the command line
+        :return: IgnorePatterns
+                the combined patterns
+        """
+        try:
+            with open(fpath, 'r') as f:
+                patterns = f.read().splitlines()
+        except FileNotFoundError:
+            patterns = []
+        return cls([*patterns, *extra_patterns])
+
+    def __bool__(self):
+        return self._regex is not None
+
+    def is_ignored(self, relpath):
+        """
+        :param relpath: str
+                a directory's path relative to the top-level
+                directory, with `/` separators
+        :return: bool
+                whether the directory is excluded
+        """
+        if self._regex is None:
+            return False
+        match = self._regex.fullmatch(relpath)
+        if match is None:
+            return False
+        # alternatives are capturing groups numbered from 1
+        return not self._negated[match.lastindex - 1]
+
+
+def _translate(pattern):
+    # translates a single gitignore-style pattern into a regex (without
+    # capturing groups) matching relative directory paths
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    parts = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == '*':
+            j = i
+            while j < n and pattern[j] == '*':
+                j += 1
+            at_start = i == 0 or pattern[i - 1] == '/'
+            if j - i >= 2 and at_start and j == n:
+                # trailing "/**": everything inside
+                parts.append('.*')
+            elif j - i >= 2 and at_start and pattern[j] == '/':
+                # leading "**/" or "/**/": zero or more directories
+                parts.append('(?:.*/)?')
+                j += 1
+            else:
+                parts.append('[^/]*')
+            i = j
+        elif char == '?':
+            parts.append('[^/]')
+            i += 1
+        elif char == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+                i += 1
+                continue
+            chars = pattern[i + 1:end]
+            if chars[0] in '!^':
+                chars = '^' + chars[1:]
+            parts.append(f"[{chars.replace(chr(92), chr(92) * 2)}]")
+            i = end + 1
+        elif char == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    regex = ''.join(parts)
+    if not anchored:
+        # matches the directory's name at any depth
+        regex = '(?:.*/)?' + regex
+    return regex
@@ -1,26 +1,30 @@
-from os import getcwd, walk
+from os import getcwd
 from os.path import basename, isdir
-from pathlib import Path
 from sys import exit
+from .patterns import IgnorePatterns
+from .scanner import DirSnapshot, RepoScanner
+from .store import TRACKED_REPOS_DB_FPATH, RepoStore
 from ..display.ascii import DEFAULT_LOGO
 from ..utils.exceptions import (
     BugIdentified,
-    GitTrackerError,
     NoGitdirError,
     RepoNotFoundError
 )
 from ..utils.utils import (
     GITHUB_URL,
-    LOG_DIR,
     cleanpath,
     clear_display,
+    find_invalid_repos,
     log_error,
     prompt_input,
     validate_repo
 )
 
 
-TRACKED_REPOS_FPATH = Path(LOG_DIR, 'tracked-repos')
+def repo_store():
+    # the store of tracked repositories (created, and migrated from the
+    # legacy tracked-repos file, the first time it's opened)
+    return RepoStore(TRACKED_REPOS_DB_FPATH)
 
 
 @log_error(show=True)
@@ -30,9 +34,14 @@ def auto_find_repos(
         search_hidden=False,
         verbose=False,
         permission_err='show',
+        jobs=None,
+        full_scan=False,
+        exclude=None,
+        max_depth=None,
+        one_file_system=False
 ):
     # TODO: add a custom tqdm subclass that
-    already_tracked = load_tracked_repos(init_on_fail=False)
+    already_tracked = set(load_tracked_repos(init_on_fail=False))
     # defaults to searching under current working directory
     toplevel_dir = cleanpath(toplevel_dir)
     if not isdir(toplevel_dir):
@@ -80,25 +89,35 @@ def auto_find_repos(
 
     def _filter_func(x): return _dir_filter(x) and _hidden_filter(x)
 
-    # walk directory structure from outermost level
-    repos_found = []
+    # gitignore-style patterns from the config file & command line
+    patterns = IgnorePatterns.from_file(extra_patterns=exclude or ())
+    if max_depth is not None and max_depth < 0:
+        exit("max_depth must be a non-negative integer")
+
+    # search directory structure from outermost level. Repositories (and
+    # directories excluded by argument options) aren't recursed into
+    # unless a full scan is requested, directories that haven't changed
+    # since the last search aren't listed again
     print("searching for git repositories...")
-    for dirpath, dirs, files in walk(toplevel_dir, onerror=_onerr_func):
-        print(f"{len(repos_found)} repositories found", end='\r')
-        # if the directory contains a .git folder, we're probably found one
-        if '.git' in dirs:
-            if dirpath in already_tracked:
-                # skip previously added repos and their subdirectories
-                print(f"skipping {dirpath} (already tracked)")
-                dirs[:] = []
-                continue
-            if verbose:
-                print(dirpath)
-            repos_found.append(dirpath)
-            # don't recurse further into identified git repositories
-            dirs[:] = []
-        # don't recurse into directories excluded by argument options
-        dirs[:] = list(filter(_filter_func, dirs))
+    snapshot = DirSnapshot()
+    scanner = RepoScanner(dir_filter=_filter_func,
+                          is_tracked=already_tracked.__contains__,
+                          jobs=jobs,
+                          onerror=_onerr_func,
+                          snapshot={} if full_scan else snapshot.entries,
+                          patterns=patterns,
+                          max_depth=max_depth,
+                          one_file_system=one_file_system)
+
+    def _show_found(dirpath): print(f"\033[K{dirpath}")
+    def _show_tracked(dirpath): print(f"\033[Kskipping {dirpath} (already tracked)")
+    def _show_progress(n): print(f"{n} repositories found", end='\r')
+
+    repos_found, _ = scanner.scan(toplevel_dir,
+                                  on_found=_show_found if verbose else None,
+                                  on_tracked=_show_tracked,
+                                  progress=_show_progress)
+    snapshot.save(toplevel_dir, scanner.new_snapshot)
 
     clear_display()
     n_found = len(repos_found)
@@ -118,12 +137,9 @@ def auto_find_repos(
             possible_bug=True
         )
         if add_confirmed:
-            with open(TRACKED_REPOS_FPATH, 'a') as f:
-                f.write('\n'.join(repos_found))
-                # always leave newline at end for simplicity
-                f.write('\n')
+            repo_store().add(repos_found)
             exit(f"\033[32mGitTracker: {n_found} new repositor{suff1} stored "
-                 f"for tracking in logfile at\n\t{TRACKED_REPOS_FPATH}\033[0m")
+                 f"for tracking in database at\n\t{TRACKED_REPOS_DB_FPATH}\033[0m")
 
 
 def manual_init():
@@ -173,26 +189,21 @@ def _initialize_file(internal=True):
 
 
 def load_tracked_repos(init_on_fail=True):
-    # loads in tracked-repos file as a list of paths (strings)
+    # loads in tracked repositories as a list of paths (strings)
     # situation-dependent, either prompts to initialize file
     # or returns an empty list
-    try:
-        with open(TRACKED_REPOS_FPATH, 'r') as f:
-            paths = f.read().splitlines()
-            assert len(paths) > 0
-    except (AssertionError, FileNotFoundError):
-        if init_on_fail:
-            _initialize_file()
-            with open(TRACKED_REPOS_FPATH, 'r') as f:
-                paths = f.read().splitlines()
-        else:
-            paths = []
+    paths = repo_store().paths()
+    if len(paths) == 0 and init_on_fail:
+        _initialize_file()
+        paths = repo_store().paths()
 
     return paths
 
 
 @log_error
 def manual_add(repo_paths):
+    store = repo_store()
+    already_tracked = set(store.paths())
     added = []
     for repo_path in repo_paths:
         full_path = cleanpath(repo_path)
@@ -211,19 +222,17 @@ def manual_add(repo_paths):
             valid = prompt_input(prompt, default='no')
 
         if valid:
-            if full_path in load_tracked_repos(init_on_fail=False):
+            if full_path in already_tracked:
                 # don't add a duplicate if the repository is already being tracked
                 print(f"\n\033[31m{full_path} is already tracked by "
                       "GitTracker\033[0m\n")
             else:
+                already_tracked.add(full_path)
                 added.append(full_path)
 
     if any(added):
-        with open(TRACKED_REPOS_FPATH, 'a') as f:
-            for path in added:
-                f.write(path)
-                f.write('\n')
-
+        # all paths are added in a single transaction
+        added = store.add(added)
         suffix = 'ies' if len(added) > 1 else 'y'
         added_fmt = '\n\t'.join(added)
         print(f"\n\033[32mGitTracker: tracking {len(added)} new "
@@ -232,33 +241,33 @@ def manual_add(repo_paths):
 
 def manual_remove(repo_paths, confirm=True):
     # manually remove a repository from
-    # tracked-repos file and stop tracking it
-    tracked_repos = load_tracked_repos(init_on_fail=False)
-    removed = []
+    # tracked repositories and stop tracking it
+    store = repo_store()
+    tracked_repos = set(store.paths())
+    # {full path: path as passed}
+    removed = {}
     not_tracked = []
     for repo_path in repo_paths:
         full_path = cleanpath(repo_path)
-        try:
-            tracked_repos.remove(full_path)
-            # get confirmation after removing the entry from the list (but
-            # before updating the file) so the "not currently tracked" message
-            # takes precedent
-            if confirm:
-                prompt = f"are you sure you want to stop tracking {full_path}?"
-                confirmed = prompt_input(prompt, default='no')
-            else:
-                confirmed = True
-
-            if confirmed:
-                with open(TRACKED_REPOS_FPATH, 'w') as f:
-                    f.write('\n'.join(tracked_repos))
-                    # always leave newline at end for simplicity
-                    f.write('\n')
-                removed.append(repo_path)
-            else:
-                print(f"{full_path} not removed")
-        except ValueError:
+        if full_path not in tracked_repos:
             not_tracked.append(repo_path)
+            continue
+        # don't ask about the same repository twice
+        tracked_repos.remove(full_path)
+        if confirm:
+            prompt = f"are you sure you want to stop tracking {full_path}?"
+            confirmed = prompt_input(prompt, default='no')
+        else:
+            confirmed = True
+
+        if confirmed:
+            removed[full_path] = repo_path
+        else:
+            print(f"{full_path} not removed")
+
+    # all confirmed paths are removed in a single transaction
+    store.remove(removed.keys())
+    removed = list(removed.values())
 
     if any(not_tracked):
         not_tracked_fmt = '\n\t'.join(not_tracked)
@@ -292,108 +301,97 @@ def show_tracked(quiet=False):
 def validate_tracked():
     def _update_repofile(tracked_paths, replacements, removals):
         # helper function that takes care of updating/removing
-        # user-specified repo paths in the logfile, either after
+        # user-specified repo paths in the store, either after
         # checking all existing paths or as cleanup before raising
         # exception
         if len(replacements) == 0 and len(removals) == 0:
             return
-        # replace updated paths
-        for old, new in replacements:
-            ix = tracked_paths.index(old)
-            tracked_paths[ix] = new
-        # remove deleted paths
-        for removal in removals:
-            tracked_paths.remove(removal)
-        with open(TRACKED_REPOS_FPATH, 'w') as f:
-            f.write('\n'.join(tracked_paths))
-            # always leave newline at end of file for convenience
-            f.write('\n')
+        repo_store().update(replacements, removals)
 
     tracked = load_tracked_repos(init_on_fail=False)
     # list of tuples (old path, new path)
     to_replace = []
     # list of paths to be removed
     to_remove = []
-    for repo_path in tracked:
-        try:
-            validate_repo(repo_path)
-        except GitTrackerError as e:
-            if isinstance(e, RepoNotFoundError):
-                error_info = "\n\033[31mPreviously tracked repository at " \
-                             f"{repo_path} appears to no longer exist\033[0m.\n" \
-                             "Has the repository been moved or deleted?"
-
-            elif isinstance(e, RepoNotFoundError):
-                error_info = "\n\033[31mPreviously tracked directory at " \
-                             f"{repo_path} appears to no longer be a git " \
-                             "repository (no .git directory found)\033[0m.\n" \
-                             "Has the repository been moved or deleted?"
-            else:
-                # unexpected exception occurred -- theoretically should never
-                # get here, but works as a failsafe
+    # check all repositories up front (concurrently), then prompt for
+    # the ones that failed
+    for repo_path, e in find_invalid_repos(tracked).items():
+        if isinstance(e, RepoNotFoundError):
+            error_info = "\n\033[31mPreviously tracked repository at " \
+                         f"{repo_path} appears to no longer exist\033[0m.\n" \
+                         "Has the repository been moved or deleted?"
+
+        elif isinstance(e, NoGitdirError):
+            error_info = "\n\033[31mPreviously tracked directory at " \
+                         f"{repo_path} appears to no longer be a git " \
+                         "repository (no .git directory found)\033[0m.\n" \
+                         "Has the repository been moved or deleted?"
+        else:
+            # unexpected exception occurred -- theoretically should never
+            # get here, but works as a failsafe
+            _update_repofile(tracked, to_replace, to_remove)
+            raise e
+
+        options_info = "- Enter 'u' to update the repository's path\n\t" \
+                       "- Enter 'd' to stop tracking the repository\n\t" \
+                       "- Enter 'b' if you think you've encountered a " \
+                       "bug in GitTracker\n\t" \
+                       "- Enter 'q' to quit"
+        options = '[u/d/b/q]'
+        response = input(
+            f"{error_info}\n\n\t{options_info}\n\n{options}\n"
+        ).lower()
+        while True:
+            if response == 'u':
+                update_prompt = "\nplease enter the updated path for " \
+                                f"{repo_path}"
+                input_path = input(update_prompt)
+                full_path = cleanpath(input_path)
+                try:
+                    validate_repo(full_path)
+                    replace_confirmed = True
+                except RepoNotFoundError:
+                    override_prompt = f"\n{full_path} does not appear to " \
+                                      "be a directory. Add it anyway?"
+                    replace_confirmed = prompt_input(
+                        override_prompt,
+                        default='no',
+                        possible_bug=True
+                    )
+                except NoGitdirError:
+                    override_prompt = f"\n{full_path} does not appear to " \
+                                      "be a git repository. Add it anyway?"
+                    replace_confirmed = prompt_input(
+                        override_prompt,
+                        default='no',
+                        possible_bug=True
+                    )
+                if replace_confirmed:
+                    to_replace.append((repo_path, full_path))
+                    break
+            elif response == 'd':
+                delete_prompt = f"\nstop tracking {repo_path}?"
+                delete_confirmed = prompt_input(delete_prompt, default='no')
+                if delete_confirmed:
+                    to_remove.append(repo_path)
+                    break
+            elif response == 'b':
                 _update_repofile(tracked, to_replace, to_remove)
-                raise e
-
-            options_info = "- Enter 'u' to update the repository's path\n\t" \
-                           "- Enter 'd' to stop tracking the repository\n\t" \
-                           "- Enter 'b' if you think you've encountered a " \
-                           "bug in GitTracker\n\t" \
-                           "- Enter 'q' to quit"
-            options = '[u/d/b/q]'
-            response = input(
-                f"{error_info}\n\n\t{options_info}\n\n{options}\n"
-            ).lower()
-            while True:
-                if response == 'u':
-                    update_prompt = "\nplease enter the updated path for " \
-                                    f"{repo_path}"
-                    input_path = input(update_prompt)
-                    full_path = cleanpath(input_path)
-                    try:
-                        validate_repo(full_path)
-                        replace_confirmed = True
-                    except RepoNotFoundError:
-                        override_prompt = f"\n{full_path} does not appear to " \
-                                          "be a directory. Add it anyway?"
-                        replace_confirmed = prompt_input(
-                            override_prompt,
-                            default='no',
-                            possible_bug=True
-                        )
-                    except NoGitdirError:
-                        override_prompt = f"\n{full_path} does not appear to " \
-                                          "be a git repository. Add it anyway?"
-                        replace_confirmed = prompt_input(
-                            override_prompt,
-                            default='no',
-                            possible_bug=True
-                        )
-                    if replace_confirmed:
-                        to_replace.append((repo_path, full_path))
-                        break
-                elif response == 'd':
-                    delete_prompt = f"\nstop tracking {repo_path}?"
-                    delete_confirmed = prompt_input(delete_prompt, default='no')
-                    if delete_confirmed:
-                        to_remove.append(repo_path)
-                        break
-                elif response == 'b':
-                    _update_repofile(tracked, to_replace, to_remove)
-                    raise BugIdentified
-                elif response == 'q':
-                    print("exiting...")
-                    _update_repofile(tracked, to_replace, to_remove)
-                    exit(0)
-                else:
-                    # response was not one of the options
-                    not_input_prompt = f"unrecognized option {response}."
-                    response = input(
-                        f"{not_input_prompt}\n\n\t{options_info}\n\n{options}\n"
-                    ).lower()
-                    continue
-                # re-prompt with options if user wants to "go back" (e.g., does
-                # not confirm deletion or update because they hit the wrong key)
-                response = input(f"\t{options_info}\n\n{options}\n").lower()
+                raise BugIdentified
+            elif response == 'q':
+                print("exiting...")
+                _update_repofile(tracked, to_replace, to_remove)
+                exit(0)
+            else:
+                # response was not one of the options
+                not_input_prompt = f"unrecognized option {response}."
+                response = input(
+                    f"{not_input_prompt}\n\n\t{options_info}\n\n{options}\n"
+                ).lower()
+                continue
+            # re-prompt with options if user wants to "go back" (e.g., does
+            # not confirm deletion or update because they hit the wrong key)
+            response = input(f"\t{options_info}\n\n{options}\n").lower()
 
     # finally, update file with changes (if any) after all are validated
     _update_repofile(tracked, to_replace, to_remove)
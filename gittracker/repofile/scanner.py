@@ -0,0 +1,342 @@
+import os
+import pickle
+from collections import deque
+from os.path import join as pjoin
+from pathlib import Path
+from threading import Condition, Event, Thread
+from time import time
+from ..utils.utils import LOG_DIR
+
+# default max number of threads used to search the filesystem. Listing
+# directories is I/O-bound (and releases the GIL), so more threads than
+# CPUs helps, especially on network filesystems
+MAX_AUTO_JOBS = 32
+# seconds between progress updates
+PROGRESS_INTERVAL = 0.1
+FIND_SNAPSHOT_FPATH = Path(LOG_DIR, 'find-snapshot')
+# bump whenever the format of snapshot entries changes
+SNAPSHOT_VERSION = 1
+# directories modified this close (in ns) to the start of a search may be
+# modified again without their mtime changing, so they're always listed
+# on the next search
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class RepoScanner:
+    def __init__(self, dir_filter=None, is_tracked=None, jobs=None, onerror=None,
+                 snapshot=None, patterns=None, max_depth=None,
+                 one_file_system=False):
+        """
+        Searches a directory tree for git repositories using a pool
+        of threads. Each thread lists directories with `os.scandir`
+        and pushes the subdirectories it finds onto its own deque,
+        which it works through depth-first; threads that run out of
+        work steal directories from the other end of another
+        thread's deque. Directory entries' types come from
+        `os.DirEntry`, so entries are never stat-ed more than once
+        (and usually not at all).
+        Same semantics as walking the tree with `os.walk`: a
+        directory containing a `.git` directory is a repository and
+        isn't searched further, symlinks to directories aren't
+        followed, and subdirectories excluded by `dir_filter` or
+        `patterns` are skipped
+        :param dir_filter: callable (optional)
+                called with each subdirectory's name; the directory
+                is searched only if it returns True. If None, all
+                subdirectories are searched
+        :param is_tracked: callable (optional)
+                called with each repository's path; repositories
+                for which it returns True are reported as already
+                tracked rather than found
+        :param jobs: int or None (optional)
+                number of threads. If None, picks a value based on
+                the number of CPUs
+        :param onerror: callable (optional)
+                called with the `OSError` raised when a directory
+                can't be listed (e.g., a `PermissionError`). If
+                None, such directories are silently skipped
+        :param snapshot: dict or None (optional)
+                directory snapshot from a previous search (see
+                `DirSnapshot`). Directories whose mtime & inode
+                haven't changed since are not listed again; their
+                subdirectories (which may have changed) are checked
+                with a single `stat` each instead. If None, every
+                directory is listed and no new snapshot is taken
+        :param patterns: IgnorePatterns or None (optional)
+                gitignore-style patterns for subdirectories to skip,
+                matched against their paths relative to the top-level
+                directory (see `.patterns.IgnorePatterns`)
+        :param max_depth: int or None (optional)
+                maximum depth of directories to search below the
+                top-level directory (0 searches only the top-level
+                directory itself). If None, there's no limit
+        :param one_file_system: bool (optional)
+                if True, directories on a different filesystem (i.e.,
+                device) from the top-level directory aren't searched
+        """
+        if jobs is None:
+            jobs = min(MAX_AUTO_JOBS, (os.cpu_count() or 1) + 4)
+        self.jobs = max(1, jobs)
+        self.dir_filter = dir_filter
+        self.is_tracked = is_tracked
+        self.onerror = onerror
+        self.snapshot = snapshot
+        self.patterns = patterns if patterns else None
+        self.max_depth = max_depth
+        self.one_file_system = one_file_system
+        self.found = []
+        self.tracked = []
+        # {path: entry} for each directory searched, to be passed as
+        # `snapshot` next time
+        self.new_snapshot = {}
+        # number of directories actually listed (not reused from the
+        # snapshot)
+        self.n_listed = 0
+        self._racy_after = None
+        self._root_prefix_len = None
+        self._root_dev = None
+        self._deques = []
+        # number of directories queued or being listed. The search is
+        # done when this reaches 0
+        self._n_pending = 0
+        self._error = None
+        self._cond = Condition()
+        self._done = Event()
+        self._on_found = None
+        self._on_tracked = None
+
+    def scan(self, toplevel_dir, on_found=None, on_tracked=None, progress=None):
+        """
+        Searches `toplevel_dir` (inclusive) for repositories
+        :param toplevel_dir: str
+                absolute path to the directory to search under
+        :param on_found: callable (optional)
+                called (from a worker thread) with each untracked
+                repository's path as soon as it's found
+        :param on_tracked: callable (optional)
+                called (from a worker thread) with each already
+                tracked repository's path as soon as it's found
+        :param progress: callable (optional)
+                called periodically (from the calling thread) with
+                the number of repositories found so far
+        :return: tuple
+                2-tuple of (found, tracked): sorted lists of paths
+                to untracked and already tracked repositories
+        """
+        self.found = []
+        self.tracked = []
+        self.new_snapshot = {}
+        self.n_listed = 0
+        # (`time.time_ns` isn't available on Python 3.6)
+        self._racy_after = int(time() * 1e9) - RACY_WINDOW_NS
+        self._root_prefix_len = len(toplevel_dir.rstrip(os.sep)) + 1
+        if self.one_file_system:
+            self._root_dev = os.stat(toplevel_dir).st_dev
+        self._on_found = on_found
+        self._on_tracked = on_tracked
+        self._error = None
+        self._done.clear()
+        self._deques = [deque() for _ in range(self.jobs)]
+        # (path, depth) of each directory to search
+        self._deques[0].append((toplevel_dir, 0))
+        self._n_pending = 1
+        threads = [Thread(target=self._work, args=(i,), daemon=True)
+                   for i in range(self.jobs)]
+        for thread in threads:
+            thread.start()
+        while not self._done.wait(PROGRESS_INTERVAL):
+            if progress is not None:
+                progress(len(self.found))
+        for thread in threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+        return sorted(self.found), sorted(self.tracked)
+
+    def _work(self, ix):
+        own = self._deques[ix]
+        while True:
+            try:
+                # newest directory first (depth-first), which keeps the
+                # deques short
+                item = own.pop()
+            except IndexError:
+                item = self._steal(ix)
+            if item is None:
+                with self._cond:
+                    # sleep until another thread queues more directories,
+                    # or the search is finished
+                    while (self._n_pending > 0 and self._error is None
+                           and not any(self._deques)):
+                        self._cond.wait()
+                    if self._n_pending == 0 or self._error is not None:
+                        return
+                continue
+            try:
+                subdirs, listed = self._scan_dir(*item)
+            except BaseException as e:
+                with self._cond:
+                    if self._error is None:
+                        self._error = e
+                    self._cond.notify_all()
+                self._done.set()
+                return
+            with self._cond:
+                if self._error is not None:
+                    return
+                own.extend(subdirs)
+                self.n_listed += listed
+                self._n_pending += len(subdirs) - 1
+                if self._n_pending == 0:
+                    self._cond.notify_all()
+                    self._done.set()
+                elif subdirs:
+                    self._cond.notify(len(subdirs))
+
+    def _steal(self, ix):
+        # takes the oldest directory (closest to the top of the tree, so
+        # likely the most work) from another thread's deque
+        n_deques = len(self._deques)
+        for offset in range(1, n_deques):
+            try:
+                return self._deques[(ix + offset) % n_deques].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _scan_dir(self, path, depth):
+        # lists a single directory (or reuses its snapshot entry) and
+        # records it if it's a repository. Returns the (path, depth) of
+        # each subdirectory to search, and whether the directory was
+        # listed
+        st = None
+        if self.snapshot is not None or self.one_file_system:
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                if self.onerror is not None:
+                    self.onerror(e)
+                return [], False
+            if self.one_file_system and st.st_dev != self._root_dev:
+                # mount point of another filesystem
+                return [], False
+        if self.snapshot is None:
+            listing = self._list_dir(path)
+            listed = True
+        else:
+            listing, listed = self._list_dir_incremental(path, st)
+        if listing is None:
+            return [], listed
+        is_repo, subdir_names = listing
+        if is_repo:
+            if self.is_tracked is not None and self.is_tracked(path):
+                self.tracked.append(path)
+                if self._on_tracked is not None:
+                    self._on_tracked(path)
+            else:
+                self.found.append(path)
+                if self._on_found is not None:
+                    self._on_found(path)
+            # don't search inside repositories
+            return [], listed
+        if self.max_depth is not None and depth >= self.max_depth:
+            return [], listed
+        if self.dir_filter is not None:
+            subdir_names = [name for name in subdir_names if self.dir_filter(name)]
+        if self.patterns is not None:
+            # relative path with "/" separators, for matching patterns
+            rel_prefix = '' if depth == 0 else path[self._root_prefix_len:] + '/'
+            if os.sep != '/':
+                rel_prefix = rel_prefix.replace(os.sep, '/')
+            subdir_names = [name for name in subdir_names
+                            if not self.patterns.is_ignored(rel_prefix + name)]
+        return [(pjoin(path, name), depth + 1) for name in subdir_names], listed
+
+    def _list_dir_incremental(self, path, st):
+        key = (st.st_mtime_ns, st.st_ino)
+        entry = self.snapshot.get(path)
+        if entry is not None and entry[0] == key:
+            # no entries were added, removed, or renamed since the last
+            # search
+            self.new_snapshot[path] = entry
+            return entry[1:], False
+        listing = self._list_dir(path)
+        if listing is not None:
+            if st.st_mtime_ns >= self._racy_after:
+                key = None
+            self.new_snapshot[path] = (key, *listing)
+        return listing, True
+
+    def _list_dir(self, path):
+        # returns (is_repo, subdir_names): whether the directory contains
+        # a `.git` directory, and the names of its subdirectories (not
+        # including symlinks), before filtering with `dir_filter`
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            if self.onerror is not None:
+                self.onerror(e)
+            return None
+        subdir_names = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                continue
+            if entry.name == '.git':
+                return True, ()
+            if not entry.is_symlink():
+                subdir_names.append(entry.name)
+        return False, tuple(subdir_names)
+
+
+class DirSnapshot:
+    def __init__(self, fpath=FIND_SNAPSHOT_FPATH):
+        """
+        On-disk snapshot of the directories searched by previous
+        `gittracker find` runs: {path: ((mtime_ns, inode), is_repo,
+        subdir_names)}, used by `RepoScanner` to avoid listing
+        directories that haven't changed
+        :param fpath: pathlib.Path (optional)
+                path to the snapshot file. Defaults to
+                `FIND_SNAPSHOT_FPATH`
+        """
+        self.fpath = fpath
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.fpath, 'rb') as f:
+                version, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError,
+                pickle.UnpicklingError, AttributeError, ImportError):
+            return {}
+        if version != SNAPSHOT_VERSION:
+            return {}
+        return entries
+
+    def save(self, toplevel_dir, new_entries):
+        """
+        Replaces the entries for `toplevel_dir` and its
+        subdirectories with those from a new search, and writes
+        the snapshot to disk
+        :param toplevel_dir: str
+                absolute path to the directory that was searched
+        :param new_entries: dict
+                the `RepoScanner`'s `new_snapshot`
+        """
+        prefix = toplevel_dir.rstrip(os.sep) + os.sep
+        entries = {p: e for p, e in self.entries.items()
+                   if p != toplevel_dir and not p.startswith(prefix)}
+        entries.update(new_entries)
+        self.entries = entries
+        # write to a temporary file first so an interrupted write can't
+        # leave behind a corrupted snapshot
+        tmp_fpath = self.fpath.with_name(f'{self.fpath.name}.tmp')
+        with open(tmp_fpath, 'wb') as f:
+            pickle.dump((SNAPSHOT_VERSION, entries), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fpath, self.fpath)
@@ -0,0 +1,137 @@
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+from ..utils.utils import LOG_DIR
+
+TRACKED_REPOS_DB_FPATH = Path(LOG_DIR, 'tracked-repos.db')
+# newline-delimited file tracked repositories were stored in before
+# `RepoStore`. Its contents are migrated into the database once
+LEGACY_REPOS_FPATH = Path(LOG_DIR, 'tracked-repos')
+# bump (and add a migration step to `RepoStore._setup`) whenever the
+# schema changes. Stored as the database's `user_version`
+SCHEMA_VERSION = 1
+# seconds to wait for another process's write transaction to finish
+LOCK_TIMEOUT = 10
+
+
+class RepoStore:
+    def __init__(self, fpath=TRACKED_REPOS_DB_FPATH, legacy_fpath=LEGACY_REPOS_FPATH):
+        """
+        SQLite database of tracked repositories' paths, with a
+        unique index on the path. Adding or removing any number of
+        paths is a single transaction, and paths are kept in the
+        order they were added. The first time the database is
+        created, paths are imported from the legacy (newline-
+        delimited) `tracked-repos` file, if there is one. The legacy
+        file itself is left in place
+        :param fpath: pathlib.Path (optional)
+                path to the database file. Defaults to
+                `TRACKED_REPOS_DB_FPATH`
+        :param legacy_fpath: pathlib.Path (optional)
+                path to the legacy file to migrate from. Defaults
+                to `LEGACY_REPOS_FPATH`
+        """
+        self.fpath = fpath
+        self.legacy_fpath = legacy_fpath
+        with self._connect() as conn:
+            self._setup(conn)
+
+    @contextmanager
+    def _connect(self):
+        # a short-lived connection per operation (a single transaction), so
+        # the store is safe to use from any thread (e.g., the daemon's) and
+        # never holds the database open between commands
+        with closing(sqlite3.connect(str(self.fpath), timeout=LOCK_TIMEOUT)) as conn:
+            # commits on success, rolls back on error
+            with conn:
+                yield conn
+
+    def _setup(self, conn):
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        conn.execute('CREATE TABLE IF NOT EXISTS repos ('
+                     'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                     'path TEXT NOT NULL)')
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS repos_path ON repos (path)')
+        try:
+            with open(self.legacy_fpath, 'r') as f:
+                legacy_paths = [p for p in f.read().splitlines() if p]
+        except FileNotFoundError:
+            legacy_paths = []
+        conn.executemany('INSERT OR IGNORE INTO repos (path) VALUES (?)',
+                         ((p,) for p in legacy_paths))
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def paths(self):
+        """
+        :return: list
+                paths of all tracked repositories, in the order
+                they were added
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT path FROM repos ORDER BY id').fetchall()
+        return [row[0] for row in rows]
+
+    def __contains__(self, path):
+        with self._connect() as conn:
+            row = conn.execute('SELECT 1 FROM repos WHERE path = ?', (path,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM repos').fetchone()[0]
+
+    def add(self, paths):
+        """
+        Starts tracking repositories
+        :param paths: iterable of str
+                absolute paths to the repositories
+        :return: list
+                the paths that were added, i.e., excluding any that
+                were already tracked (or repeated in `paths`)
+        """
+        added = []
+        with self._connect() as conn:
+            for path in paths:
+                cursor = conn.execute('INSERT OR IGNORE INTO repos (path) VALUES (?)',
+                                      (path,))
+                if cursor.rowcount > 0:
+                    added.append(path)
+        return added
+
+    def remove(self, paths):
+        """
+        Stops tracking repositories
+        :param paths: iterable of str
+                absolute paths to the repositories
+        :return: list
+                the paths that were removed, i.e., excluding any
+                that weren't tracked
+        """
+        removed = []
+        with self._connect() as conn:
+            for path in paths:
+                cursor = conn.execute('DELETE FROM repos WHERE path = ?', (path,))
+                if cursor.rowcount > 0:
+                    removed.append(path)
+        return removed
+
+    def update(self, replacements=(), removals=()):
+        """
+        Replaces and removes tracked repositories' paths in a single
+        transaction. Replaced paths keep their position in the order
+        :param replacements: iterable of tuples (optional)
+                (old path, new path) pairs. If the new path is
+                already tracked, the old path is just removed
+        :param removals: iterable of str (optional)
+                paths to stop tracking
+        """
+        with self._connect() as conn:
+            for old, new in replacements:
+                conn.execute('UPDATE OR IGNORE repos SET path = ? WHERE path = ?',
+                             (new, old))
+                conn.execute('DELETE FROM repos WHERE path = ?', (old,))
+            conn.executemany('DELETE FROM repos WHERE path = ?',
+                             ((p,) for p in removals))
+
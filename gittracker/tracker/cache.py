@@ -0,0 +1,178 @@
+import os
+import pickle
+from os.path import join as pjoin
+from pathlib import Path
+from threading import Lock
+from .gitdir import find_common_dir, find_git_dir
+from .index import index_unstaged_changes
+from .refs import read_config, upstream_ref
+from ..utils.utils import LOG_DIR
+
+STATUS_CACHE_FPATH = Path(LOG_DIR, 'status-cache')
+# bump whenever the format of cached entries (or status dicts) changes so
+# stale caches are discarded rather than misread
+CACHE_VERSION = 4
+
+
+class StatusCache:
+    def __init__(self, fpath=STATUS_CACHE_FPATH):
+        """
+        On-disk cache of each repository's most recent status,
+        stored alongside a cheap fingerprint of its git metadata
+        (see `fingerprint`). A cached status is reused as long as
+        the repository's fingerprint and the options it was
+        collected with are unchanged.
+        NOTE: the fingerprint covers the index, refs, tracked files,
+        and the top-level directory, but not every directory in the
+        working tree. A new untracked file in a subdirectory can go
+        unnoticed until git next rewrites the index (e.g., on the
+        next `git add` or `commit`). Repositories whose tracked
+        files can't be checked without git (e.g., ones with
+        submodules, conflicts, or a split index) are never cached
+        :param fpath: pathlib.Path or None (optional)
+                path to the cache file. Defaults to
+                `STATUS_CACHE_FPATH`. If None, the cache starts out
+                empty and is only kept in memory
+        """
+        self.fpath = fpath
+        self.hits = 0
+        self.misses = 0
+        self._entries = self._load()
+        self._seen = set()
+        self._lock = Lock()
+
+    def _load(self):
+        if self.fpath is None:
+            return {}
+        try:
+            with open(self.fpath, 'rb') as f:
+                version, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError,
+                pickle.UnpicklingError, AttributeError, ImportError):
+            # missing, truncated, or otherwise unreadable cache file --
+            # just start from scratch
+            return {}
+        if version != CACHE_VERSION:
+            return {}
+        return entries
+
+    def get(self, path, fingerprint, options):
+        """
+        Looks up the cached status for a repository
+        :param path: str
+                absolute path to the repository
+        :param fingerprint: tuple
+                the repository's current fingerprint
+        :param options: tuple
+                the options the status is being collected with
+                (verbosity, backend, etc.)
+        :return: RepoStatus or None
+                the cached status if it's still valid, otherwise
+                None
+        """
+        with self._lock:
+            self._seen.add(path)
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (fingerprint, options):
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+
+    def set(self, path, fingerprint, options, status):
+        with self._lock:
+            self._seen.add(path)
+            self._entries[path] = (fingerprint, options, status)
+
+    def last(self, path, options):
+        """
+        Looks up a repository's most recently cached status,
+        whether or not it's still valid (e.g., to report in place
+        of a status that couldn't be collected in time)
+        :param path: str
+                absolute path to the repository
+        :param options: tuple
+                the options the status is being collected with
+        :return: RepoStatus or None
+                the cached status if there is one for the same
+                options, otherwise None
+        """
+        with self._lock:
+            # keep the entry when saving
+            self._seen.add(path)
+            entry = self._entries.get(path)
+        if entry is not None and entry[1] == options:
+            return entry[2]
+        return None
+
+    def save(self):
+        """
+        Writes the cache to disk, dropping entries for repositories
+        that weren't looked up (e.g., are no longer tracked)
+        """
+        if self.fpath is None:
+            return
+        with self._lock:
+            entries = {p: e for p, e in self._entries.items() if p in self._seen}
+            # write to a temporary file first so an interrupted write
+            # can't leave behind a corrupted cache
+            tmp_fpath = self.fpath.with_name(f'{self.fpath.name}.tmp')
+            with open(tmp_fpath, 'wb') as f:
+                pickle.dump((CACHE_VERSION, entries), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fpath, self.fpath)
+
+
+def fingerprint(repo_path):
+    """
+    Creates a cheap fingerprint of a repository's state from the
+    stat info (mtime, size, inode) of the files git rewrites when
+    the repository changes: the index, HEAD, the current branch's
+    ref, packed-refs, the upstream branch's ref, the config (which
+    determines the upstream), and the top-level worktree directory
+    (which changes when files are created or deleted there), plus
+    the repository's unstaged changes, found from the index's
+    cached stat info (see `.index.index_unstaged_changes`)
+    :param repo_path: str
+            absolute path to the repository's working tree
+    :return: tuple
+            hashable fingerprint. Two equal fingerprints mean none
+            of the files above have changed
+    :raises OSError: if the repository's layout is unusual, or its
+            unstaged changes can't be found from the index alone
+            (e.g., it has submodules or conflicts), in which case
+            edits to tracked files would go unnoticed
+    """
+    git_dir = find_git_dir(repo_path)
+    common_dir = find_common_dir(git_dir)
+    with open(pjoin(git_dir, 'HEAD'), 'r') as f:
+        head = f.read().strip()
+    paths = [repo_path,
+             pjoin(git_dir, 'index'),
+             pjoin(git_dir, 'HEAD'),
+             pjoin(common_dir, 'packed-refs'),
+             pjoin(common_dir, 'config')]
+    if head.startswith('ref: '):
+        # HEAD points to a branch (rather than being detached)
+        ref = head[5:]
+        paths.append(pjoin(common_dir, ref))
+        config = read_config(pjoin(common_dir, 'config'))
+        remote_ref = upstream_ref(config, ref[len('refs/heads/'):])
+        if remote_ref is not None:
+            paths.append(pjoin(common_dir, remote_ref))
+    # unstaged changes are included since editing a tracked file doesn't
+    # change any of the files above
+    unstaged = index_unstaged_changes(repo_path)
+    if unstaged is None:
+        raise OSError(f"can't find unstaged changes in {repo_path} without git")
+    # HEAD's contents are included since a detached HEAD can move
+    # without its file's stat info changing detectably
+    return (head, *map(_stat_key, paths), unstaged)
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
@@ -0,0 +1,67 @@
+class CommitCount(int):
+    """
+    Number of commits a branch is ahead of/behind another. Behaves
+    exactly like an int, except that counts cut short by a
+    `max_count` limit are flagged as `truncated` and displayed as
+    lower bounds (e.g., "1000+")
+    """
+    def __new__(cls, value, truncated=False):
+        count = super().__new__(cls, value)
+        count.truncated = truncated
+        return count
+
+    def __getnewargs__(self):
+        # preserve `truncated` flag when pickled
+        return int(self), self.truncated
+
+    def __repr__(self):
+        return f"{int(self)}+" if self.truncated else f"{int(self)}"
+
+    __str__ = __repr__
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+
+def rev_list_count_args(local_branch, remote_branch, max_count=None):
+    """
+    Creates arguments for a single `git rev-list` walk that counts
+    commits on both sides of the symmetric difference between two
+    branches, without creating an object for each commit
+    :param local_branch: str
+            the local branch name (or any commit-ish)
+    :param remote_branch: str
+            the remote tracking branch name (or any commit-ish)
+    :param max_count: int or None (default None)
+            if given, stop walking after this many commits in
+            total
+    :return: list
+            arguments for `git rev-list`. The command's output
+            can be parsed with `parse_rev_list_count`
+    """
+    args = ['--left-right', '--count']
+    if max_count is not None:
+        args.append(f'--max-count={max_count}')
+    args.append(f'{local_branch}...{remote_branch}')
+    return args
+
+
+def parse_rev_list_count(output, max_count=None):
+    """
+    Parses output of `git rev-list --left-right --count local...remote`
+    :param output: str
+            the command's output ("<n_left>\\t<n_right>")
+    :param max_count: int or None (default None)
+            the `--max-count` limit passed to the command (if any)
+    :return: tuple
+            2-tuple of (n_ahead, n_behind) as `CommitCount`s. If
+            the walk hit `max_count`, the non-zero counts are lower
+            bounds and flagged as truncated
+    """
+    n_ahead, n_behind = map(int, output.split())
+    # the walk stops once max_count commits have been seen in total, so
+    # the counts it reached may be incomplete. A side with no commits
+    # counted is reported as is (rather than as "0+")
+    truncated = max_count is not None and n_ahead + n_behind >= max_count
+    return (CommitCount(n_ahead, truncated and n_ahead > 0),
+            CommitCount(n_behind, truncated and n_behind > 0))
@@ -0,0 +1,236 @@
+from concurrent.futures import Future
+from queue import Queue
+from threading import Lock, Thread, local
+from time import monotonic
+from git import Git, Repo
+from ..utils.utils import is_windows
+
+# the job (if any) the current thread is running. Unset (the default)
+# when there's no time limit
+_current = local()
+
+
+class Job:
+    __slots__ = ('deadline', 'timeout', 'started', 'expires', 'expired',
+                 '_procs', '_lock')
+
+    def __init__(self, timeout=None, deadline=None):
+        """
+        Time limits for collecting a single repository's (or
+        submodule's) status, run on a worker thread with `run`.
+        Git subprocesses the job starts are killed once it expires
+        (see `TimedGit`). Threads can't be interrupted, so a job
+        blocked on something else (e.g., a read from a hung network
+        filesystem) is given up on by `iter_status` instead
+        :param timeout: float or None (optional)
+                max seconds the job may run for, once started
+        :param deadline: float or None (optional)
+                `time.monotonic()` time by which the job must finish
+                (e.g., the deadline for the whole run), whether or
+                not it's started
+        """
+        self.timeout = timeout
+        self.deadline = deadline
+        self.started = None
+        self.expires = deadline
+        self.expired = False
+        self._procs = []
+        self._lock = Lock()
+
+    def run(self, func, *args, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` with this job's time limits
+        :param func: callable
+                the job
+        :return: the job's return value
+        """
+        started = monotonic()
+        if self.timeout is not None:
+            ends = started + self.timeout
+            self.expires = ends if self.deadline is None else min(ends, self.deadline)
+        # (set last, so `expires` is up to date for any thread that sees
+        # the job has started)
+        self.started = started
+        _current.job = self
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.job = None
+
+    def remaining(self):
+        """
+        :return: float or None
+                seconds left before the job expires, or None if it
+                has no time limit
+        """
+        return None if self.expires is None else self.expires - monotonic()
+
+    def earliest_expiry(self, now):
+        """
+        :param now: float
+                the current `time.monotonic()` time
+        :return: float or None
+                the earliest time the job could expire: when it
+                will if it's started, or (if it hasn't) when it
+                would if it started now. None if it has no time
+                limit
+        """
+        if self.started is None and self.timeout is not None:
+            ends = now + self.timeout
+            return ends if self.expires is None else min(ends, self.expires)
+        return self.expires
+
+    def is_overdue(self, now=None):
+        now = monotonic() if now is None else now
+        return self.expires is not None and now >= self.expires
+
+    def add_process(self, proc):
+        """
+        Registers a git subprocess that's read from as it runs, so
+        it's killed if the job expires
+        :param proc: subprocess.Popen
+                the subprocess
+        """
+        with self._lock:
+            if not self.expired:
+                self._procs.append(proc)
+                return
+        proc.kill()
+
+    def expire(self):
+        """
+        Gives up on the job, killing its registered subprocesses
+        """
+        with self._lock:
+            self.expired = True
+            procs = self._procs
+            self._procs = []
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+
+class DaemonThreadPool:
+    def __init__(self, max_workers):
+        """
+        Minimal stand-in for `concurrent.futures.ThreadPoolExecutor`
+        whose workers are daemon threads. `ThreadPoolExecutor` joins
+        all of its workers when the interpreter exits, so a worker
+        stuck on a job that was given up on (e.g., blocked on a hung
+        network filesystem) would keep the process from exiting.
+        These workers are simply dropped at exit instead
+        :param max_workers: int
+                the maximum number of worker threads
+        """
+        self.max_workers = max_workers
+        self._queue = Queue()
+        self._threads = []
+        # workers waiting for a job
+        self._n_idle = 0
+        self._lock = Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedules `func(*args, **kwargs)` to run on a worker
+        :param func: callable
+                the function to run
+        :return: concurrent.futures.Future
+                the pending result
+        """
+        future = Future()
+        with self._lock:
+            self._queue.put((future, func, args, kwargs))
+            if self._n_idle > 0:
+                self._n_idle -= 1
+            elif len(self._threads) < self.max_workers:
+                thread = Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def shutdown(self, wait=True):
+        """
+        Stops the workers once they've finished the jobs already
+        submitted
+        :param wait: bool (default True)
+                whether to wait for them to finish
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, func, args, kwargs = item
+            # (skipped if cancelled while queued)
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            with self._lock:
+                self._n_idle += 1
+
+
+def current_job():
+    """
+    :return: Job or None
+            the job the current thread is running, if it has time
+            limits
+    """
+    return getattr(_current, 'job', None)
+
+
+def remaining_time():
+    """
+    Checks how much time the current thread's job has left
+    :return: float or None
+            seconds until the job expires, or None if it has no
+            time limit
+    :raises TimeoutError: if the job has already expired
+    """
+    job = current_job()
+    if job is None:
+        return None
+    remaining = job.remaining()
+    if remaining is not None and remaining <= 0:
+        raise TimeoutError("time limit for repository exceeded")
+    return remaining
+
+
+class TimedGit(Git):
+    """
+    `git.Git` command wrapper that keeps git subprocesses within the
+    time limits of the thread's `Job` (if any): commands that run to
+    completion are killed by GitPython after the job's remaining
+    time, and commands read from as they run (`as_process=True`,
+    e.g., for untracked files & diffs) are killed when the job
+    expires. With no job, commands run exactly as with `git.Git`
+    """
+    def execute(self, command, **kwargs):
+        remaining = remaining_time()
+        if remaining is None:
+            return super().execute(command, **kwargs)
+        if kwargs.get('as_process'):
+            proc = super().execute(command, **kwargs)
+            current_job().add_process(proc.proc)
+            return proc
+        # (not supported on Windows, where jobs are only given up on)
+        if not is_windows():
+            kwargs.setdefault('kill_after_timeout', remaining)
+        return super().execute(command, **kwargs)
+
+
+class TimedRepo(Repo):
+    # `git.Repo` whose git commands (including GitPython's own) respect
+    # the thread's time limits
+    GitCommandWrapperType = TimedGit
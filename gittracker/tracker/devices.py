@@ -0,0 +1,248 @@
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from os.path import join as pjoin
+from os.path import realpath
+from ..utils.utils import is_windows
+
+# filesystem types (from /proc/self/mountinfo) of network mounts
+NETWORK_FS_TYPES = frozenset(('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ceph',
+                              'glusterfs', 'lustre', 'afs', '9p',
+                              'fuse.sshfs', 'fuse.rclone'))
+# starting number of repositories checked concurrently on a single
+# network mount or spinning disk, which slow down (rather than speed up)
+# under many concurrent reads. Other devices (e.g., SSDs) start out
+# limited only by the number of workers
+NETWORK_DEVICE_JOBS = 4
+ROTATIONAL_DEVICE_JOBS = 2
+# a device's concurrency limit is halved if repositories on it take
+# this many times as long as they have in previous runs
+SLOWDOWN_THRESHOLD = 1.5
+# repositories expected to take less time than this (seconds) are too
+# quick to tell whether the device is contended
+MIN_EXPECTED_DURATION = 0.01
+
+
+class DeviceLimiter:
+    def __init__(self, max_jobs, device_jobs=None, durations=None):
+        """
+        Decides when `iter_status` can start on each repository so
+        that no single device (as identified by the `st_dev` of the
+        repository's path) has more than a limited number of
+        repositories checked on it at once. Throttling slow devices
+        (network mounts, spinning disks) keeps many concurrent reads
+        from thrashing them, while repositories on other devices
+        still use the remaining workers.
+        Unless `device_jobs` is given, each device's limit starts
+        out based on its type (see `default_device_limit`) and is
+        tuned as repositories on it finish: after each round of
+        `limit` repositories, it's halved if most of them took
+        `SLOWDOWN_THRESHOLD` times as long as in previous runs (per
+        `durations`) or timed out. Otherwise, if repositories were
+        waiting on the device, it's doubled until the first
+        slowdown, then raised by 1 at a time
+        :param max_jobs: int
+                the total number of workers (the highest any
+                device's limit can go)
+        :param device_jobs: int or None (optional)
+                a fixed limit for every device. If None [default],
+                limits are chosen & tuned automatically
+        :param durations: gittracker.tracker.durations.DurationLog (optional)
+                repositories' durations in previous runs, against
+                which their durations in this run are compared.
+                Without it, limits aren't tuned
+        """
+        self.max_jobs = max_jobs
+        self.device_jobs = device_jobs
+        self.durations = durations
+        # {device: _Device}
+        self.devices = {}
+        # {path: (device, position in order added, expected duration)}
+        self._repos = {}
+
+    def add(self, path):
+        """
+        Queues a repository to be started once its device has room
+        :param path: str
+                absolute path to the repository
+        """
+        dev = device_id(path)
+        device = self.devices.get(dev)
+        if device is None:
+            if self.device_jobs is not None:
+                limit = self.device_jobs
+            else:
+                limit = default_device_limit(dev) or self.max_jobs
+            device = self.devices[dev] = _Device(min(limit, self.max_jobs))
+        expected = None if self.durations is None else self.durations.get(path)
+        self._repos[path] = (dev, len(self._repos), expected)
+        device.queue.append(path)
+
+    def ready(self):
+        """
+        Takes queued repositories whose devices have room for them
+        :return: list of str
+                paths of the repositories to start now, in the order
+                they were added
+        """
+        paths = []
+        for device in self.devices.values():
+            while device.queue and device.running < device.limit:
+                paths.append(device.queue.popleft())
+                device.running += 1
+        paths.sort(key=lambda path: self._repos[path][1])
+        return paths
+
+    def pending(self):
+        """
+        Takes all repositories that haven't been started (e.g., when
+        there's no time left to start them)
+        :return: list of str
+                their paths, in the order they were added
+        """
+        paths = []
+        for device in self.devices.values():
+            paths.extend(device.queue)
+            device.queue.clear()
+        paths.sort(key=lambda path: self._repos[path][1])
+        return paths
+
+    def done(self, path, timed_out=False):
+        """
+        Frees up a repository's place on its device, and tunes the
+        device's limit
+        :param path: str
+                path of a repository returned by `ready`
+        :param timed_out: bool (default False)
+                whether the repository ran out of time (which
+                counts as a slowdown)
+        """
+        dev, _, expected = self._repos[path]
+        device = self.devices[dev]
+        device.running -= 1
+        if self.device_jobs is not None or self.durations is None:
+            return
+        if timed_out:
+            device.slow += 1
+        else:
+            observed = self.durations.observed(path)
+            if expected is None or expected < MIN_EXPECTED_DURATION or observed is None:
+                # nothing to compare against (new repository, or its
+                # status came from the cache)
+                return
+            if observed > expected * SLOWDOWN_THRESHOLD:
+                device.slow += 1
+        device.n_samples += 1
+        if device.n_samples < device.limit:
+            return
+        # end of the round
+        if device.slow * 2 > device.n_samples:
+            device.limit = max(1, device.limit // 2)
+            device.probing = False
+        elif device.queue:
+            step = device.limit if device.probing else 1
+            device.limit = min(self.max_jobs, device.limit + step)
+        device.n_samples = device.slow = 0
+
+
+class _Device:
+    # a device's concurrency limit and queued repositories
+    __slots__ = ('limit', 'running', 'queue', 'n_samples', 'slow', 'probing')
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.running = 0
+        self.queue = deque()
+        # repositories finished in the current round, & how many were slow
+        self.n_samples = 0
+        self.slow = 0
+        # whether the limit hasn't caused a slowdown yet
+        self.probing = True
+
+
+def device_id(path):
+    """
+    :param path: str
+            absolute path to a repository
+    :return: int or None
+            the `st_dev` of the device the repository is on, or
+            None if it can't be determined
+    """
+    # where possible, look up the path's mount rather than stat-ing
+    # it, which would block on an unresponsive network mount
+    for mount_point, dev, _ in _mounts():
+        if path.startswith(mount_point) and (
+                len(path) == len(mount_point)
+                or mount_point.endswith('/')
+                or path[len(mount_point)] == '/'
+        ):
+            return dev
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+def default_device_limit(dev):
+    """
+    Chooses the starting concurrency limit for a device
+    :param dev: int or None
+            the device's `st_dev`
+    :return: int or None
+            `NETWORK_DEVICE_JOBS` for network mounts,
+            `ROTATIONAL_DEVICE_JOBS` for spinning disks, or None
+            (i.e., no limit) for anything else, including devices
+            whose type can't be determined (e.g., not on Linux)
+    """
+    if dev is None or is_windows():
+        return None
+    fs_types = {mount_dev: fs_type for _, mount_dev, fs_type in _mounts()}
+    if fs_types.get(dev) in NETWORK_FS_TYPES:
+        return NETWORK_DEVICE_JOBS
+    if _is_rotational(dev):
+        return ROTATIONAL_DEVICE_JOBS
+    return None
+
+
+@lru_cache(maxsize=None)
+def _mounts():
+    # (mount point, st_dev, filesystem type) for each mounted filesystem
+    # (empty if not on Linux), deepest mount points first
+    mounts = []
+    try:
+        with open('/proc/self/mountinfo') as f:
+            for line in f:
+                # fields: ID, parent ID, major:minor, root, mount point,
+                # options, [optional fields...], "-", fs type, source, ...
+                fields = line.split()
+                try:
+                    major, minor = map(int, fields[2].split(':'))
+                    fs_type = fields[fields.index('-') + 1]
+                except (IndexError, ValueError):
+                    continue
+                # (spaces, etc. are octal-escaped, e.g., "\040")
+                mount_point = re.sub(r'\\([0-7]{3})',
+                                     lambda m: chr(int(m.group(1), 8)),
+                                     fields[4])
+                mounts.append((mount_point, os.makedev(major, minor), fs_type))
+    except OSError:
+        return ()
+    # later mounts hide earlier ones at the same mount point
+    mounts.reverse()
+    mounts.sort(key=lambda mount: len(mount[0]), reverse=True)
+    return tuple(mounts)
+
+
+@lru_cache(maxsize=None)
+def _is_rotational(dev):
+    # whether a block device is a spinning disk. For a partition, the
+    # flag is on its parent disk
+    block_dir = realpath(f'/sys/dev/block/{os.major(dev)}:{os.minor(dev)}')
+    for queue_dir in (pjoin(block_dir, 'queue'), pjoin(block_dir, '..', 'queue')):
+        try:
+            with open(pjoin(queue_dir, 'rotational')) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return False
@@ -0,0 +1,131 @@
+import os
+import pickle
+from math import inf
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from ..utils.utils import LOG_DIR
+
+DURATIONS_FPATH = Path(LOG_DIR, 'status-durations')
+# bump whenever the format of the durations file changes
+DURATIONS_VERSION = 1
+# weight of the newest observation in each repository's running average
+# duration, so a one-off slow (or fast) run doesn't dominate
+NEW_DURATION_WEIGHT = 0.5
+
+
+class DurationLog:
+    def __init__(self, fpath=DURATIONS_FPATH):
+        """
+        On-disk record of how long collecting each repository's
+        status took in previous runs (a running average), used to
+        start on the repositories expected to take longest first
+        (see `order`). Only statuses that are actually collected are
+        timed; repositories whose statuses are reused from the
+        status cache keep their previous durations
+        :param fpath: pathlib.Path or None (optional)
+                path to the durations file. Defaults to
+                `DURATIONS_FPATH`. If None, durations start out
+                unknown and are only kept in memory
+        """
+        self.fpath = fpath
+        self._durations = self._load()
+        # {path: seconds} as observed in this run (not averaged)
+        self._observed = {}
+        self._seen = set()
+        self._lock = Lock()
+
+    def _load(self):
+        if self.fpath is None:
+            return {}
+        try:
+            with open(self.fpath, 'rb') as f:
+                version, durations = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError,
+                pickle.UnpicklingError, AttributeError, ImportError):
+            # missing or unreadable -- durations are just a hint, so
+            # start from scratch
+            return {}
+        if version != DURATIONS_VERSION:
+            return {}
+        return durations
+
+    def get(self, path):
+        """
+        :param path: str
+                absolute path to the repository
+        :return: float or None
+                the repository's expected duration in seconds, or
+                None if it's never been timed
+        """
+        with self._lock:
+            return self._durations.get(path)
+
+    def observed(self, path):
+        """
+        :param path: str
+                absolute path to the repository
+        :return: float or None
+                how long the repository's status took to collect in
+                this run, or None if it hasn't been timed (yet)
+        """
+        with self._lock:
+            return self._observed.get(path)
+
+    def record(self, path, seconds):
+        with self._lock:
+            self._seen.add(path)
+            self._observed[path] = seconds
+            previous = self._durations.get(path)
+            if previous is not None:
+                seconds = (NEW_DURATION_WEIGHT * seconds
+                           + (1 - NEW_DURATION_WEIGHT) * previous)
+            self._durations[path] = seconds
+
+    def time(self, path, func, *args, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` and records how long it took as
+        a duration for the repository at `path` (unless it raises)
+        :param path: str
+                absolute path to the repository
+        :param func: callable
+                collects the repository's status
+        :return: the return value of `func`
+        """
+        start = monotonic()
+        result = func(*args, **kwargs)
+        self.record(path, monotonic() - start)
+        return result
+
+    def order(self, repo_paths):
+        """
+        Sorts repositories longest expected duration first, so the
+        slowest ones aren't left to finish last while other workers
+        sit idle (longest-processing-time-first scheduling).
+        Repositories that have never been timed go first, since they
+        may be among the slowest. Ties keep their original order
+        :param repo_paths: iterable of str
+                absolute paths to repositories
+        :return: list of str
+                the paths, in the order they should be started
+        """
+        repo_paths = list(repo_paths)
+        with self._lock:
+            self._seen.update(repo_paths)
+            durations = self._durations
+            return sorted(repo_paths, key=lambda path: -durations.get(path, inf))
+
+    def save(self):
+        """
+        Writes the durations to disk, dropping those of repositories
+        that weren't scheduled (e.g., are no longer tracked)
+        """
+        if self.fpath is None:
+            return
+        with self._lock:
+            durations = {p: d for p, d in self._durations.items() if p in self._seen}
+            tmp_fpath = self.fpath.with_name(f'{self.fpath.name}.tmp')
+            with open(tmp_fpath, 'wb') as f:
+                pickle.dump((DURATIONS_VERSION, durations), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_fpath, self.fpath)
@@ -0,0 +1,23 @@
+from os.path import isfile, join as pjoin
+
+
+def find_git_dir(repo_path):
+    # returns the path to a repository's git directory. For worktrees
+    # and submodules, `.git` is a file pointing to the real directory
+    dot_git = pjoin(repo_path, '.git')
+    if isfile(dot_git):
+        with open(dot_git, 'r') as f:
+            gitdir = f.read().strip()
+        if gitdir.startswith('gitdir: '):
+            return pjoin(repo_path, gitdir[8:])
+    return dot_git
+
+
+def find_common_dir(git_dir):
+    # returns the directory holding refs & config shared between a
+    # repository's worktrees (for most repositories, the git directory)
+    try:
+        with open(pjoin(git_dir, 'commondir'), 'r') as f:
+            return pjoin(git_dir, f.read().strip())
+    except FileNotFoundError:
+        return git_dir
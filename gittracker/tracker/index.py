@@ -0,0 +1,260 @@
+import mmap
+import os
+import stat
+import struct
+from hashlib import sha1
+from os.path import join as pjoin
+from .gitdir import find_common_dir, find_git_dir
+from .refs import read_config
+
+# index entry flags (see git's Documentation/gitformat-index.txt)
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+FLAG_NAME_MASK = 0x0fff
+# extended flags (index versions >= 3)
+EXT_FLAG_SKIP_WORKTREE = 0x4000
+EXT_FLAG_INTENT_TO_ADD = 0x2000
+# object types stored in the top 4 bits of an entry's mode
+MODE_TYPE_MASK = 0o170000
+MODE_REGULAR = 0o100000
+MODE_SYMLINK = 0o120000
+MODE_GITLINK = 0o160000
+
+_HEADER = struct.Struct('>4sII')
+# ctime (s, ns), mtime (s, ns), dev, ino, mode, uid, gid, size, sha1, flags
+_ENTRY = struct.Struct('>10I20sH')
+_EXTENDED_FLAGS = struct.Struct('>H')
+_EXTENSION_HEADER = struct.Struct('>4sI')
+_HASH_SIZE = 20
+# index fields are 32 bits; stat values are compared modulo 2^32
+_MASK_32 = 0xffffffff
+
+
+class IndexUnsupported(Exception):
+    """
+    raised when an index (or an entry in it) can't be handled without
+    git itself, e.g., unsupported versions, split indexes, or merge
+    conflicts
+    """
+
+
+class IndexEntry:
+    __slots__ = ('path', 'ctime', 'mtime', 'ino', 'mode', 'uid', 'gid',
+                 'size', 'sha', 'flags', 'extended_flags')
+
+    def __init__(self, path, fields, extended_flags):
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, _, self.ino, self.mode,
+         self.uid, self.gid, self.size, self.sha, self.flags) = fields
+        self.path = path
+        self.ctime = (ctime_s, ctime_ns)
+        self.mtime = (mtime_s, mtime_ns)
+        self.extended_flags = extended_flags
+
+
+def read_index(index_path):
+    """
+    Reads the entries from a git index file (versions 2-4),
+    memory-mapping it rather than reading it into memory
+    :param index_path: str
+            path to the index file (typically `.git/index`)
+    :return: tuple
+            2-tuple of (entries, mtime) where `entries` is a list
+            of `IndexEntry` objects (in the index's order, sorted
+            by path) and `mtime` is the index file's (mtime_s,
+            mtime_ns), used to detect racily clean entries
+    """
+    with open(index_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size < _HEADER.size + _HASH_SIZE:
+            raise IndexUnsupported(f"truncated index: {index_path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            entries = _parse_index(buf)
+    mtime = divmod(st.st_mtime_ns, 1_000_000_000)
+    return entries, mtime
+
+
+def _parse_index(buf):
+    signature, version, n_entries = _HEADER.unpack_from(buf, 0)
+    if signature != b'DIRC' or version not in (2, 3, 4):
+        raise IndexUnsupported(f"unsupported index (version {version})")
+    offset = _HEADER.size
+    entries = []
+    prev_path = b''
+    for _ in range(n_entries):
+        entry_start = offset
+        fields = _ENTRY.unpack_from(buf, offset)
+        offset += _ENTRY.size
+        flags = fields[-1]
+        extended_flags = 0
+        if flags & FLAG_EXTENDED:
+            if version < 3:
+                raise IndexUnsupported("extended flags in a version 2 index")
+            extended_flags, = _EXTENDED_FLAGS.unpack_from(buf, offset)
+            offset += _EXTENDED_FLAGS.size
+        if version == 4:
+            # path is stored as the number of bytes to remove from the
+            # end of the previous entry's path, followed by the
+            # NUL-terminated suffix to append
+            n_strip, offset = _read_varint(buf, offset)
+            path_end = buf.find(b'\0', offset)
+            path = prev_path[:len(prev_path) - n_strip] + buf[offset:path_end]
+            offset = path_end + 1
+        else:
+            path_len = flags & FLAG_NAME_MASK
+            if path_len == FLAG_NAME_MASK:
+                # name is too long to store its length in the flags
+                path_end = buf.find(b'\0', offset)
+            else:
+                path_end = offset + path_len
+            path = buf[offset:path_end]
+            # entries are NUL-padded to a multiple of 8 bytes (at least
+            # one NUL)
+            entry_len = path_end - entry_start
+            offset = entry_start + (entry_len + 8) // 8 * 8
+        entries.append(IndexEntry(path, fields, extended_flags))
+        prev_path = path
+
+    # extensions follow the entries, up to the trailing checksum
+    while offset + _EXTENSION_HEADER.size <= len(buf) - _HASH_SIZE:
+        signature, size = _EXTENSION_HEADER.unpack_from(buf, offset)
+        if signature == b'link':
+            # split index: most entries live in a separate shared index
+            raise IndexUnsupported("split index")
+        offset += _EXTENSION_HEADER.size + size
+    return entries
+
+
+def _read_varint(buf, offset):
+    # git's "offset" varint encoding (see varint.c)
+    byte = buf[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = buf[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
+
+
+def index_unstaged_changes(repo_path):
+    """
+    Finds a repository's unstaged changes (modified & deleted
+    tracked files) without running git, by comparing the stat
+    info cached in its index to `os.lstat` of each file, like
+    `git diff` does. File contents are only hashed for entries
+    whose stat info changed without changing the file's size,
+    and for "racily clean" entries (modified within the same
+    timestamp as the index was written)
+    :param repo_path: str
+            absolute path to the repository's working tree
+    :return: list or None
+            list of (change_type, path, None) tuples in the format
+            of `_single_repo_status`'s "files_not_staged" field,
+            sorted by path. None if the repository's unstaged
+            changes can't be reliably determined without git
+            (unsupported index, merge conflicts, submodules, file
+            mode changes, or content that may have been altered
+            by filters), in which case the caller should fall
+            back to git
+    """
+    try:
+        git_dir = find_git_dir(repo_path)
+        config = read_config(pjoin(find_common_dir(git_dir), 'config'))
+        if config.get('extensions', {}).get('objectformat', 'sha1').lower() != 'sha1':
+            # repositories using SHA-256 object names have larger
+            # index entries
+            return None
+        entries, index_mtime = read_index(pjoin(git_dir, 'index'))
+        return _compare_entries(os.fsencode(repo_path), entries, index_mtime)
+    except (OSError, ValueError, struct.error, IndexUnsupported):
+        # missing/unreadable index (e.g., an empty repository), or an
+        # index or entry that can't be handled here
+        return None
+
+
+def _compare_entries(worktree, entries, index_mtime):
+    changes = []
+    for entry in entries:
+        if entry.flags & FLAG_STAGE_MASK:
+            # merge conflict
+            raise IndexUnsupported("unmerged entry")
+        if entry.extended_flags & EXT_FLAG_SKIP_WORKTREE:
+            # not checked out (sparse checkout)
+            continue
+        if entry.extended_flags & EXT_FLAG_INTENT_TO_ADD:
+            raise IndexUnsupported("intent-to-add entry")
+        if entry.flags & FLAG_ASSUME_VALID:
+            # `git update-index --assume-unchanged`
+            continue
+        mode_type = entry.mode & MODE_TYPE_MASK
+        if mode_type == MODE_GITLINK:
+            # submodule -- changes depend on the submodule's HEAD
+            raise IndexUnsupported("submodule entry")
+        try:
+            st = os.lstat(pjoin(worktree, entry.path))
+        except (FileNotFoundError, NotADirectoryError):
+            changes.append(('D', os.fsdecode(entry.path), None))
+            continue
+        if not _is_modified(worktree, entry, st, mode_type, index_mtime):
+            continue
+        changes.append(('M', os.fsdecode(entry.path), None))
+    return changes
+
+
+def _is_modified(worktree, entry, st, mode_type, index_mtime):
+    if mode_type == MODE_SYMLINK:
+        if not stat.S_ISLNK(st.st_mode):
+            raise IndexUnsupported("type change")
+    elif mode_type == MODE_REGULAR:
+        if not stat.S_ISREG(st.st_mode):
+            raise IndexUnsupported("type change")
+        if bool(entry.mode & 0o100) != bool(st.st_mode & 0o100):
+            # executable bit changed -- whether that counts as a change
+            # depends on core.fileMode
+            raise IndexUnsupported("file mode change")
+    else:
+        raise IndexUnsupported(f"unexpected mode: {entry.mode:o}")
+
+    size = st.st_size & _MASK_32
+    if entry.size != 0 and size != entry.size:
+        # the index caches the working tree file's size, so a different
+        # size means different content
+        return True
+    stat_matches = (
+        entry.size == size
+        and entry.mtime == _split_ns(st.st_mtime_ns)
+        and entry.ctime == _split_ns(st.st_ctime_ns)
+        and entry.ino == st.st_ino & _MASK_32
+        and entry.uid == st.st_uid & _MASK_32
+        and entry.gid == st.st_gid & _MASK_32
+    )
+    # an entry modified in the same timestamp the index was written can
+    # have matching stat info but different content
+    is_racy = entry.mtime >= index_mtime
+    if stat_matches and not is_racy:
+        return False
+    if _blob_sha(worktree, entry.path, mode_type) == entry.sha:
+        return False
+    if mode_type == MODE_SYMLINK:
+        # symlink targets aren't filtered
+        return True
+    # content differs from what's staged, but filters (e.g., line ending
+    # conversion) could account for the difference
+    raise IndexUnsupported("content changed without changing size")
+
+
+def _split_ns(t_ns):
+    s, ns = divmod(t_ns, 1_000_000_000)
+    return s & _MASK_32, ns
+
+
+def _blob_sha(worktree, path, mode_type):
+    # hashes a working tree file the way git hashes blobs
+    full_path = pjoin(worktree, path)
+    if mode_type == MODE_SYMLINK:
+        content = os.readlink(full_path)
+    else:
+        with open(full_path, 'rb') as f:
+            content = f.read()
+    return sha1(b'blob %d\0' % len(content) + content).digest()
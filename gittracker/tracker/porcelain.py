@@ -0,0 +1,198 @@
+from os import fsdecode
+from subprocess import PIPE, TimeoutExpired, run
+from git import GitCommandError, InvalidGitRepositoryError
+from .counts import parse_rev_list_count, rev_list_count_args
+from .deadline import remaining_time
+from .status import new_status
+
+# `--no-optional-locks` keeps git from taking the index lock to write
+# back refreshed stat info, so running GitTracker never interferes
+# with git commands being run in the same repository at the same time
+PORCELAIN_CMD = ('git', '--no-optional-locks', 'status', '--porcelain=v2',
+                 '--branch', '-z', '--untracked-files=all')
+
+# git-status reports some change types that GitPython's diffs (and
+# therefore the Displayer) don't distinguish; map them onto the closest
+# equivalent
+CHANGE_TYPE_ALIASES = {
+    # file type changed (e.g., regular file -> symlink)
+    'T': 'M',
+    # copied (only reported with status.renames=copies)
+    'C': 'A',
+    # updated but unmerged
+    'U': 'M'
+}
+
+
+def porcelain_status(repo_path, verbose=2, max_count=None):
+    """
+    Determines "git-status"-like information for a single
+    repository from one `git status --porcelain=v2` call, rather
+    than the separate GitPython round trips made by
+    `gittracker.tracker.tracker._single_repo_status`.
+    NOTE: for repositories in a detached HEAD state, only
+    `is_detached` and `hexsha` are set. Determining where HEAD was
+    detached requires reading the reflog, which is left to the caller
+    :param repo_path: str
+            absolute path to a local git repository
+    :param verbose: int (default 2)
+            verbosity level. Individual files are only
+            included at level 3
+    :param max_count: int or None (default None)
+            maximum number of commits to walk when counting
+            commits ahead/behind the remote. `git status`
+            can't limit its own count, so if this is given, it's
+            told to skip counting and a separate (limited)
+            `git rev-list` is run only if the branches differ
+    :return: RepoStatus
+            {field: info} pairs, in the same format as
+            `_single_repo_status`
+    """
+    cmd = PORCELAIN_CMD
+    if max_count is not None:
+        cmd += ('--no-ahead-behind',)
+    status = parse_porcelain_v2(_run_git(cmd, repo_path), verbose=verbose)
+    if status is None:
+        raise InvalidGitRepositoryError(
+            "GitTracker currently doesn't support tracking newly "
+            f"initialized repositories (can't track {repo_path}"
+        )
+    if status['remote_branch'] and status['n_commits_ahead'] is None:
+        # `--no-ahead-behind` only reports whether the branches differ
+        count_cmd = ('git', 'rev-list', *rev_list_count_args(
+            'HEAD',
+            status['remote_branch'],
+            max_count=max_count
+        ))
+        count_output = _run_git(count_cmd, repo_path).decode()
+        n_ahead, n_behind = parse_rev_list_count(count_output,
+                                                 max_count=max_count)
+        status['n_commits_ahead'] = n_ahead
+        status['n_commits_behind'] = n_behind
+    return status
+
+
+def _run_git(cmd, repo_path):
+    # runs a git command in the given repository and returns its raw
+    # stdout. The command is killed if it outlasts the thread's job (see
+    # `.deadline.Job`)
+    try:
+        result = run(cmd, cwd=repo_path, stdout=PIPE, stderr=PIPE,
+                     timeout=remaining_time())
+    except TimeoutExpired as e:
+        raise TimeoutError(f"{' '.join(cmd)} timed out in {repo_path}") from e
+    if result.returncode != 0:
+        raise GitCommandError(list(cmd), result.returncode, result.stderr)
+    return result.stdout
+
+
+def parse_porcelain_v2(output, verbose=2):
+    """
+    Parses the output of `git status --porcelain=v2 --branch -z`
+    into a status dict
+    :param output: bytes
+            raw (NUL-delimited) output of the git command
+    :param verbose: int (default 2)
+            verbosity level. Lists of individual files are only
+            filled at level 3
+    :return: RepoStatus or None
+            {field: info} pairs (see
+            `gittracker.tracker.status.new_status`), or None if
+            the repository has no commits yet
+    """
+    status = new_status()
+    head_sha = None
+    upstream = None
+    n_ahead = n_behind = None
+    ab_unknown = False
+    files_staged = []
+    files_not_staged = []
+    files_untracked = []
+
+    records = output.split(b'\0')
+    # iterating manually because rename records take up two fields
+    records_iter = iter(records)
+    for record in records_iter:
+        if not record:
+            continue
+        # header and entry type are always ASCII
+        kind = record[:1]
+        if kind == b'#':
+            key, _, value = fsdecode(record[2:]).partition(' ')
+            if key == 'branch.oid':
+                head_sha = None if value == '(initial)' else value
+            elif key == 'branch.head':
+                if value == '(detached)':
+                    status['is_detached'] = True
+                else:
+                    status['local_branch'] = value
+            elif key == 'branch.upstream':
+                upstream = value
+            elif key == 'branch.ab':
+                # format: "+<ahead> -<behind>", or "+? -?" if the
+                # branches differ and `--no-ahead-behind` was passed
+                ahead, behind = value.split()
+                if ahead == '+?':
+                    ab_unknown = True
+                else:
+                    n_ahead = int(ahead[1:])
+                    n_behind = int(behind[1:])
+        elif kind == b'?':
+            files_untracked.append(fsdecode(record[2:]))
+        elif kind in (b'1', b'2', b'u'):
+            # ordinary, renamed/copied, and unmerged entries. The number
+            # of space-separated fields before the path differs by type
+            n_fields = {b'1': 8, b'2': 9, b'u': 10}[kind]
+            fields = record.split(b' ', n_fields)
+            xy = fields[1].decode()
+            path = fsdecode(fields[-1])
+            if kind == b'2':
+                # original path follows the new path as a separate record
+                orig_path = fsdecode(next(records_iter))
+            else:
+                orig_path = None
+            if kind == b'u':
+                # unmerged files need resolving before they can be
+                # committed, so count them as changes not staged
+                files_not_staged.append(('M', path, None))
+                continue
+            index_change, worktree_change = xy
+            if index_change != '.':
+                change_type = CHANGE_TYPE_ALIASES.get(index_change, index_change)
+                if change_type == 'R':
+                    # match GitPython's diff format: a_path is the
+                    # original path and b_path is the new one
+                    files_staged.append((change_type, orig_path, path))
+                else:
+                    files_staged.append((change_type, path, None))
+            if worktree_change != '.':
+                change_type = CHANGE_TYPE_ALIASES.get(worktree_change,
+                                                      worktree_change)
+                files_not_staged.append((change_type, path, None))
+        # ignored files ("!") aren't requested, so never reported
+
+    if head_sha is None:
+        # repository is newly initialized and has no commits
+        return None
+
+    if status['is_detached']:
+        status['hexsha'] = head_sha[:7]
+    elif upstream is not None and (n_ahead is not None or ab_unknown):
+        # if `ab_unknown`, counts are left as None for the caller to fill
+        status['remote_branch'] = upstream
+        status['n_commits_ahead'] = n_ahead
+        status['n_commits_behind'] = n_behind
+    else:
+        # local branch isn't tracking a remote (or its upstream no
+        # longer exists)
+        status['remote_branch'] = ''
+
+    status['n_staged'] = len(files_staged)
+    status['n_not_staged'] = len(files_not_staged)
+    status['n_untracked'] = len(files_untracked)
+    if verbose == 3:
+        status['files_staged'] = files_staged
+        status['files_not_staged'] = files_not_staged
+        status['files_untracked'] = files_untracked
+
+    return status
@@ -0,0 +1,201 @@
+import json
+from threading import Lock, local
+from time import perf_counter
+
+# phases of collecting a repository's status that are timed, in the
+# order they're reported:
+#   - "fingerprint": checking whether a cached status is still valid
+#   - "head": resolving HEAD, the branch & its upstream (and where a
+#     detached HEAD was detached from)
+#   - "ahead_behind": counting commits ahead of/behind the remote
+#   - "staged"/"unstaged"/"untracked": finding each kind of change
+#   - "porcelain": the single `git status` call of the "porcelain"
+#     backend (covers all of the above)
+#   - "submodules": collecting submodules' statuses (separate jobs)
+PHASES = ('fingerprint', 'head', 'ahead_behind', 'staged', 'unstaged',
+          'untracked', 'porcelain', 'submodules')
+# a repository's own job, including any time not spent in a phase
+TOTAL = 'total'
+# number of repositories listed in the report
+N_SLOWEST = 10
+
+# timings of the job the current thread is running. Unset (the default)
+# when no job is being profiled
+_current = local()
+
+
+class _NullPhase:
+    # does-nothing context manager (`contextlib.nullcontext` isn't
+    # available on Python 3.6)
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+# returned by `phase` when not profiling (shared, since it holds no state)
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name):
+    """
+    Times a phase of collecting a repository's status. Used as a
+    context manager (`with phase('staged'): ...`). Does nothing
+    unless the thread is running a job started with
+    `Profiler.call`, so costs only an attribute lookup when
+    profiling is disabled
+    :param name: str
+            the phase's name (one of `PHASES`)
+    :return: context manager
+    """
+    timings = getattr(_current, 'timings', None)
+    if timings is None:
+        return _NULL_PHASE
+    return _Phase(timings, name)
+
+
+class _Phase:
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self.start
+        self.timings[self.name] = self.timings.get(self.name, 0) + elapsed
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Records wall-clock timings of each phase (see `PHASES`) of
+        collecting each repository's status. Jobs (run on any
+        thread) are timed by running them through `call`
+        """
+        # {path: {phase: seconds}}. `TOTAL` is the repository's own job
+        self.timings = {}
+        self._lock = Lock()
+
+    def call(self, path, phase_name, func, *args, **kwargs):
+        """
+        Runs `func(*args, **kwargs)`, timing the phases it goes
+        through and adding them to `path`'s timings
+        :param path: str
+                the (top-level) repository the job is for
+        :param phase_name: str
+                what to record the job's whole duration as: `TOTAL`
+                for the repository's own job, in which case its
+                phases are recorded too, or a phase (e.g.,
+                "submodules"), in which case they're not
+        :param func: callable
+                the job
+        :return: the job's return value
+        """
+        job_timings = {}
+        outer = getattr(_current, 'timings', None)
+        _current.timings = job_timings
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            _current.timings = outer
+            if phase_name != TOTAL:
+                job_timings = {}
+            job_timings[phase_name] = elapsed
+            with self._lock:
+                repo_timings = self.timings.setdefault(path, {})
+                for name, seconds in job_timings.items():
+                    repo_timings[name] = repo_timings.get(name, 0) + seconds
+
+    @staticmethod
+    def repo_time(repo_timings):
+        # a repository's own job + its submodules' jobs
+        return repo_timings.get(TOTAL, 0) + repo_timings.get('submodules', 0)
+
+    def phase_totals(self):
+        """
+        :return: dict
+                {phase: seconds} summed over all repositories, for
+                phases that were timed (in the order of `PHASES`)
+        """
+        totals = {}
+        for name in (*PHASES, TOTAL):
+            seconds = sum(t.get(name, 0) for t in self.timings.values())
+            if seconds > 0 or name == TOTAL:
+                totals[name] = seconds
+        return totals
+
+    def slowest(self, n=N_SLOWEST):
+        """
+        :param n: int or None (optional)
+                max number of repositories. If None, all of them
+        :return: list
+                (path, {phase: seconds}) tuples, slowest first
+        """
+        ranked = sorted(self.timings.items(),
+                        key=lambda item: self.repo_time(item[1]),
+                        reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def format_report(self, n=N_SLOWEST):
+        """
+        :param n: int (optional)
+                number of slowest repositories to list
+        :return: str
+                the slowest repositories, each with its slowest
+                phases, followed by each phase's total
+        """
+        def _ms(seconds): return f'{seconds * 1000:9.1f}ms'
+
+        lines = [f'profile: {len(self.timings)} repositories, wall-clock time '
+                 'per repository & phase', 'slowest repositories:']
+        for path, repo_timings in self.slowest(n):
+            phases = sorted(((name, s) for name, s in repo_timings.items()
+                             if name != TOTAL),
+                            key=lambda item: item[1],
+                            reverse=True)
+            phases_fmt = ', '.join(f'{name} {s * 1000:.1f}ms' for name, s in phases[:3])
+            lines.append(f'{_ms(self.repo_time(repo_timings))}  {path}'
+                         + (f'  ({phases_fmt})' if phases_fmt else ''))
+        totals = self.phase_totals()
+        # the repositories' own jobs, excluding submodules' (separate) jobs
+        own_total = totals[TOTAL]
+        lines.append('phase totals (summed over repositories):')
+        for name, seconds in totals.items():
+            # share of the repositories' own jobs spent in each phase
+            if own_total and name not in (TOTAL, 'submodules'):
+                share = f'{seconds / own_total:6.1%}'
+            else:
+                share = ''
+            lines.append(f'{_ms(seconds)}  {name:<13}{share}'.rstrip())
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        """
+        :return: dict
+                the phase totals and every repository's timings
+                (slowest first), in seconds
+        """
+        return {
+            'phase_totals': self.phase_totals(),
+            'repos': [{'path': path, 'seconds': self.repo_time(t), 'phases': t}
+                      for path, t in self.slowest(None)]
+        }
+
+    def save(self, fpath):
+        """
+        Writes `to_dict()` as JSON
+        :param fpath: str or pathlib.Path
+                the file to write to
+        """
+        with open(fpath, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
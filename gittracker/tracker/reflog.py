@@ -0,0 +1,78 @@
+import os
+from os.path import join as pjoin
+from .gitdir import find_git_dir
+
+# bytes read from the end of the reflog at a time. Most detached HEADs
+# were checked out recently, so the first block usually suffices
+BLOCK_SIZE = 8192
+CHECKOUT_PREFIX = b'checkout: moving from '
+
+
+def iter_reflog_reverse(reflog_path, block_size=BLOCK_SIZE):
+    """
+    Reads a reflog file from the end, one block at a time, so the
+    most recent entries can be found without reading (or parsing)
+    the whole file
+    :param reflog_path: str
+            path to the reflog file (e.g., `.git/logs/HEAD`)
+    :param block_size: int (optional)
+            number of bytes to read at a time
+    :yield: bytes
+            each line (entry) in the reflog, newest first,
+            without the trailing newline
+    """
+    with open(reflog_path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        # incomplete (first) line of the most recently read block
+        partial = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + partial).split(b'\n')
+            partial = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if partial:
+            yield partial
+
+
+def detached_head_origin(repo_path):
+    """
+    Finds where a repository's HEAD was detached from, from the
+    most recent checkout entry in its HEAD reflog
+    :param repo_path: str
+            absolute path to the repository's working tree
+    :return: tuple or None
+            3-tuple of (from_branch, ref_sha, n_new). `from_branch`
+            is the branch (or commit) HEAD was detached from,
+            `ref_sha` is the (7-character) hash of the commit it
+            was detached at, and `n_new` is the number of reflog
+            entries (e.g., commits) since. If there's no checkout
+            entry, the branch is assumed to be master. None if the
+            reflog couldn't be read
+    """
+    reflog_path = pjoin(find_git_dir(repo_path), 'logs', 'HEAD')
+    n_new = -1
+    newest_sha = None
+    try:
+        for n_new, line in enumerate(iter_reflog_reverse(reflog_path)):
+            # "<old sha> <new sha> <committer> <timestamp> <tz>\t<message>"
+            shas, _, message = line.partition(b'\t')
+            if newest_sha is None:
+                newest_sha = shas.split(b' ', 2)[1].decode()
+            if message.startswith(CHECKOUT_PREFIX):
+                # "checkout: moving from <old branch> to <new branch/sha>"
+                # the most recent checkout is the one that detached HEAD
+                info = message.decode('utf-8', 'replace').split()
+                return info[3], info[-1][:7], n_new
+    except (OSError, IndexError):
+        return None
+    if newest_sha is None:
+        # empty reflog
+        return None
+    # fallback/failsafe (shouldn't ever get here):
+    #   - assume HEAD was detached from master and display assumption
+    #   - return the current commit's sha so display excludes other info
+    return 'master [assumed]', newest_sha[:7], n_new
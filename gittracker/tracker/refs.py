@@ -0,0 +1,242 @@
+import re
+from collections import namedtuple
+from os.path import join as pjoin
+from .gitdir import find_common_dir, find_git_dir
+
+# a repository's checked-out branch & its upstream, as used in
+# `_single_repo_status`:
+#   - is_detached: whether HEAD is detached
+#   - hexsha: full hash of the commit HEAD points to, or None if the
+#     repository has no commits
+#   - local_branch: name of the checked-out branch (None if detached)
+#   - remote_branch: name of the branch's upstream (remote tracking)
+#     branch, e.g., "origin/main", or '' if it doesn't have one
+#   - remote_hexsha: full hash of the commit the upstream branch points
+#     to (None if there's no upstream, or it doesn't exist locally)
+BranchInfo = namedtuple('BranchInfo', ('is_detached', 'hexsha', 'local_branch',
+                                       'remote_branch', 'remote_hexsha'))
+
+# symbolic refs (e.g., refs/remotes/origin/HEAD) pointing to other
+# symbolic refs are followed at most this many times
+MAX_SYMREF_DEPTH = 5
+_SECTION_RE = re.compile(r'\[\s*([^\]\s"]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+
+
+class RefsUnsupported(Exception):
+    """
+    raised when a repository's refs can't be read directly (e.g.,
+    they're stored in a reftable), so GitPython should be used
+    instead
+    """
+
+
+def read_config(config_path):
+    """
+    Minimal parser for a git config file -- enough to read simple
+    values like branches' upstreams. Doesn't follow includes or
+    handle values continued across lines
+    :param config_path: str
+            path to the config file
+    :return: dict
+            {section: {key: value}}. Section names take the form
+            "section" or "section.subsection" (e.g.,
+            "branch.main"), lowercase apart from the
+            (case-sensitive) subsection. Keys are lowercase. Empty
+            if the file doesn't exist
+    """
+    config = {}
+    section = None
+    try:
+        with open(config_path, 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return config
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line.startswith('['):
+            match = _SECTION_RE.match(line)
+            if match is None:
+                section = None
+                continue
+            name, subsection = match.groups()
+            section = name.lower()
+            if subsection is not None:
+                section += '.' + re.sub(r'\\(.)', r'\1', subsection)
+            config.setdefault(section, {})
+            # a key may follow the section header on the same line
+            line = line[match.end():].strip()
+            if not line or line[0] in '#;':
+                continue
+        if section is None:
+            continue
+        key, _, value = line.partition('=')
+        value = value.strip()
+        if len(value) > 1 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        config[section][key.strip().lower()] = value
+    return config
+
+
+def upstream_ref(config, branch):
+    """
+    Finds the full ref of a branch's upstream (remote tracking)
+    branch from the repository's config
+    :param config: dict
+            the repository's config, as returned by `read_config`
+    :param branch: str
+            the local branch's name (e.g., "main")
+    :return: str or None
+            the full upstream ref (e.g.,
+            "refs/remotes/origin/main"), or None if the branch
+            isn't tracking a remote branch
+    """
+    branch_config = config.get(f'branch.{branch}', {})
+    remote = branch_config.get('remote')
+    merge = branch_config.get('merge')
+    if not remote or not merge or not merge.startswith('refs/heads/'):
+        return None
+    if remote == '.':
+        # branch is tracking another local branch
+        return merge
+    return f"refs/remotes/{remote}/{merge[len('refs/heads/'):]}"
+
+
+class RefResolver:
+    def __init__(self, repo_path):
+        """
+        Reads a repository's HEAD, refs, and config directly from
+        its git directory, without GitPython. Loose refs are
+        checked first, then `packed-refs` (read once, and searched
+        with a binary search if it's sorted)
+        :param repo_path: str
+                absolute path to the repository's working tree
+        """
+        self.git_dir = find_git_dir(repo_path)
+        self.common_dir = find_common_dir(self.git_dir)
+        self.config = read_config(pjoin(self.common_dir, 'config'))
+        extensions = self.config.get('extensions', {})
+        if extensions.get('refstorage', 'files').lower() != 'files':
+            raise RefsUnsupported("refs aren't stored in files")
+        self._packed_refs = None
+        self._packed_refs_sorted = False
+
+    def read_head(self):
+        # returns the contents of HEAD (a ref or commit hash)
+        with open(pjoin(self.git_dir, 'HEAD'), 'r') as f:
+            return f.read().strip()
+
+    def resolve(self, ref, depth=0):
+        """
+        Finds the commit hash a ref points to
+        :param ref: str
+                a full ref name (e.g., "refs/heads/main")
+        :param depth: int
+                number of symbolic refs followed so far
+        :return: str or None
+                the full commit hash, or None if the ref doesn't
+                exist
+        """
+        # per-worktree refs (HEAD, refs/bisect, etc.) live in the git
+        # directory; branches & remote branches in the common directory
+        for ref_dir in {self.git_dir, self.common_dir}:
+            try:
+                with open(pjoin(ref_dir, ref), 'r') as f:
+                    value = f.read().strip()
+            except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+                continue
+            if value.startswith('ref: '):
+                if depth >= MAX_SYMREF_DEPTH:
+                    return None
+                return self.resolve(value[5:], depth=depth + 1)
+            return value
+        return self._packed_ref(ref)
+
+    def branch_info(self):
+        """
+        Gets information about the checked-out branch and its
+        upstream
+        :return: BranchInfo
+                see `BranchInfo` for fields
+        """
+        head = self.read_head()
+        if not head.startswith('ref: '):
+            # detached HEAD
+            return BranchInfo(True, head, None, None, None)
+        ref = head[5:]
+        if not ref.startswith('refs/heads/'):
+            raise RefsUnsupported(f"HEAD points to {ref}")
+        branch = ref[len('refs/heads/'):]
+        hexsha = self.resolve(ref)
+        remote_ref = upstream_ref(self.config, branch)
+        if remote_ref is None:
+            return BranchInfo(False, hexsha, branch, '', None)
+        if remote_ref.startswith('refs/remotes/'):
+            remote_branch = remote_ref[len('refs/remotes/'):]
+        else:
+            remote_branch = remote_ref[len('refs/heads/'):]
+        return BranchInfo(False, hexsha, branch, remote_branch,
+                          self.resolve(remote_ref))
+
+    def _packed_ref(self, ref):
+        if self._packed_refs is None:
+            try:
+                with open(pjoin(self.common_dir, 'packed-refs'), 'rb') as f:
+                    self._packed_refs = f.read()
+            except FileNotFoundError:
+                self._packed_refs = b''
+            header_end = self._packed_refs.find(b'\n') + 1
+            if self._packed_refs.startswith(b'# pack-refs with:'):
+                traits = self._packed_refs[:header_end].split()
+                self._packed_refs_sorted = b'sorted' in traits
+        buf = self._packed_refs
+        if not buf:
+            return None
+        target = ref.encode()
+        if not self._packed_refs_sorted:
+            for line in buf.splitlines():
+                sha, _, name = line.partition(b' ')
+                if name == target and not line.startswith((b'#', b'^')):
+                    return sha.decode()
+            return None
+
+        # binary search over records. `lo` and `hi` are always offsets of
+        # the start of a record (a "<sha> <ref>" line, plus a "^<sha>"
+        # line with the peeled value for annotated tags)
+        lo = buf.find(b'\n') + 1 if buf.startswith(b'#') else 0
+        hi = len(buf)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = buf.rfind(b'\n', 0, mid) + 1
+            if buf.startswith(b'^', start):
+                # peeled line belongs to the previous record
+                start = buf.rfind(b'\n', 0, start - 1) + 1
+            end = buf.find(b'\n', start)
+            end = len(buf) if end == -1 else end
+            sha, _, name = buf[start:end].partition(b' ')
+            if name == target:
+                return sha.decode()
+            if target < name:
+                hi = start
+            else:
+                lo = end + 1
+                if buf.startswith(b'^', lo):
+                    lo = buf.find(b'\n', lo) + 1 or len(buf)
+        return None
+
+
+def resolve_branch_info(repo_path):
+    """
+    Gets a repository's branch info without GitPython (see
+    `RefResolver`)
+    :param repo_path: str
+            absolute path to the repository's working tree
+    :return: BranchInfo or None
+            the repository's branch info, or None if it couldn't
+            be read directly
+    """
+    try:
+        return RefResolver(repo_path).branch_info()
+    except (OSError, UnicodeDecodeError, RefsUnsupported):
+        return None
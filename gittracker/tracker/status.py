@@ -0,0 +1,149 @@
+from collections.abc import Mapping
+from sys import intern
+
+# available methods for collecting each repository's status:
+#   - "gitpython": separate GitPython queries for branch info, staged
+#     changes, unstaged changes, untracked files, and commit counts
+#   - "porcelain": a single `git status --porcelain=v2` subprocess
+#     per repository
+BACKENDS = ('gitpython', 'porcelain')
+# every field in a repository's status, in display order. See
+# `gittracker.tracker.tracker._single_repo_status` for how each field is
+# populated
+STATUS_FIELDS = (
+    # local branch compared to remote tracking branch
+    'local_branch',
+    'remote_branch',
+    'n_commits_ahead',
+    'n_commits_behind',
+    # uncommitted local changes
+    'n_staged',
+    'files_staged',
+    'n_not_staged',
+    'files_not_staged',
+    'n_untracked',
+    'files_untracked',
+    # alternate info for repos in a detached HEAD state
+    'is_detached',
+    'hexsha',
+    'from_branch',
+    'ref_sha',
+    'detached_commits',
+    # info for submodules (if any)
+    'submodules',
+    # whether the status couldn't be collected in time (see
+    # `gittracker.tracker.deadline`). If so, the other fields are either
+    # empty or the repository's last cached (i.e., stale) status
+    'timed_out'
+)
+_FIELD_SET = frozenset(STATUS_FIELDS)
+# fields that make a repository "not up-to-date" if they're set/non-zero
+DIRTY_FIELDS = ('is_detached', 'n_commits_ahead', 'n_commits_behind',
+                'n_staged', 'n_not_staged', 'n_untracked', 'timed_out')
+# alternate info reported for a submodule whose status couldn't be
+# collected in time
+SUBMODULE_TIMED_OUT_MSG = 'status timed out'
+
+
+class RepoStatus(Mapping):
+    """
+    A single repository's status. Stores each field in a slot rather
+    than a per-instance dict, so tracking a large number of
+    repositories doesn't mean holding a large number of 17-key
+    dicts. On 64-bit CPython, each instance takes 168 bytes (plus
+    the values themselves) vs. ~460 bytes for the equivalent dict.
+
+    Supports the same read/write access by field name as a dict
+    (`status['n_staged']`, `.get()`, `.keys()`, `.items()`, etc.), and
+    compares equal to a dict with the same fields & values. Fields
+    can't be added or removed
+    """
+    __slots__ = STATUS_FIELDS
+
+    def __init__(self, **fields):
+        for field in STATUS_FIELDS:
+            setattr(self, field, None)
+        self.is_detached = False
+        self.timed_out = False
+        for field, value in fields.items():
+            self[field] = value
+
+    def __getitem__(self, field):
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def __iter__(self):
+        return iter(STATUS_FIELDS)
+
+    def __len__(self):
+        return len(STATUS_FIELDS)
+
+    def __contains__(self, field):
+        return field in _FIELD_SET
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.to_dict()!r})'
+
+    def __getstate__(self):
+        # (for pickling) values in field order
+        return tuple(getattr(self, field) for field in STATUS_FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(STATUS_FIELDS, state):
+            setattr(self, field, value)
+
+    def copy(self):
+        new = RepoStatus.__new__(RepoStatus)
+        new.__setstate__(self.__getstate__())
+        return new
+
+    def to_dict(self):
+        """
+        :return: dict
+                the status as a plain {field: value} dict
+        """
+        return {field: getattr(self, field) for field in STATUS_FIELDS}
+
+
+def new_status():
+    """
+    Creates an empty status for a single repository. Every status
+    backend fills (a subset of) the same fields, so
+    `gittracker.display.display.Displayer` can format their output
+    interchangeably
+    :return: RepoStatus
+            status with each field set to its default value. See
+            `gittracker.tracker.tracker._single_repo_status` for
+            how each field is populated
+    """
+    return RepoStatus()
+
+
+def intern_path(path):
+    """
+    Interns a repository's path (as a str), so every status, cache
+    entry, etc. for the same repository shares one string object
+    :param path: str or pathlib.Path
+            the repository's path
+    :return: str
+            the interned path
+    """
+    return intern(str(path))
+
+
+def is_clean(status):
+    """
+    :param status: Mapping
+            a repository's status
+    :return: bool
+            whether the repository is up-to-date: not detached,
+            even with its remote (or not tracking one), and with
+            no uncommitted changes. Submodules' states don't count
+    """
+    return not any(status[field] for field in DIRTY_FIELDS)
@@ -1,9 +1,46 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import partial
+from os import cpu_count
+from os.path import realpath
 from shutil import get_terminal_size
-from git import Repo, InvalidGitRepositoryError
+from time import monotonic
+from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
 from tqdm import tqdm
+from .cache import fingerprint
+from .counts import parse_rev_list_count, rev_list_count_args
+# a `git.Repo` whose git subprocesses are killed when their job runs out
+# of time
+from .deadline import DaemonThreadPool, Job, TimedRepo as Repo
+from .devices import DeviceLimiter
+from .index import index_unstaged_changes
+from .porcelain import porcelain_status
+from .profile import TOTAL, phase
+from .reflog import detached_head_origin
+from .refs import BranchInfo, resolve_branch_info
+from .status import BACKENDS, SUBMODULE_TIMED_OUT_MSG, intern_path, new_status
 
+# upper limit on the automatically chosen number of worker threads.
+# Status collection is I/O-bound (git subprocesses and disk reads), so
+# more workers than CPUs is fine, but past a point extra threads just
+# contend for the same disk
+MAX_AUTO_JOBS = 32
 
-def get_status(repo_paths, verbose=2, follow_submodules=0):
+
+def get_status(
+        repo_paths,
+        verbose=2,
+        follow_submodules=0,
+        jobs=None,
+        backend='gitpython',
+        max_count=None,
+        cache=None,
+        quick=False,
+        profiler=None,
+        timeout=None,
+        deadline=None,
+        durations=None,
+        device_jobs=None
+):
     """
     Determines "git-status"-like information for a set of
     git repositories based on their (absolute) `repo_paths`.
@@ -19,6 +56,61 @@ def get_status(repo_paths, verbose=2, follow_submodules=0):
             of nested submodules in a repository. If 0
             [default], no submodule information will be
             included
+    :param jobs: int or None (default None)
+            Number of repositories whose statuses are
+            collected concurrently. If None [default], a
+            value is chosen based on the number of CPUs and
+            repositories (see `_resolve_jobs`)
+    :param backend: str (default "gitpython")
+            Method used to collect each repository's status.
+            One of `BACKENDS`
+    :param max_count: int or None (default None)
+            Maximum number of commits to walk when counting
+            how far each branch is ahead of/behind its remote.
+            Counts that reach the limit are reported as lower
+            bounds (e.g., "1000+"). If None [default], count
+            all commits
+    :param cache: gittracker.tracker.cache.StatusCache (optional)
+            If given, repositories whose git metadata hasn't
+            changed since their status was cached are skipped,
+            and newly collected statuses are added to the cache.
+            Not used when `follow_submodules` is > 0, since
+            submodules' states aren't part of the fingerprint
+    :param quick: bool (default False)
+            If True, only determine whether each repository is
+            clean or has changes, stopping at the first change
+            found (see `_quick_repo_status`). Enough for
+            displaying at verbosity level 1. `backend` and
+            `follow_submodules` are ignored
+    :param profiler: gittracker.tracker.profile.Profiler (optional)
+            If given, each phase of collecting each repository's
+            status is timed and recorded in the profiler
+    :param timeout: float or None (default None)
+            Maximum number of seconds to spend collecting
+            each repository's status (each of its submodules
+            gets the same limit separately). A repository that
+            runs over is reported as timed out, with its last
+            cached status if `cache` has one (i.e., a stale
+            status), and its git subprocesses are killed. If
+            None [default], there's no limit
+    :param deadline: float or None (default None)
+            Maximum number of seconds to spend on the whole set
+            of repositories. Repositories that haven't finished
+            by then are reported as timed out, the same way as
+            for `timeout`. If None [default], there's no limit
+    :param durations: gittracker.tracker.durations.DurationLog (optional)
+            If given, how long each repository's status takes
+            to collect is recorded, and when checking
+            repositories concurrently, those expected to take
+            longest are started first. Statuses are still
+            returned in the order of `repo_paths`
+    :param device_jobs: int or None (default None)
+            Maximum number of repositories on the same device
+            (e.g., disk or network mount) to check at once, so a
+            slow device isn't thrashed by too many concurrent
+            reads. If None [default], each device's limit is
+            chosen based on its type and tuned as repositories
+            on it finish (see `.devices.DeviceLimiter`)
     :return: dict
             a dictionary of {path: changes} for each local
             repository (in `repo_paths`). Otherwise, it will
@@ -32,104 +124,486 @@ def get_status(repo_paths, verbose=2, follow_submodules=0):
     # cause an appreciable wait time
     pbar_off = len(repo_paths) < 10
     ncols = get_terminal_size().columns
-    changes = dict.fromkeys(repo_paths)
-    for path in tqdm(repo_paths,
-                     unit=' repo',
-                     ncols=ncols,
-                     leave=False,
-                     disable=pbar_off):
-        repo = Repo(path)
-        changes[str(path)] = _single_repo_status(repo,
-                                            verbose=verbose,
-                                            follow_submodules=follow_submodules)
+    # pre-populating keys preserves the original (tracked) order
+    # regardless of the order in which repositories finish
+    changes = dict.fromkeys(map(intern_path, repo_paths))
+    statuses = iter_status(repo_paths,
+                           verbose=verbose,
+                           follow_submodules=follow_submodules,
+                           jobs=jobs,
+                           backend=backend,
+                           max_count=max_count,
+                           cache=cache,
+                           quick=quick,
+                           profiler=profiler,
+                           timeout=timeout,
+                           deadline=deadline,
+                           durations=durations,
+                           device_jobs=device_jobs)
+    with tqdm(total=len(repo_paths),
+              unit=' repo',
+              ncols=ncols,
+              leave=False,
+              disable=pbar_off) as pbar:
+        # progress bar advances as repositories finish, not as they're
+        # submitted
+        for path, status in statuses:
+            changes[path] = status
+            pbar.update()
 
     return changes
 
 
-def _single_repo_status(repo, verbose, follow_submodules):
+def iter_status(
+        repo_paths,
+        verbose=2,
+        follow_submodules=0,
+        jobs=None,
+        backend='gitpython',
+        max_count=None,
+        cache=None,
+        quick=False,
+        profiler=None,
+        timeout=None,
+        deadline=None,
+        durations=None,
+        device_jobs=None
+):
+    """
+    Generator version of `get_status` that yields each
+    repository's status as soon as it's been collected, rather
+    than waiting for the full set of repositories to finish.
+    Parameters are the same as for `get_status`.
+    :yield: tuple
+            (path, changes) for each repository in `repo_paths`,
+            in the order they finish (NOT the tracked order)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of: {', '.join(BACKENDS)}. "
+                         f"Got {backend}")
+    if quick:
+        follow_submodules = 0
+    elif follow_submodules > 0:
+        cache = None
+    # submodules are scheduled on the same pool, so with submodules there
+    # can be more jobs than repositories
+    n_jobs = len(repo_paths) if follow_submodules == 0 else None
+    n_workers = _resolve_jobs(jobs, n_jobs)
+    has_limit = timeout is not None or deadline is not None
+    if deadline is not None:
+        deadline = monotonic() + deadline
+    # (same as in `_path_status`) for looking up stale statuses
+    options = (verbose, follow_submodules, backend, max_count, quick)
+    scheduled = repo_paths
+    if durations is not None:
+        by_duration = durations.order(repo_paths)
+        # (with a single worker, the total time is the same in any order)
+        if n_workers > 1:
+            scheduled = by_duration
+    # (with a single worker, no device can have more than one at a time)
+    limiter = None if n_workers == 1 else DeviceLimiter(n_workers,
+                                                        device_jobs=device_jobs,
+                                                        durations=durations)
+    executor = DaemonThreadPool(n_workers)
+    # {future: node} for each job that hasn't finished
+    nodes = {}
+    # {future: (func, args, kwargs)} as submitted, for jobs with time limits
+    calls = {}
+
+    def _submit(node, phase_name, func, *args, **kwargs):
+        # schedules `node`'s job, within the time limits (if any). Jobs'
+        # timings are recorded under their top-level repository
+        if has_limit:
+            node.job = Job(timeout=timeout, deadline=deadline)
+            func, args = node.job.run, (func, *args)
+        if profiler is not None:
+            func, args = profiler.call, (node.root, phase_name, func, *args)
+        future = executor.submit(func, *args, **kwargs)
+        nodes[future] = node
+        if has_limit:
+            calls[future] = (func, args, kwargs)
+
+    def _start(path):
+        _submit(_StatusNode(intern_path(path)),
+                TOTAL,
+                _path_status,
+                path,
+                verbose=verbose,
+                follow_submodules=follow_submodules,
+                backend=backend,
+                max_count=max_count,
+                cache=cache,
+                quick=quick,
+                durations=durations)
+
+    def _complete(node, result, finished):
+        node.result = result
+        # top-level repos' jobs return a status; submodules' return
+        # (status, alt_message)
+        node.status = result if node.is_top_level else result[0]
+        submodules = None if node.status is None else node.status['submodules']
+        if isinstance(submodules, _PendingSubmodules):
+            node.status['submodules'] = dict.fromkeys(sm.path for sm in submodules)
+            for sm in submodules:
+                key = (realpath(sm.abspath), submodules.depth)
+                sm_node = submodule_nodes.get(key)
+                if sm_node is None:
+                    sm_node = _StatusNode(sm.path, root=node.root)
+                    submodule_nodes[key] = sm_node
+                    _submit(sm_node,
+                            'submodules',
+                            _submodule_status,
+                            sm,
+                            depth=submodules.depth,
+                            max_count=max_count)
+                sm_node.add_parent(node, sm.path)
+        node.job_done(finished)
+
+    def _timed_out(node):
+        if node.is_top_level:
+            return _timed_out_status(node.path, cache, options)
+        return None, SUBMODULE_TIMED_OUT_MSG
+
+    # {(submodule path, depth): node} so a submodule checkout reached
+    # more than once only has its status collected once
+    submodule_nodes = {}
+    # executors with workers still stuck on jobs that were given up on
+    abandoned = []
+    try:
+        if limiter is None:
+            for path in scheduled:
+                _start(path)
+        else:
+            # repositories are started as their devices have room
+            for path in scheduled:
+                limiter.add(path)
+            for path in limiter.ready():
+                _start(path)
+        while nodes:
+            wait_timeout = _next_expiry(nodes.values()) if has_limit else None
+            done, _ = wait(nodes, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                node = nodes.pop(future)
+                calls.pop(future, None)
+                timed_out = False
+                try:
+                    result = future.result()
+                except Exception:
+                    if node.job is None or not node.job.is_overdue():
+                        raise
+                    # ran out of time (e.g., its git subprocess was killed)
+                    result = _timed_out(node)
+                    timed_out = True
+                if limiter is not None and node.is_top_level:
+                    limiter.done(node.path, timed_out=timed_out)
+                _complete(node, result, finished)
+            if has_limit:
+                n_abandoned = 0
+                now = monotonic()
+                for future, node in list(nodes.items()):
+                    if future.done() or not node.job.is_overdue(now):
+                        continue
+                    del nodes[future]
+                    del calls[future]
+                    if not future.cancel():
+                        # already running: kill its git subprocesses and
+                        # stop waiting for it
+                        node.job.expire()
+                        n_abandoned += 1
+                    if limiter is not None and node.is_top_level:
+                        limiter.done(node.path, timed_out=True)
+                    _complete(node, _timed_out(node), finished)
+                if limiter is not None and deadline is not None and now >= deadline:
+                    # no time left to start repositories still waiting
+                    # on their devices
+                    for path in limiter.pending():
+                        node = _StatusNode(intern_path(path))
+                        _complete(node, _timed_out(node), finished)
+                if n_abandoned > 0:
+                    # threads can't be interrupted, so a job blocked on
+                    # something other than git (e.g., a hung network
+                    # filesystem) keeps its worker (though not the process,
+                    # since workers are daemon threads). Move queued jobs
+                    # to a fresh pool so they can't get stuck behind it
+                    abandoned.append(executor)
+                    executor = DaemonThreadPool(n_workers)
+                    for future in [f for f in nodes if f.cancel()]:
+                        node = nodes.pop(future)
+                        func, args, kwargs = calls.pop(future)
+                        new_future = executor.submit(func, *args, **kwargs)
+                        nodes[new_future] = node
+                        calls[new_future] = (func, args, kwargs)
+            if limiter is not None:
+                for path in limiter.ready():
+                    _start(path)
+            for node in finished:
+                yield node.path, node.result
+    finally:
+        # if the consumer stops early (or a repository raised),
+        # don't start on repositories that are still queued
+        for future in nodes:
+            future.cancel()
+        executor.shutdown(wait=not abandoned)
+        for old_executor in abandoned:
+            old_executor.shutdown(wait=False)
+
+
+def _next_expiry(nodes):
+    # seconds until the first of `nodes`' jobs could run out of time
+    now = monotonic()
+    expiries = [node.job.earliest_expiry(now) for node in nodes]
+    return max(0, min(expiries) - now)
+
+
+def _timed_out_status(path, cache, options):
+    # status reported for a repository that ran out of time: its last
+    # cached status (if any), marked as timed out
+    status = None if cache is None else cache.last(path, options)
+    status = new_status() if status is None else status.copy()
+    status['timed_out'] = True
+    return status
+
+
+class _StatusNode:
+    # a repository (or submodule) whose status is being collected by
+    # `iter_status`. Its status isn't complete until those of its
+    # submodules are, which are collected by separate jobs
+    __slots__ = ('path', 'root', 'is_top_level', 'result', 'status',
+                 'n_pending', 'parents', 'job')
+
+    def __init__(self, path, root=None):
+        self.path = path
+        # path of the top-level repository (for submodules, the first
+        # one found to contain it)
+        self.root = path if root is None else root
+        self.is_top_level = root is None
+        self.result = None
+        self.status = None
+        # own job + submodules' jobs
+        self.n_pending = 1
+        # (node, submodule path) for each repository this is a submodule of
+        self.parents = []
+        # time limits for its job (see `.deadline.Job`), if any
+        self.job = None
+
+    def add_parent(self, parent, sm_path):
+        if self.n_pending == 0:
+            # already complete (shared with another parent)
+            parent.status['submodules'][sm_path] = self.result
+        else:
+            self.parents.append((parent, sm_path))
+            parent.n_pending += 1
+
+    def job_done(self, finished):
+        # marks this node's own job as done, and propagates completion
+        # up to the top-level repository (added to `finished`)
+        self.n_pending -= 1
+        if self.n_pending > 0:
+            return
+        if self.is_top_level:
+            finished.append(self)
+        for parent, sm_path in self.parents:
+            parent.status['submodules'][sm_path] = self.result
+            parent.job_done(finished)
+
+
+class _PendingSubmodules(list):
+    # placeholder for a status's "submodules" field: a repository's
+    # submodules, whose statuses `iter_status` schedules as separate jobs
+    # (to be collected with the given depth)
+    def __init__(self, submodules, depth):
+        super().__init__(submodules)
+        self.depth = depth
+
+
+def _resolve_jobs(jobs, n_repos):
+    """
+    Determines the number of worker threads used to collect
+    repository statuses
+    :param jobs: int or None
+            the number of workers requested by the user. If
+            None, defaults to the number of CPUs + 4 (the same
+            heuristic `concurrent.futures` uses for I/O-bound
+            work), capped at `MAX_AUTO_JOBS`
+    :param n_repos: int or None
+            the number of repositories to be processed. There's
+            never a reason to start more workers than this. None
+            if unknown ahead of time (e.g., submodules are
+            included)
+    :return: int
+            the number of workers to use (always at least 1)
+    """
+    if jobs is None:
+        jobs = min(MAX_AUTO_JOBS, (cpu_count() or 1) + 4)
+    if n_repos is not None:
+        jobs = min(jobs, n_repos)
+    return max(1, jobs)
+
+
+def _path_status(
+        path,
+        verbose,
+        follow_submodules,
+        backend='gitpython',
+        max_count=None,
+        cache=None,
+        quick=False,
+        durations=None
+):
+    # worker function run for each repository
+    collect = partial(_collect_status,
+                      path,
+                      verbose=verbose,
+                      follow_submodules=follow_submodules,
+                      backend=backend,
+                      max_count=max_count,
+                      quick=quick)
+    if durations is not None:
+        # (statuses reused from the cache aren't timed)
+        collect = partial(durations.time, path, collect)
+    if cache is None:
+        return collect()
+
+    options = (verbose, follow_submodules, backend, max_count, quick)
+    # fingerprint is taken *before* collecting the status, so changes
+    # made while it's being collected invalidate the entry next time
+    try:
+        with phase('fingerprint'):
+            repo_fingerprint = fingerprint(path)
+    except OSError:
+        # unusual repository layout -- collect without caching
+        return collect()
+    status = cache.get(path, repo_fingerprint, options)
+    if status is None:
+        status = collect()
+        cache.set(path, repo_fingerprint, options, status)
+    return status
+
+
+def _collect_status(path, verbose, follow_submodules, backend, max_count,
+                    quick=False):
+    # Each call creates its own Repo object, so no GitPython state is
+    # shared between threads
+    if quick:
+        return _quick_repo_status(Repo(path))
+    if backend == 'porcelain':
+        return _porcelain_repo_status(path,
+                                      verbose=verbose,
+                                      follow_submodules=follow_submodules,
+                                      max_count=max_count)
+    repo = Repo(path)
+    return _single_repo_status(repo,
+                               verbose=verbose,
+                               follow_submodules=follow_submodules,
+                               max_count=max_count)
+
+
+def _porcelain_repo_status(path, verbose, follow_submodules, max_count=None):
+    """
+    Collects a repository's status with a single `git status`
+    subprocess (see `gittracker.tracker.porcelain`), only falling
+    back to GitPython for the information `git status` doesn't
+    report: where a detached HEAD was detached from, and submodules
+    :param path: str
+            absolute path to a local repository
+    :param verbose: int
+            verbosity level
+    :param follow_submodules: int
+            maximum recursion depth for submodules
+    :param max_count: int or None
+            maximum number of commits to walk when counting
+            commits ahead/behind the remote
+    :return: RepoStatus
+            {field: info} pairs, in the same format as
+            `_single_repo_status`
+    """
+    with phase('porcelain'):
+        status = porcelain_status(path, verbose=verbose, max_count=max_count)
+    if status['is_detached'] or follow_submodules > 0:
+        repo = Repo(path)
+        if status['is_detached']:
+            with phase('head'):
+                _fill_detached_status(status, repo)
+        if follow_submodules > 0:
+            status['submodules'] = _pending_submodules(repo, follow_submodules)
+    return status
+
+
+def _single_repo_status(repo, verbose, follow_submodules, max_count=None):
     """
     :param repo: git.Repo.base.Repo
             a Repo object referencing a
             local repository
     :param verbose: int
             verbosity level
-    :param follow_submodules: bool
-            whether or not to include submodules
-    :return: dict
+    :param follow_submodules: int
+            maximum recursion depth for submodules. If > 0, the
+            "submodules" field holds the repository's submodules
+            for `iter_status` to collect on its worker pool
+    :param max_count: int or None
+            maximum number of commits to walk when counting
+            commits ahead/behind the remote. If None, count all
+    :return: RepoStatus
             {field: info} pairs.  Fields (keys) are sufficient
             to create a "git-status"-like output for a
             repository, though many are set to None at lower
             `verbose` values
     """
     # TODO (future?): option to get info about branches other than current
-    status = {
-        # local branch compared to remote tracking branch
-        'local_branch': None,
-        'remote_branch': None,
-        'n_commits_ahead': None,
-        'n_commits_behind': None,
-        # uncommitted local changes
-        'n_staged': None,
-        'files_staged': None,
-        'n_not_staged': None,
-        'files_not_staged': None,
-        'n_untracked': None,
-        'files_untracked': None,
-        # alternate info for repos in a detached HEAD state
-        'is_detached': False,
-        'hexsha': None,
-        'from_branch': None,
-        'ref_sha': None,
-        'detached_commits': None,
-        # info for submodules (if any)
-        'submodules': None
-    }
-    try:
-        headcommit = repo.head.commit
-
-    except ValueError as e:
-        raise InvalidGitRepositoryError(
-            "GitTracker currently doesn't support tracking newly "
-            f"initialized repositories (can't track {repo.working_dir}"
-        ) from e
+    status = new_status()
+    # like `git --no-optional-locks`: keeps `git status` (used for
+    # untracked files) from writing refreshed stat info back to the index,
+    # which would interfere with git commands the user is running and
+    # change the repository's fingerprint (see `.cache.fingerprint`)
+    repo.git.update_environment(GIT_OPTIONAL_LOCKS='0')
+    with phase('head'):
+        branch = _branch_info(repo)
 
-    if repo.head.is_detached:
+    if branch.is_detached:
         # if HEAD is detached, report some slightly different information
         status['is_detached'] = True
-        status['hexsha'] = headcommit.hexsha[:7]
-        from_branch, ref_sha, n_new_commits = _detached_status(repo)
-        status['from_branch'] = from_branch
-        if ref_sha != status['hexsha']:
-            # if commits have been made since detaching HEAD, report hash
-            # where initially detached and number of new commits
-            status['ref_sha'] = ref_sha
-            status['detached_commits'] = n_new_commits
+        status['hexsha'] = branch.hexsha[:7]
+        with phase('head'):
+            _fill_detached_status(status, repo)
 
     else:
-        local_branch = repo.active_branch
-        local_branch_name = local_branch.name
-        try:
-            remote_branch_name = local_branch.tracking_branch().name
-            n_ahead = len(list(repo.iter_commits(
-                f"{remote_branch_name}..{local_branch_name}"
-            )))
-            n_behind = len(list(repo.iter_commits(
-                f"{local_branch_name}..{remote_branch_name}"
-            )))
-        except AttributeError:
+        # (an upstream that no longer exists, e.g., was deleted on the
+        # remote and pruned, counts as not tracking a remote)
+        if branch.remote_hexsha is not None:
+            # count both directions in a single walk of the symmetric
+            # difference, without creating Commit objects
+            with phase('ahead_behind'):
+                rev_list_output = repo.git.rev_list(*rev_list_count_args(
+                    branch.local_branch,
+                    branch.remote_branch,
+                    max_count=max_count
+                ))
+            n_ahead, n_behind = parse_rev_list_count(rev_list_output,
+                                                     max_count=max_count)
+            remote_branch = branch.remote_branch
+        else:
             # local branch isn't tracking a remote
-            remote_branch_name = ''
+            remote_branch = ''
             n_ahead = None
             n_behind = None
 
-        status['local_branch'] = local_branch_name
-        status['remote_branch'] = remote_branch_name
+        status['local_branch'] = branch.local_branch
+        status['remote_branch'] = remote_branch
         status['n_commits_ahead'] = n_ahead
         status['n_commits_behind'] = n_behind
 
-    staged = headcommit.diff()
-    unstaged = repo.index.diff(None)
-    untracked = repo.untracked_files
+    with phase('staged'):
+        staged = repo.head.commit.diff()
+    # compare the index's cached stat info to the working tree directly
+    # if possible, otherwise let git do it
+    with phase('unstaged'):
+        unstaged = index_unstaged_changes(repo.working_dir)
+        if unstaged is None:
+            unstaged = [(diff.change_type, diff.a_path, None)
+                        for diff in repo.index.diff(None)]
+    with phase('untracked'):
+        untracked = repo.untracked_files
     status['n_staged'] = len(staged)
     status['n_not_staged'] = len(unstaged)
     status['n_untracked'] = len(untracked)
@@ -149,23 +623,185 @@ def _single_repo_status(repo, verbose, follow_submodules):
 
         status['files_staged'] = files_staged
         status['files_untracked'] = untracked
-        status['files_not_staged'] = [
-            (diff.change_type, diff.a_path, None) for diff in unstaged
-        ]
+        status['files_not_staged'] = unstaged
+
+    if follow_submodules > 0:
+        status['submodules'] = _pending_submodules(repo, follow_submodules)
 
-    if follow_submodules > 0 and any(repo.submodules):
-        submodules = {}
-        for sm in repo.submodules:
-            sm_status = _submodule_status(sm, depth=follow_submodules)
-            submodules[sm.path] = sm_status
+    return status
+
+
+def _quick_repo_status(repo):
+    """
+    Determines only whether a repository is clean (no detached HEAD,
+    even with its remote, and no uncommitted changes), checking the
+    cheapest signals first and stopping at the first sign of
+    changes. Fields for signals that weren't checked are left as
+    None, and the signal that was found is reported as an
+    indicator rather than a full count: True for uncommitted
+    changes, or a lower bound of 1 commit ahead of/behind the
+    remote
+    :param repo: git.Repo.base.Repo
+            a Repo object referencing a local repository
+    :return: RepoStatus
+            {field: info} pairs, in the same format as
+            `_single_repo_status`. Only suitable for displaying at
+            verbosity level 1
+    """
+    status = new_status()
+    repo.git.update_environment(GIT_OPTIONAL_LOCKS='0')
+    with phase('head'):
+        branch = _branch_info(repo)
 
-        status['submodules'] = submodules
+    # 1. detached HEAD
+    if branch.is_detached:
+        status['is_detached'] = True
+        status['hexsha'] = branch.hexsha[:7]
+        return status
 
+    # 2. local branch vs. remote tracking branch (reads refs only; only
+    # walks commits if they differ, and then just one)
+    status['local_branch'] = branch.local_branch
+    if branch.remote_hexsha is None:
+        # local branch isn't tracking a remote (or its upstream no longer
+        # exists, e.g., was deleted on the remote and pruned)
+        status['remote_branch'] = ''
+    else:
+        status['remote_branch'] = branch.remote_branch
+        if branch.remote_hexsha != branch.hexsha:
+            with phase('ahead_behind'):
+                rev_list_output = repo.git.rev_list(*rev_list_count_args(
+                    branch.local_branch,
+                    branch.remote_branch,
+                    max_count=1
+                ))
+            n_ahead, n_behind = parse_rev_list_count(rev_list_output, max_count=1)
+            status['n_commits_ahead'] = n_ahead
+            status['n_commits_behind'] = n_behind
+            return status
+        status['n_commits_ahead'] = 0
+        status['n_commits_behind'] = 0
+
+    # 3. index vs. HEAD
+    with phase('staged'):
+        has_staged = _has_diff(repo, '--cached')
+    if has_staged:
+        status['n_staged'] = True
+        return status
+    status['n_staged'] = 0
+    # 4. working tree vs. index, without running git if possible (file
+    # contents are only compared for files whose stat info doesn't match
+    # the index)
+    with phase('unstaged'):
+        unstaged = index_unstaged_changes(repo.working_dir)
+        has_unstaged = _has_diff(repo) if unstaged is None else any(unstaged)
+    if has_unstaged:
+        status['n_not_staged'] = True
+        return status
+    status['n_not_staged'] = 0
+    # 5. untracked files (untracked directories are listed without
+    # descending into them)
+    with phase('untracked'):
+        untracked = repo.git.ls_files('--others', '--exclude-standard',
+                                      '--directory', '--no-empty-directory')
+    status['n_untracked'] = True if untracked else 0
     return status
 
 
+def _branch_info(repo):
+    """
+    Gets info about a repository's HEAD, checked-out branch, and
+    its upstream, reading HEAD, refs, and config directly if
+    possible (see `.refs.RefResolver`) or with GitPython if not
+    :param repo: git.Repo.base.Repo
+            a Repo object referencing a local repository
+    :return: gittracker.tracker.refs.BranchInfo
+            the repository's branch info
+    """
+    branch = resolve_branch_info(repo.working_dir)
+    if branch is None:
+        try:
+            hexsha = repo.head.commit.hexsha
+        except ValueError:
+            hexsha = None
+        if repo.head.is_detached:
+            branch = BranchInfo(True, hexsha, None, None, None)
+        else:
+            local_branch = repo.active_branch
+            try:
+                remote_branch = local_branch.tracking_branch()
+                remote_branch_name = remote_branch.name
+            except AttributeError:
+                # local branch isn't tracking a remote
+                remote_branch_name = ''
+                remote_hexsha = None
+            else:
+                try:
+                    remote_hexsha = remote_branch.commit.hexsha
+                except ValueError:
+                    # remote branch doesn't exist locally
+                    remote_hexsha = None
+            branch = BranchInfo(False, hexsha, local_branch.name,
+                                remote_branch_name, remote_hexsha)
+
+    if branch.hexsha is None:
+        raise InvalidGitRepositoryError(
+            "GitTracker currently doesn't support tracking newly "
+            f"initialized repositories (can't track {repo.working_dir}"
+        )
+    return branch
+
+
+def _has_diff(repo, *args):
+    # runs `git diff --quiet`, which exits at the first difference
+    # found, with a status of 1 if there were any
+    returncode, _, stderr = repo.git.diff(*args,
+                                          '--quiet',
+                                          with_extended_output=True,
+                                          with_exceptions=False)
+    if returncode not in (0, 1):
+        raise GitCommandError(['git', 'diff', *args, '--quiet'],
+                              returncode,
+                              stderr)
+    return returncode == 1
+
+
+def _fill_detached_status(status, repo):
+    # fills info about where a detached HEAD was detached from, given
+    # `status['hexsha']` has already been set
+    from_branch, ref_sha, n_new_commits = _detached_status(repo)
+    status['from_branch'] = from_branch
+    if ref_sha != status['hexsha']:
+        # if commits have been made since detaching HEAD, report hash
+        # where initially detached and number of new commits
+        status['ref_sha'] = ref_sha
+        status['detached_commits'] = n_new_commits
+
+
+def _pending_submodules(repo, follow_submodules):
+    # lists a repository's submodules (parsing .gitmodules once) for
+    # `iter_status` to schedule, or returns None if it doesn't have any
+    submodules = list(repo.submodules)
+    if not any(submodules):
+        return None
+    return _PendingSubmodules(submodules, depth=follow_submodules)
+
+
 def _detached_status(repo):
-    # TODO: add docstring
+    """
+    Determines where a repository's detached HEAD was detached
+    from, and how many commits have been made since
+    :param repo: git.Repo.base.Repo
+            a Repo object referencing a local repository whose
+            HEAD is detached
+    :return: tuple
+            3-tuple of (from_branch, ref_sha, n_new) (see
+            `.reflog.detached_head_origin`)
+    """
+    # read only the end of the reflog directly if possible
+    origin = detached_head_origin(repo.working_dir)
+    if origin is not None:
+        return origin
     # log is listed oldest to newest, so reverse it
     log_entries = repo.head.log()[::-1]
     for n_new, log_entry in enumerate(log_entries):
@@ -188,14 +824,19 @@ def _detached_status(repo):
     return ref_branch, ref_sha, n_new
 
 
-def _submodule_status(submodule, depth=1):
+def _submodule_status(submodule, depth=1, max_count=None):
     """
-    Helper function that recursively gets basic
-    information about the status of any submodules
+    Helper function that gets basic information about the
+    status of a submodule. Run as a job on `iter_status`'s worker
+    pool; the submodule's own submodules (if followed) are
+    scheduled as separate jobs
     :param submodule: git.objects.submodule.base.Submodule
             the submodule object of a parent repository
     :param depth: int
-            the nested submodule depth of the *current* call
+            remaining submodule depth, including this submodule
+    :param max_count: int or None
+            maximum number of commits to walk when counting
+            commits ahead/behind the remote
     :return: tuple
             2-tuple of (info, alt_message). If submodule behaves
             like a normal git repository, `info` is a status dict
@@ -204,15 +845,18 @@ def _submodule_status(submodule, depth=1):
             `info` being None and `alt_message` being populated
             with a message instead
     """
-    # TODO: Function needs testing
     # TODO: once expandable GUI view is finished, can allow variable verbosity.
     #  For now, pinning to 1 regardless of parent `verbose` value
     try:
-        submodule_repo = submodule.module()
+        # (rather than `submodule.module()`, which returns a plain
+        # `git.Repo`) so the submodule's git subprocesses are killed when
+        # its job runs out of time
+        submodule_repo = Repo(submodule.abspath)
         sm_status = _single_repo_status(
             submodule_repo,
             verbose=1,
-            follow_submodules=depth - 1
+            follow_submodules=depth - 1,
+            max_count=max_count
         )
         return sm_status, None
 
@@ -222,7 +866,7 @@ def _submodule_status(submodule, depth=1):
         msg = f'HEAD detached at {sm_sha_shortened}'
         return None, msg
 
-    except InvalidGitRepositoryError:
+    except (InvalidGitRepositoryError, NoSuchPathError):
         # submodule hasn't been initialized
         msg = 'not initialized'
         return None, msg
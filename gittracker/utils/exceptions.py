@@ -1,6 +1,3 @@
-from inspect import currentframe, getouterframes
-
-
 class GitTrackerError(Exception):
     pass
 
@@ -9,6 +6,8 @@ class BugIdentified(GitTrackerError):
     # handles exception info logging for bugs identified by users via the
     # `utils.prompt_input` function
     def __init__(self):
+        # (imported here since `inspect` is slow to import)
+        from inspect import currentframe, getouterframes
         input_caller = getouterframes(currentframe())[2].function
         msg = f"Bug identified via user input from function: {input_caller}"
         super().__init__(msg)
@@ -2,6 +2,7 @@ import os
 from datetime import datetime as dt
 from functools import wraps
 from os.path import expanduser, expandvars, isdir, realpath
+from os.path import join as pjoin
 from pathlib import Path
 from sys import exit, platform
 from traceback import print_exception
@@ -9,6 +10,9 @@ from .exceptions import BugIdentified, RepoNotFoundError, NoGitdirError
 
 LOG_DIR = Path(__file__).resolve().parents[1].joinpath('log')
 LOGFILE_PATH = Path(LOG_DIR, 'logfile')
+# below this many repositories, `find_invalid_repos` checks them serially
+# (starting threads would take longer than the checks)
+MIN_CONCURRENT_CHECKS = 16
 GITHUB_URL = "https://github.com/paxtonfitzpatrick/gittracker/issues/new"
 BUG_MSG = "\n\nUh oh! Looks like you might have encountered a bug, please " \
           f"consider posting an issue at:\n\t{GITHUB_URL}\n\nwith the " \
@@ -124,16 +128,58 @@ def prompt_input(prompt, default=None, possible_bug=False):
 
 def validate_repo(repo_path):
     cleaned_path = cleanpath(repo_path)
-    # check directory exists
-    if not isdir(cleaned_path):
-        raise RepoNotFoundError(cleaned_path)
-    # check that directory is a git repository
-    if '.git' not in os.listdir(cleaned_path):
-        raise NoGitdirError(cleaned_path)
+    # same check as for already tracked repositories, so a path is never
+    # valid to add but invalid once tracked (or vice versa)
+    error = check_repo(cleaned_path)
+    if error is not None:
+        raise error
 
     return cleaned_path
 
 
+def check_repo(repo_path):
+    """
+    Checks that an (already cleaned) path is a git repository with a
+    single `stat` of its `.git` directory (or file, for worktrees &
+    submodules). Further checks are only done if that fails, to
+    determine why. A `.git` symlink counts only if its target exists
+    :param repo_path: str
+            absolute, normalized path to the repository
+    :return: GitTrackerError or None
+            `RepoNotFoundError` if the directory doesn't exist,
+            `NoGitdirError` if it isn't a git repository, or None
+            if it's valid
+    """
+    try:
+        os.stat(pjoin(repo_path, '.git'))
+        return None
+    except OSError:
+        pass
+    if not isdir(repo_path):
+        return RepoNotFoundError(repo_path)
+    return NoGitdirError(repo_path)
+
+
+def find_invalid_repos(repo_paths):
+    """
+    Checks many repositories (see `check_repo`) concurrently
+    :param repo_paths: list-like
+            absolute, normalized paths to the repositories
+    :return: dict
+            {path: error} for each invalid repository, in the
+            order of `repo_paths`
+    """
+    if len(repo_paths) < MIN_CONCURRENT_CHECKS:
+        errors = map(check_repo, repo_paths)
+    else:
+        # (imported here since `concurrent.futures` is slow to import, and
+        # most commands never need it)
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor() as executor:
+            errors = list(executor.map(check_repo, repo_paths))
+    return {path: e for path, e in zip(repo_paths, errors) if e is not None}
+
+
 def validate_writable_path(path):
     # checks that a file path is valid and writable,
     # and converts it to a pathlib.Path object
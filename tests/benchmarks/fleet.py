@@ -0,0 +1,164 @@
+from collections import namedtuple
+from random import Random
+from subprocess import run
+from ..helpers.git_helpers import GIT_CONFIG_ARGS, commit_file, git
+
+# shape of a generated fleet. Fractions are the share of repositories
+# (chosen at random, but reproducibly for a given `seed`) put into each
+# state; a repository can be in several states at once, except that
+# detached repositories are never ahead of/behind the remote
+FleetSpec = namedtuple(
+    'FleetSpec',
+    [
+        # number of repositories, and how many share each parent directory
+        'n_repos',
+        'repos_per_dir',
+        # files in the remote's tree & commits in its history
+        'n_files',
+        'n_commits',
+        # repositories with local commits & commits missing from the
+        # remote, and the max number of each (at least 1)
+        'frac_ahead',
+        'frac_behind',
+        'max_diverged',
+        # repositories with modified tracked files (about half of them
+        # staged), and the number of files modified
+        'frac_dirty',
+        'n_dirty',
+        # repositories with untracked files, and the number of files
+        'frac_untracked',
+        'n_untracked',
+        # repositories in a detached HEAD state
+        'frac_detached',
+        # repositories with a submodule (a clone of the remote)
+        'frac_submodule',
+        'seed'
+    ]
+)
+# (namedtuple's `defaults` argument isn't available on Python 3.6)
+FleetSpec.__new__.__defaults__ = (100, 10, 200, 50, 0.3, 0.3, 5, 0.3, 5, 0.3, 5,
+                                  0.1, 0.1, 0)
+
+# what was done to each generated repository, i.e., what its status
+# should report
+FleetRepo = namedtuple('FleetRepo', ['path', 'n_ahead', 'n_behind', 'n_staged',
+                                     'n_not_staged', 'n_untracked', 'detached',
+                                     'submodule'])
+
+Fleet = namedtuple('Fleet', ['root', 'remote', 'repos'])
+
+
+def generate_fleet(root, spec=FleetSpec()):
+    """
+    Creates a fleet of real git repositories for benchmarking: a
+    bare "remote" at `root/remote.git` whose history is written in
+    one `git fast-import` run, and `spec.n_repos` clones of it under
+    `root/repos/dir<i>/repo<j>`, each then put into the states
+    chosen for it (ahead of/behind the remote, with staged,
+    unstaged & untracked changes, detached, with a submodule)
+    :param root: pathlib.Path
+            an empty (or nonexistent) directory to create the
+            fleet in
+    :param spec: FleetSpec (optional)
+            the fleet's shape. Defaults to `FleetSpec()`
+    :return: Fleet
+            the fleet's root, the remote's path, and a FleetRepo
+            for each repository (in order)
+    """
+    if spec.n_files < 1 or spec.n_commits < 1:
+        raise ValueError("fleets need at least 1 file and 1 commit")
+    rng = Random(spec.seed)
+    remote = root.joinpath('remote.git')
+    remote.mkdir(parents=True)
+    git(remote, 'init', '-q', '--bare')
+    run(['git', *GIT_CONFIG_ARGS, 'fast-import', '--quiet'],
+        input=_fast_import_stream(spec.n_files, spec.n_commits),
+        cwd=remote,
+        check=True)
+
+    repos_dir = root.joinpath('repos')
+    repos = []
+    for i in range(spec.n_repos):
+        repo_path = repos_dir.joinpath(f'dir{i // spec.repos_per_dir}', f'repo{i}')
+        repo_path.parent.mkdir(parents=True, exist_ok=True)
+        git(repo_path.parent, 'clone', '-q', str(remote), repo_path.name)
+        repos.append(_setup_repo(repo_path, remote, spec, rng))
+    return Fleet(root=root, remote=remote, repos=repos)
+
+
+def _setup_repo(repo_path, remote, spec, rng):
+    # puts a freshly cloned repository into a random set of states
+    def _chosen(frac): return rng.random() < frac
+    # can't go further back than the root commit
+    max_behind = min(spec.max_diverged, spec.n_commits - 1)
+    detached = _chosen(spec.frac_detached)
+    n_behind = 0
+    n_ahead = 0
+    if not detached and max_behind > 0 and _chosen(spec.frac_behind):
+        n_behind = rng.randint(1, max_behind)
+        git(repo_path, 'reset', '-q', '--hard', f'HEAD~{n_behind}')
+    submodule = _chosen(spec.frac_submodule)
+    if submodule:
+        git(repo_path, 'submodule', '-q', 'add', str(remote), 'submodule')
+        git(repo_path, 'commit', '-q', '-m', 'add submodule')
+        n_ahead += 1
+    if not detached and _chosen(spec.frac_ahead):
+        for j in range(rng.randint(1, spec.max_diverged)):
+            fname = _file_path(rng.randrange(spec.n_files))
+            commit_file(repo_path, fname, f'local change {j}\n')
+            n_ahead += 1
+    if detached:
+        git(repo_path, 'checkout', '-q', '--detach')
+        n_ahead = 0
+
+    n_staged = 0
+    n_not_staged = 0
+    if _chosen(spec.frac_dirty):
+        fnames = rng.sample(range(spec.n_files), min(spec.n_dirty, spec.n_files))
+        for j, f in enumerate(fnames):
+            fname = _file_path(f)
+            repo_path.joinpath(fname).write_text(f'uncommitted change {j}\n')
+            if j % 2:
+                git(repo_path, 'add', fname)
+                n_staged += 1
+            else:
+                n_not_staged += 1
+    n_untracked = 0
+    if _chosen(spec.frac_untracked):
+        n_untracked = spec.n_untracked
+        for j in range(n_untracked):
+            repo_path.joinpath(f'untracked{j}.txt').write_text(f'{j}\n')
+    return FleetRepo(path=str(repo_path),
+                     n_ahead=n_ahead,
+                     n_behind=n_behind,
+                     n_staged=n_staged,
+                     n_not_staged=n_not_staged,
+                     n_untracked=n_untracked,
+                     detached=detached,
+                     submodule=submodule)
+
+
+def _file_path(ix):
+    # files are spread across a few subdirectories, like a real project
+    return f'src/dir{ix % 8}/file{ix}.txt'
+
+
+def _fast_import_stream(n_files, n_commits):
+    # `git fast-import` input for a "master" branch whose first commit
+    # adds `n_files` files and whose later commits each modify one
+    def _data(content):
+        content = content.encode()
+        return b'data %d\n%s\n' % (len(content), content)
+
+    chunks = []
+    for c in range(n_commits):
+        chunks.append(b'commit refs/heads/master\n')
+        chunks.append(b'committer Fleet <fleet@gittracker> %d +0000\n'
+                      % (1_600_000_000 + c * 60))
+        chunks.append(_data(f'commit {c}'))
+        changed = range(n_files) if c == 0 else (c % n_files,)
+        for f in changed:
+            chunks.append(f'M 100644 inline {_file_path(f)}\n'.encode())
+            chunks.append(_data(f'file {f}, version {c}\n'))
+    chunks.append(b'done\n')
+    return b''.join(chunks)
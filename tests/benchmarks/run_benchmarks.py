@@ -0,0 +1,239 @@
+"""
+Times GitTracker's main operations on a generated fleet of real git
+repositories (see `fleet.py`) and writes the results as JSON, for
+tracking performance regressions across changes. Run from the
+repository root with:
+
+    python -m tests.benchmarks.run_benchmarks [options] [-o results.json]
+"""
+import json
+import os
+import platform
+import sys
+from argparse import ArgumentParser
+from contextlib import ExitStack, contextmanager, redirect_stderr, redirect_stdout
+from functools import partial
+from pathlib import Path
+from statistics import median
+from subprocess import PIPE, run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from unittest.mock import patch
+from gittracker import __version__
+from gittracker.display.display import Displayer
+from gittracker.repofile import repofile
+from gittracker.repofile.patterns import IgnorePatterns
+from gittracker.repofile.scanner import DirSnapshot
+from gittracker.repofile.store import RepoStore
+from gittracker.tracker.status import BACKENDS
+from gittracker.tracker.tracker import get_status
+from .fleet import FleetSpec, generate_fleet
+
+# bump whenever the structure of the results changes
+RESULTS_VERSION = 1
+VERBOSITY_LEVELS = (1, 2, 3)
+
+
+def time_call(func, repeat):
+    """
+    Calls `func` `repeat` times
+    :param func: callable
+            called with no arguments
+    :param repeat: int
+            number of calls
+    :return: dict
+            each call's wall-clock time (seconds), plus their min,
+            median & mean
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    return {
+        'times': times,
+        'min': min(times),
+        'median': median(times),
+        'mean': sum(times) / len(times)
+    }
+
+
+@contextmanager
+def isolated_state(state_dir, tracked=()):
+    """
+    Points GitTracker's on-disk state (tracked repositories, `find`
+    snapshot & ignore patterns) at `state_dir` rather than the
+    user's, answers "no" to any prompts, and silences output, so
+    commands can be timed without side effects
+    :param state_dir: pathlib.Path
+            an existing directory to hold the state files
+    :param tracked: iterable of str (optional)
+            paths of repositories to start out tracked
+    """
+    db_fpath = state_dir.joinpath('tracked-repos.db')
+    legacy_fpath = state_dir.joinpath('tracked-repos')
+    RepoStore(db_fpath, legacy_fpath).add(tracked)
+
+    class _IsolatedPatterns(IgnorePatterns):
+        @classmethod
+        def from_file(cls, fpath=None, extra_patterns=()):
+            return super().from_file(state_dir.joinpath('find-ignore'), extra_patterns)
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(
+            repofile, 'repo_store', lambda: RepoStore(db_fpath, legacy_fpath)
+        ))
+        stack.enter_context(patch.object(
+            repofile, 'DirSnapshot', partial(DirSnapshot, state_dir.joinpath('find-snapshot'))
+        ))
+        stack.enter_context(patch.object(repofile, 'IgnorePatterns', _IsolatedPatterns))
+        stack.enter_context(patch.object(repofile, 'prompt_input', lambda *a, **kw: False))
+        stack.enter_context(patch.object(repofile, 'clear_display', lambda: None))
+        devnull = stack.enter_context(open(os.devnull, 'w'))
+        stack.enter_context(redirect_stdout(devnull))
+        stack.enter_context(redirect_stderr(devnull))
+        yield
+
+
+def run_benchmarks(fleet, repeat=5, jobs=None, follow_submodules=0):
+    """
+    Times each benchmark on a generated fleet
+    :param fleet: Fleet
+            the fleet (see `fleet.generate_fleet`)
+    :param repeat: int (optional)
+            number of times each benchmark is run
+    :param jobs: int or None (optional)
+            passed to the functions that take it
+    :param follow_submodules: int (optional)
+            passed to `get_status`
+    :return: list
+            one dict per benchmark, with its name, parameters
+            and timings (see `time_call`)
+    """
+    repo_paths = [repo.path for repo in fleet.repos]
+    results = []
+
+    def _add(name, func, **params):
+        results.append({'name': name, 'params': params, **time_call(func, repeat)})
+
+    statuses = {}
+    for verbose in VERBOSITY_LEVELS:
+        for backend in BACKENDS:
+            # verbosity level 1 only checks whether each repository is
+            # clean, regardless of the backend
+            if verbose == 1 and backend != BACKENDS[0]:
+                continue
+
+            def _get_status(verbose=verbose, backend=backend):
+                statuses[verbose] = get_status(repo_paths,
+                                               verbose=verbose,
+                                               follow_submodules=follow_submodules,
+                                               jobs=jobs,
+                                               backend=backend,
+                                               quick=verbose == 1)
+
+            # (hides get_status's progress bar)
+            with open(os.devnull, 'w') as devnull, redirect_stderr(devnull):
+                _add('get_status', _get_status, verbose=verbose, backend=backend,
+                     follow_submodules=follow_submodules)
+
+    for verbose in VERBOSITY_LEVELS:
+        displayer = Displayer(statuses[verbose], verbose=verbose, plain=True)
+        _add('display', displayer.format_status_display, verbose=verbose)
+
+    repos_dir = str(fleet.root.joinpath('repos'))
+    with TemporaryDirectory() as state_dir:
+        state_dir = Path(state_dir)
+        with isolated_state(state_dir):
+            def _find(full_scan):
+                try:
+                    repofile.auto_find_repos(repos_dir, jobs=jobs, full_scan=full_scan)
+                except SystemExit:
+                    pass
+
+            _add('auto_find_repos', partial(_find, True), full_scan=True)
+            # the first full search saved a snapshot for incremental ones
+            _add('auto_find_repos', partial(_find, False), full_scan=False)
+
+    with TemporaryDirectory() as state_dir:
+        with isolated_state(Path(state_dir), tracked=repo_paths):
+            _add('validate_tracked', repofile.validate_tracked)
+
+    return results
+
+
+def environment_info():
+    """
+    :return: dict
+            versions of everything that affects the results
+    """
+    git_version = run(['git', '--version'], stdout=PIPE, encoding='UTF-8').stdout
+    return {
+        'gittracker': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git': git_version.strip()
+    }
+
+
+def main(argv=None):
+    defaults = FleetSpec()
+    parser = ArgumentParser(description="benchmark GitTracker on a generated fleet "
+                                        "of real git repositories")
+    parser.add_argument('-o', '--output', type=Path,
+                        help="file to write the JSON results to (default: stdout)")
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help="number of times each benchmark is run")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="number of concurrent jobs (default: automatic)")
+    parser.add_argument('--follow-submodules', type=int, default=0,
+                        help="submodule recursion depth for get_status")
+    parser.add_argument('--fleet-dir', type=Path,
+                        help="directory to generate the fleet in and keep it "
+                             "(default: a temporary directory)")
+    # every field of the fleet's spec can be set from the command line
+    for field, default in defaults._asdict().items():
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field,
+                            type=type(default), default=default)
+    args = parser.parse_args(argv)
+    spec = FleetSpec(**{field: getattr(args, field) for field in FleetSpec._fields})
+
+    with ExitStack() as stack:
+        if args.fleet_dir is None:
+            fleet_dir = Path(stack.enter_context(TemporaryDirectory()))
+        else:
+            fleet_dir = args.fleet_dir
+        print(f"generating {spec.n_repos} repositories in {fleet_dir}...", file=sys.stderr)
+        start = perf_counter()
+        fleet = generate_fleet(fleet_dir, spec)
+        print(f"generated in {perf_counter() - start:.1f}s, running benchmarks...",
+              file=sys.stderr)
+        results = run_benchmarks(fleet,
+                                 repeat=args.repeat,
+                                 jobs=args.jobs,
+                                 follow_submodules=args.follow_submodules)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'environment': environment_info(),
+        'spec': spec._asdict(),
+        'repeat': args.repeat,
+        'results': results
+    }
+    for result in results:
+        params = ', '.join(f'{k}={v}' for k, v in result['params'].items())
+        print(f"{result['name']}({params}): median {result['median'] * 1000:.1f}ms, "
+              f"min {result['min'] * 1000:.1f}ms", file=sys.stderr)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
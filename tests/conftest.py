@@ -1,6 +1,7 @@
 import pytest
 from os.path import splitext
 from shutil import copy2, rmtree
+from gittracker.tracker.deadline import TimedRepo
 from .helpers.mock_repo import MockRepo
 from .helpers.tracker_helpers import create_tracker_output
 from .helpers.constants import (MOCK_OUTPUT_DIR,
@@ -15,6 +16,13 @@ def patch_repo(monkeypatch):
     monkeypatch.setattr('gittracker.tracker.tracker.Repo', MockRepo)
 
 
+@pytest.fixture
+def real_git(monkeypatch):
+    # undo the autouse MockRepo patch for tests that run GitPython on
+    # real repositories
+    monkeypatch.setattr('gittracker.tracker.tracker.Repo', TimedRepo)
+
+
 @pytest.fixture(scope='session')
 def mock_repo():
     def _setup_repo(config_file):
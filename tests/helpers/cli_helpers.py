@@ -0,0 +1,29 @@
+import sys
+from subprocess import PIPE, run
+
+# runs the CLI with the log directory (tracked repositories, logfile, etc.)
+# redirected to the directory given as the first argument, so tests never
+# touch the real one. `{setup}` runs just before the CLI is imported
+_REDIRECTED_MAIN = """\
+import sys
+from pathlib import Path
+from gittracker.utils import utils
+utils.LOG_DIR = Path(sys.argv.pop(1))
+utils.LOGFILE_PATH = utils.LOG_DIR.joinpath('logfile')
+{setup}
+from gittracker.command import main
+sys.exit(main())
+"""
+
+
+def run_redirected(log_dir, args, stdin='', setup='', python_args=(), timeout=None):
+    """
+    runs `gittracker <args>` in a subprocess, with its log directory
+    redirected to `log_dir` (a pathlib.Path), after running the python
+    code `setup` (e.g., to patch something). Returns the
+    `subprocess.CompletedProcess`
+    """
+    cmd = [sys.executable, *python_args, '-c',
+           _REDIRECTED_MAIN.format(setup=setup), str(log_dir), *args]
+    return run(cmd, input=stdin, stdout=PIPE, stderr=PIPE, encoding='UTF-8',
+               timeout=timeout)
@@ -53,5 +53,7 @@ TRACKER_OUTPUT = {
     'ref_sha': None,
     'detached_commits': None,
     # info for submodules (if any)
-    'submodules': None
+    'submodules': None,
+    # whether the status couldn't be collected in time
+    'timed_out': False
 }
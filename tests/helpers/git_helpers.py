@@ -0,0 +1,47 @@
+from subprocess import PIPE, run
+
+# identity & config passed to every git command so tests don't depend on
+# the user's (or CI machine's) global git config
+GIT_CONFIG_ARGS = ('-c', 'user.name=GitTracker Tests',
+                   '-c', 'user.email=tests@gittracker',
+                   '-c', 'init.defaultBranch=master',
+                   '-c', 'commit.gpgsign=false',
+                   '-c', 'protocol.file.allow=always')
+
+
+def git(repo_path, *args):
+    """runs a git command in `repo_path` and returns its stdout"""
+    result = run(['git', *GIT_CONFIG_ARGS, *args],
+                 cwd=repo_path,
+                 stdout=PIPE,
+                 stderr=PIPE,
+                 encoding='UTF-8')
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def init_repo(repo_path, n_commits=1):
+    """
+    creates a real git repository at `repo_path` (a pathlib.Path) with
+    `n_commits` commits on the "master" branch, each adding one file
+    """
+    repo_path.mkdir(parents=True, exist_ok=True)
+    git(repo_path, 'init', '-q')
+    for i in range(n_commits):
+        commit_file(repo_path, f'file{i}.txt', f'{i}\n')
+    return repo_path
+
+
+def commit_file(repo_path, filename, content, message=None):
+    """writes `content` to `filename` and commits it"""
+    filepath = repo_path.joinpath(filename)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.write_text(content)
+    git(repo_path, 'add', filename)
+    git(repo_path, 'commit', '-q', '-m', message or f'update {filename}')
+
+
+def clone_repo(remote_path, repo_path):
+    """clones `remote_path` into `repo_path` (tracking origin/master)"""
+    git(remote_path.parent, 'clone', '-q', str(remote_path), str(repo_path))
+    return repo_path
@@ -7,7 +7,15 @@ from .tracker_helpers import CONVERTERS, add_submodule_config
 
 class MockRepo:
     """patch for git.Repo"""
+    # {path: exception} raised when opening the checkouts of mock
+    # submodules that are in a detached HEAD state or not initialized
+    # (see `MockSubmodule`)
+    submodule_errors = {}
+
     def __init__(self, repo_path):
+        error = self.submodule_errors.get(str(repo_path))
+        if error is not None:
+            raise error
         self.repo_path = self._validate_repo(repo_path)
         self.working_dir = self.repo_path
         self._config = self._load_config()
@@ -24,6 +32,7 @@ class MockRepo:
         else:
             self.active_branch = self.MockActiveBranch(self._config['active_branch'])
         self.submodules = self._setup_submodules(self._config['submodules'])
+        self._write_git_dir()
 
     def _failcase_active_branch(self):
         """
@@ -34,6 +43,49 @@ class MockRepo:
         raise TypeError("Tried to access the `active_branch` peoperty of a repo "
                         "with HEAD detached")
 
+    def _write_git_dir(self):
+        """
+        writes the HEAD, refs, config, and HEAD reflog files GitTracker
+        reads directly (see `gittracker.tracker.refs` and
+        `gittracker.tracker.reflog`) into the mock repository's .git
+        directory, consistent with the mocked GitPython objects
+        """
+        git_dir = self.repo_path.joinpath('.git')
+        if git_dir.joinpath('HEAD').is_file():
+            # already written for a previous test
+            return
+        if self.head.is_detached:
+            git_dir.joinpath('HEAD').write_text(f'{self.head._hexsha}\n')
+            # HEAD reflog with the same entries as MockHead.log()
+            git_dir.joinpath('logs').mkdir()
+            reflog = ''.join(
+                f"{'0' * 40} {entry.newhexsha or '0' * 40} Mock <mock@mock> "
+                f"0 +0000\t{entry.message}\n"
+                for entry in self.head.log()
+            )
+            git_dir.joinpath('logs', 'HEAD').write_text(reflog)
+            return
+        if self.head._is_empty:
+            # branch without any commits
+            git_dir.joinpath('HEAD').write_text('ref: refs/heads/master\n')
+            return
+        branch = self.active_branch
+        git_dir.joinpath('HEAD').write_text(f'ref: refs/heads/{branch.name}\n')
+        refs = {f'refs/heads/{branch.name}': branch.commit.hexsha}
+        if branch.remote_branch != '':
+            remote, remote_branch = branch.remote_branch.split('/', 1)
+            git_dir.joinpath('config').write_text(
+                f'[branch "{branch.name}"]\n'
+                f'\tremote = {remote}\n'
+                f'\tmerge = refs/heads/{remote_branch}\n'
+            )
+            refs[f'refs/remotes/{branch.remote_branch}'] = \
+                branch.tracking_branch().commit.hexsha
+        for ref, hexsha in refs.items():
+            ref_path = git_dir.joinpath(ref)
+            ref_path.parent.mkdir(parents=True, exist_ok=True)
+            ref_path.write_text(f'{hexsha}\n')
+
     def _load_config(self):
         config_path = self.repo_path.joinpath(f"{self.repo_path.name}.cfg")
         config = ConfigParser(converters=CONVERTERS)
@@ -90,15 +142,42 @@ class MockRepo:
         Index = namedtuple('index', 'diff')
         return Index(diff=_get_staged_changes)
 
-    def iter_commits(self, comparison_str):
+    @property
+    def git(self):
         """
-        immitates accepted args and functionality of
-        git.Repo.iter_commits. Patched method returns a generator of
-        git.objects.Commit instances, but it's simpler to mock the output
-        by passing the task onto self.MockActiveBranch, which contains
-        the attributes we need to access
+        patch for git.cmd.Git, which runs arbitrary git commands. Only
+        the commands GitTracker actually runs are mocked; their output
+        is passed on from self.MockActiveBranch, which contains the
+        attributes we need to access
         """
-        return self.active_branch._compare_to_remote(comparison_str)
+        Git = namedtuple('Git', ('rev_list', 'diff', 'ls_files',
+                                 'update_environment'))
+        return Git(
+            rev_list=lambda *args: self.active_branch._count_left_right(*args),
+            diff=self._diff_quiet,
+            ls_files=self._ls_files_untracked,
+            update_environment=lambda **env: env
+        )
+
+    def _diff_quiet(self, *args, with_extended_output=False,
+                    with_exceptions=True):
+        """
+        patch for `git diff [--cached] --quiet`, run with GitPython's
+        `with_extended_output=True` & `with_exceptions=False` options
+        """
+        assert args[-1] == '--quiet'
+        assert with_extended_output and not with_exceptions
+        if args[:-1] == ('--cached',):
+            changes = self._staged_changes
+        else:
+            assert len(args) == 1
+            changes = self.unstaged_changes
+        return int(any(changes)), '', ''
+
+    def _ls_files_untracked(self, *args):
+        """patch for `git ls-files --others --exclude-standard ...`"""
+        assert args[:2] == ('--others', '--exclude-standard')
+        return '\n'.join(self.untracked_files)
 
     class MockActiveBranch:
         """patch for git.refs.Head"""
@@ -112,32 +191,53 @@ class MockRepo:
                 self.n_commits_ahead = branch_config.getint('n_commits_ahead')
                 self.n_commits_behind = branch_config.getint('n_commits_behind')
 
-        def _compare_to_remote(self, local_remote_str):
-            """see MockRepo.iter_commits()"""
-            comparator, reference = local_remote_str.split('..')
+        @property
+        def commit(self):
+            """
+            patch for the branch's latest commit. Only its hash is ever
+            used, to compare it to the remote tracking branch's (see
+            `tracking_branch`)
+            """
+            Commit = namedtuple('Commit', 'hexsha')
+            return Commit(hexsha=f'{self.name}-head')
+
+        def _count_left_right(self, *args):
+            """
+            patch for `git rev-list --left-right --count
+            [--max-count=<n>] <local>...<remote>` (see MockRepo.git)
+            """
+            *options, symmetric_diff_str = args
+            assert options[:2] == ['--left-right', '--count']
+            local, remote = symmetric_diff_str.split('...')
             # ensure string is formatted properly
-            assert self.name in (comparator, reference)
-            assert self.remote_branch in (comparator, reference)
-            if reference == self.name:
-                n_commits = self.n_commits_ahead
-            else:
-                n_commits = self.n_commits_behind
-            # arbitrary generated value (we only care about the number)
-            for _ in range(n_commits):
-                yield "dummy_commit_object"
+            assert local == self.name
+            assert remote == self.remote_branch
+            n_ahead, n_behind = self.n_commits_ahead, self.n_commits_behind
+            if len(options) == 3:
+                # mimic walk being cut short after max_count commits
+                max_count = int(options[2].split('=')[1])
+                n_ahead = min(n_ahead, max_count)
+                n_behind = min(n_behind, max_count - n_ahead)
+            return f"{n_ahead}\t{n_behind}"
 
         def tracking_branch(self):
             """
             patched method returns a git.refs.RemoteReference instance,
-            but since we need to access a single property of the
+            but since we need to access just two properties of the
             returned object, it's simpler to just mock it with a
             namedtuple than an entire extra internal class
             """
             if self.remote_branch == '':
                 raise AttributeError("Raised intentionally to test behavior "
                                      "with local branches not tracking a remote")
-            RemoteBranch = namedtuple('RemoteBranch', 'name')
-            return RemoteBranch(name=self.remote_branch)
+            RemoteBranch = namedtuple('RemoteBranch', ('name', 'commit'))
+            # branches point to the same commit only if they're even
+            if self.n_commits_ahead == self.n_commits_behind == 0:
+                commit = self.commit
+            else:
+                Commit = namedtuple('Commit', 'hexsha')
+                commit = Commit(hexsha=f'{self.remote_branch}-head')
+            return RemoteBranch(name=self.remote_branch, commit=commit)
 
     class MockHead:
         """
@@ -211,19 +311,30 @@ class MockSubmodule:
     """
     patch for git.objects.Submodule
 
-    Apart from the abaility to instantiate `git.Repo` object, we only
-    need to patch the `path` and `hexsha` attributes from `git.Submodule`.
-    Other attrs are used to mock behavior of submodules that are either
-    in a detached HEAD state or not yet initialized.
+    We only need to patch the `path`, `abspath` and `hexsha` attributes
+    from `git.Submodule`. Submodules' checkouts are opened as `MockRepo`s
+    from `abspath`, which mocks the behavior of submodules that are either
+    in a detached HEAD state or not yet initialized by raising errors.
     """
     def __init__(self, path, parent_path):
         self.path = path
         self._full_path = parent_path.joinpath(self.path)
+        self.abspath = str(self._full_path)
 
         config = self._load_config()
         self.hexsha = config.get('head', 'hexsha')
         self._is_detached = config.getboolean('head', 'is_detached')
         self._is_initialized = not config.getboolean('head', 'is_empty')
+        if self._is_detached:
+            MockRepo.submodule_errors[self.abspath] = TypeError(
+                "Raised intentionally to test behavior of submodules with "
+                "detached HEAD"
+            )
+        elif not self._is_initialized:
+            MockRepo.submodule_errors[self.abspath] = InvalidGitRepositoryError(
+                "Raised intentionally to test behavior of submodules that "
+                "haven't been initialized"
+            )
 
     def _load_config(self):
         config_path = self._full_path.joinpath(f"{Path(self.path).name}.cfg")
@@ -231,14 +342,3 @@ class MockSubmodule:
         with config_path.open('r') as f:
             config.read_file(f)
         return config
-
-    def module(self):
-        if self._is_detached:
-            raise TypeError("Raised intentionally to test behavior of "
-                            "submodules with detached HEAD")
-        elif not self._is_initialized:
-            raise InvalidGitRepositoryError("Raised intentionally to test "
-                                            "behavior of submodules that "
-                                            "haven't been initialized")
-        else:
-            return MockRepo(self._full_path)
@@ -95,7 +95,7 @@ def create_tracker_output(config_path, submodule=False):
                 for state in ('staged', 'not_staged', 'untracked'):
                     sm_output[0][f'files_{state}'] = None
 
-            submodules[sm_path] = sm_output
+            submodules[str(sm_path)] = sm_output
 
     expected['submodules'] = submodules
     if submodule:
@@ -0,0 +1,37 @@
+import json
+from gittracker.tracker.tracker import get_status
+from ..benchmarks.fleet import FleetSpec, generate_fleet
+from ..benchmarks.run_benchmarks import main
+
+
+def test_fleet_states(real_git, tmp_path):
+    # each generated repository's status matches what was done to it
+    spec = FleetSpec(n_repos=8, repos_per_dir=3, n_files=6, n_commits=4,
+                     frac_ahead=0.5, frac_behind=0.5, max_diverged=2,
+                     frac_dirty=0.5, n_dirty=3, frac_untracked=0.5, n_untracked=2,
+                     frac_detached=0.25, frac_submodule=0.25, seed=1)
+    fleet = generate_fleet(tmp_path, spec)
+    assert len(fleet.repos) == spec.n_repos
+    statuses = get_status([repo.path for repo in fleet.repos], verbose=2)
+    for repo in fleet.repos:
+        status = statuses[repo.path]
+        assert status['is_detached'] == repo.detached
+        if not repo.detached:
+            assert status['n_commits_ahead'] == repo.n_ahead
+            assert status['n_commits_behind'] == repo.n_behind
+        assert status['n_staged'] == repo.n_staged
+        assert status['n_not_staged'] == repo.n_not_staged
+        assert status['n_untracked'] == repo.n_untracked
+
+
+def test_run_benchmarks(real_git, tmp_path):
+    output = tmp_path.joinpath('results.json')
+    main(['--n-repos', '3', '--n-files', '4', '--n-commits', '3', '--repeat', '1',
+          '--fleet-dir', str(tmp_path.joinpath('fleet')), '--output', str(output)])
+    report = json.loads(output.read_text())
+    assert report['spec']['n_repos'] == 3
+    names = {result['name'] for result in report['results']}
+    assert names == {'get_status', 'display', 'auto_find_repos', 'validate_tracked'}
+    for result in report['results']:
+        assert len(result['times']) == 1
+        assert result['min'] <= result['median']
@@ -0,0 +1,83 @@
+import pytest
+from gittracker.tracker.cache import StatusCache, fingerprint
+from gittracker.tracker.tracker import get_status
+from ..helpers.git_helpers import clone_repo, commit_file, git, init_repo
+
+
+@pytest.fixture
+def cache_fpath(tmp_path):
+    return tmp_path.joinpath('status-cache')
+
+
+def test_fingerprint_changes(tmp_path):
+    remote = init_repo(tmp_path.joinpath('remote'))
+    repo = str(clone_repo(remote, tmp_path.joinpath('local')))
+    initial = fingerprint(repo)
+    assert fingerprint(repo) == initial
+    # new untracked file in the top-level directory
+    tmp_path.joinpath('local', 'new.txt').write_text('new\n')
+    after_new_file = fingerprint(repo)
+    assert after_new_file != initial
+    # staging a file rewrites the index
+    git(repo, 'add', 'new.txt')
+    after_add = fingerprint(repo)
+    assert after_add != after_new_file
+    # fetching new remote commits updates the upstream ref
+    commit_file(remote, 'remote.txt', 'x\n')
+    git(repo, 'fetch', '-q')
+    after_fetch = fingerprint(repo)
+    assert after_fetch != after_add
+    # editing a tracked file in a subdirectory (which changes none of the
+    # stat info above)
+    commit_file(tmp_path.joinpath('local'), 'sub/tracked.txt', 'x\n')
+    after_commit = fingerprint(repo)
+    tmp_path.joinpath('local', 'sub', 'tracked.txt').write_text('edited\n')
+    assert fingerprint(repo) != after_commit
+
+
+def test_cache_hits_and_misses(tmp_path, real_git, cache_fpath):
+    repos = [str(init_repo(tmp_path.joinpath(f'repo{i}'))) for i in range(3)]
+    cache = StatusCache(cache_fpath)
+    first = get_status(repos, 3, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.save()
+
+    # change one repository between runs
+    commit_file(tmp_path.joinpath('repo1'), 'another.txt', 'y\n')
+    tmp_path.joinpath('repo1', 'untracked.txt').write_text('z\n')
+    cache = StatusCache(cache_fpath)
+    second = get_status(repos, 3, cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert second[repos[0]] == first[repos[0]]
+    assert second[repos[1]]['files_untracked'] == ['untracked.txt']
+    cache.save()
+
+    # statuses collected with different options aren't reused
+    cache = StatusCache(cache_fpath)
+    get_status(repos, 2, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_uncacheable_repo(tmp_path, real_git, cache_fpath):
+    # with a gitlink (e.g., a submodule) in the index, unstaged changes
+    # can't be found without git, so edits to tracked files in
+    # subdirectories wouldn't change the fingerprint
+    repo_path = init_repo(tmp_path.joinpath('repo'))
+    commit_file(repo_path, 'sub/b.txt', 'b\n')
+    head_sha = git(repo_path, 'rev-parse', 'HEAD').strip()
+    git(repo_path, 'update-index', '--add', '--cacheinfo', f'160000,{head_sha},module')
+    git(repo_path, 'commit', '-q', '-m', 'add gitlink')
+    repo = str(repo_path)
+    with pytest.raises(OSError):
+        fingerprint(repo)
+    cache = StatusCache(cache_fpath)
+    before = get_status([repo], cache=cache)[repo]['n_not_staged']
+    repo_path.joinpath('sub', 'b.txt').write_text('edited\n')
+    assert get_status([repo], cache=cache)[repo]['n_not_staged'] == before + 1
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_corrupt_cache_ignored(cache_fpath):
+    cache_fpath.write_bytes(b'not a pickle')
+    cache = StatusCache(cache_fpath)
+    assert cache.get('/some/repo', ('fingerprint',), ('options',)) is None
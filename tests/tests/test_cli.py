@@ -1,11 +1,23 @@
 # tests for command line interface
+import re
 import shlex
+import sys
 from os import listdir
 from os.path import isdir
 from pathlib import Path
 from subprocess import PIPE, run
 from gittracker import __version__ as init_version
 from gittracker.parsers.subcommands import SUBCOMMANDS
+from ..helpers.cli_helpers import run_redirected
+
+# modules that commands which don't collect statuses should never import
+HEAVY_MODULES = ('git', 'tqdm', 'concurrent.futures', 'logging')
+# import time budget for those commands, as a multiple of the time it
+# takes a fresh interpreter on the same machine to import a baseline set
+# of standard library modules (so the budget doesn't depend on how fast
+# the machine is). Currently ~2.5-3.5x; importing GitPython alone is ~15x
+STARTUP_BUDGET_RATIO = 6
+BASELINE_MODULES = ('json', 'argparse', 'sqlite3')
 
 
 def run_command(cmd):
@@ -81,3 +93,64 @@ def test_log_dir():
     assert isdir(log_dir), f"logfile directory doesn't exist, expected at: {log_dir}"
     assert 'logfile' in listdir(log_dir), "missing logfile"
     assert 'tracked-repos' in listdir(log_dir), "missing tracked repositories file"
+
+
+def _parse_import_times(stderr):
+    # [(module, cumulative import time (us), nesting depth)] from
+    # `-X importtime` output
+    times = []
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)', line)
+        if match is not None:
+            cumulative, indent, module = match.groups()
+            times.append((module, int(cumulative), len(indent)))
+    return times
+
+
+def _import_times(log_dir, args, stdin):
+    # runs `gittracker` with `-X importtime` and returns {module:
+    # cumulative import time (us)} for top-level imports from the package
+    # onward
+    result = run_redirected(log_dir, args, stdin=stdin,
+                            python_args=('-X', 'importtime'))
+    times = {}
+    for module, cumulative, depth in _parse_import_times(result.stderr):
+        if times or module.startswith('gittracker'):
+            times[module] = (cumulative, depth)
+    return times
+
+
+def _baseline_import_time():
+    # cumulative import time (us) of `BASELINE_MODULES` in a fresh
+    # interpreter
+    result = run([sys.executable, '-X', 'importtime', '-c',
+                  f"import {', '.join(BASELINE_MODULES)}"],
+                 stdout=PIPE, stderr=PIPE, encoding='UTF-8')
+    return sum(cumulative
+               for module, cumulative, depth in _parse_import_times(result.stderr)
+               if depth == 0 and module in BASELINE_MODULES)
+
+
+def test_startup_imports(tmp_path):
+    # commands that don't collect statuses don't import GitPython etc.,
+    # and start up within the budget (best of 3 runs, to allow for noise)
+    log_dir = tmp_path.joinpath('log')
+    log_dir.mkdir()
+    not_a_repo = str(tmp_path)
+    baseline = min(_baseline_import_time() for _ in range(3))
+    for args, stdin in [(['--version'], ''),
+                        (['ls', '-q'], 'q\n'),
+                        (['add', not_a_repo], 'n\n'),
+                        (['rm', not_a_repo], '')]:
+        totals = []
+        for _ in range(3):
+            times = _import_times(log_dir, args, stdin)
+            assert 'gittracker.command' in times, args
+            for heavy in HEAVY_MODULES:
+                assert heavy not in times, f"`gittracker {args[0]}` imports {heavy}"
+            totals.append(sum(t for t, depth in times.values() if depth == 0))
+        assert min(totals) <= STARTUP_BUDGET_RATIO * baseline, \
+            f"`gittracker {args[0]}` imports took {min(totals)}us " \
+            f"(baseline: {baseline}us)"
+    # the real log directory was left alone
+    assert 'tracked-repos.db' in listdir(log_dir)
@@ -0,0 +1,168 @@
+import pickle
+import stat
+from errno import ENOSPC
+import threading
+import time
+import pytest
+from gittracker.daemon.client import (PROTOCOL_VERSION, daemon_status, decode_response,
+                                      encode_response, request_daemon)
+from gittracker.daemon.daemon import StatusDaemon
+from gittracker.daemon.inotify import Inotify, InotifyUnavailable
+from gittracker.tracker.counts import CommitCount
+from gittracker.tracker.tracker import get_status
+from ..helpers.git_helpers import clone_repo, commit_file, init_repo
+
+
+@pytest.fixture
+def run_daemon(tmp_path, monkeypatch, real_git):
+    # starts a daemon tracking the given repos in a background thread,
+    # serving on a temporary socket
+    socket_path = tmp_path.joinpath('daemon.sock')
+    threads = []
+
+    def _run_daemon(repo_paths, **kwargs):
+        monkeypatch.setattr('gittracker.daemon.daemon.load_tracked_repos',
+                            lambda init_on_fail=False: list(repo_paths))
+        daemon = StatusDaemon(socket_path=socket_path, debounce=0.05,
+                              poll_interval=0.05, **kwargs)
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        threads.append(thread)
+        assert wait_for(lambda: request_daemon('status', socket_path) is not None)
+        return lambda *args, **kwargs: daemon_status(*args, socket_path=socket_path,
+                                                     **kwargs)
+
+    yield _run_daemon
+    for thread in threads:
+        request_daemon('stop', socket_path)
+        thread.join(timeout=5)
+
+
+def wait_for(condition, timeout=10):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def watching_daemon(tmp_path):
+    # a daemon that isn't serving, for checking what it watches
+    daemon = StatusDaemon(socket_path=tmp_path.joinpath('daemon.sock'))
+    if daemon.inotify is None:
+        pytest.skip("inotify isn't available on this platform")
+    yield daemon
+    daemon.inotify.close()
+
+
+def test_inotify_events(tmp_path):
+    try:
+        inotify = Inotify()
+    except InotifyUnavailable:
+        pytest.skip("inotify isn't available on this platform")
+    try:
+        wd = inotify.add_watch(str(tmp_path))
+        tmp_path.joinpath('new.txt').write_text('new\n')
+        events = inotify.read_events()
+        assert events and all(event[0] == wd for event in events)
+        assert 'new.txt' in {event[2] for event in events}
+        assert inotify.read_events() == []
+    finally:
+        inotify.close()
+
+
+def test_daemon_serves_statuses(tmp_path, run_daemon):
+    remote = init_repo(tmp_path.joinpath('remote'))
+    repos = [str(clone_repo(remote, tmp_path.joinpath(f'local{i}')))
+             for i in range(2)]
+    daemon_status = run_daemon(repos)
+    for verbose in (1, 2, 3):
+        assert daemon_status(repos, verbose) == get_status(repos, verbose)
+    # changes are picked up without a request from the client
+    tmp_path.joinpath('local0', 'new.txt').write_text('new\n')
+    commit_file(tmp_path.joinpath('local1'), 'committed.txt', 'x\n')
+    expected = get_status(repos, 3)
+    assert expected[repos[0]]['n_untracked'] == 1
+    assert expected[repos[1]]['n_commits_ahead'] == 1
+    assert wait_for(lambda: daemon_status(repos, 3) == expected)
+
+
+def test_socket_permissions(tmp_path, run_daemon):
+    # only the daemon's owner can connect
+    run_daemon([str(init_repo(tmp_path.joinpath('repo')))])
+    assert stat.S_IMODE(tmp_path.joinpath('daemon.sock').stat().st_mode) & 0o077 == 0
+
+
+def test_daemon_incompatible_options(tmp_path, run_daemon):
+    # clients fall back to collecting statuses directly when the daemon
+    # can't provide them as requested
+    repo = str(init_repo(tmp_path.joinpath('repo')))
+    daemon_status = run_daemon([repo], max_count=10)
+    assert daemon_status([repo], 2, max_count=10) is not None
+    assert daemon_status([repo], 2) is None
+    assert daemon_status([repo], 2, follow_submodules=1, max_count=10) is None
+    assert daemon_status([repo, str(tmp_path)], 2, max_count=10) is None
+
+
+def test_no_daemon_running(tmp_path):
+    socket_path = tmp_path.joinpath('daemon.sock')
+    assert daemon_status(['/not/a/repo'], socket_path=socket_path) is None
+    # stale socket file left behind by a daemon that was killed
+    socket_path.touch()
+    assert daemon_status(['/not/a/repo'], socket_path=socket_path) is None
+
+
+def test_response_encoding(mock_repo):
+    # statuses are sent as JSON, and decoded to the same types returned by
+    # `get_status`
+    repos = [mock_repo(f'{name}.cfg') for name in ('even-dirty', 'submodule-multiple')]
+    statuses = get_status(repos, 3, 1)
+    statuses[repos[0]]['n_commits_ahead'] = CommitCount(10, truncated=True)
+    response = {'version': PROTOCOL_VERSION, 'statuses': statuses}
+    data = encode_response(response)
+    decoded = decode_response(data)
+    assert decoded['statuses'] == statuses
+    count = decoded['statuses'][repos[0]]['n_commits_ahead']
+    assert count.truncated and str(count) == '10+'
+    # anything else (e.g., a pickle) is rejected rather than loaded
+    with pytest.raises(ValueError):
+        decode_response(pickle.dumps(response))
+
+
+def test_ignored_dirs_unwatched(tmp_path, watching_daemon):
+    repo = init_repo(tmp_path.joinpath('repo'))
+    commit_file(repo, '.gitignore', 'node_modules/\nbuild/\n')
+    for directory in ('src', 'node_modules/pkg', 'src/build'):
+        repo.joinpath(directory).mkdir(parents=True)
+    watching_daemon._watch_repo(str(repo))
+    watched = {directory for _, directory, _ in watching_daemon._watches.values()}
+    assert str(repo.joinpath('src')) in watched
+    assert not any('node_modules' in d or 'build' in d for d in watched)
+    # new ignored directories aren't watched (or refreshed for) either
+    repo.joinpath('src', 'build', 'out').mkdir()
+    repo.joinpath('build').mkdir()
+    watching_daemon._handle_events()
+    assert watching_daemon._dirty == {}
+    repo.joinpath('lib').mkdir()
+    watching_daemon._handle_events()
+    assert str(repo) in watching_daemon._dirty
+    watched = {directory for _, directory, _ in watching_daemon._watches.values()}
+    assert str(repo.joinpath('lib')) in watched
+
+
+def test_watch_limit(tmp_path, watching_daemon, monkeypatch):
+    # once the watch limit is reached, repositories are polled instead
+    repos = [str(init_repo(tmp_path.joinpath(f'repo{i}'))) for i in range(2)]
+
+    def _add_watch(path, *args):
+        raise OSError(ENOSPC, 'No space left on device', path)
+
+    monkeypatch.setattr(watching_daemon.inotify, 'add_watch', _add_watch)
+    watching_daemon._watch_repo(repos[0])
+    assert watching_daemon._watch_limit_hit
+    monkeypatch.setattr(watching_daemon.inotify, 'add_watch', None)
+    watching_daemon._watch_repo(repos[1])
+    assert set(watching_daemon._polled) == set(repos)
+    assert watching_daemon._watches == {}
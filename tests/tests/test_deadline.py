@@ -0,0 +1,145 @@
+from threading import Event
+from time import monotonic
+import pytest
+from git import GitCommandError
+from gittracker.repofile.store import RepoStore
+from gittracker.display.display import Displayer
+from gittracker.tracker import tracker
+from gittracker.tracker.cache import StatusCache
+from gittracker.tracker.deadline import Job, TimedRepo
+from gittracker.tracker.status import SUBMODULE_TIMED_OUT_MSG
+from gittracker.tracker.tracker import get_status
+from ..helpers.cli_helpers import run_redirected
+from ..helpers.git_helpers import git, init_repo
+
+# time limit for hung repositories in these tests (seconds)
+LIMIT = 0.3
+# makes checking the repository named "hung" block for far longer than
+# any test should take, in a `run_redirected` subprocess
+HANG_SETUP = """\
+from time import sleep
+from gittracker.tracker import tracker
+index_unstaged_changes = tracker.index_unstaged_changes
+def _index_unstaged_changes(working_dir):
+    if working_dir.endswith('hung'):
+        sleep(60)
+    return index_unstaged_changes(working_dir)
+tracker.index_unstaged_changes = _index_unstaged_changes
+"""
+
+
+@pytest.fixture
+def hung_repos(tmp_path, real_git, monkeypatch):
+    # real repositories, where once `hang` is set, checking the one named
+    # "hung" blocks (as if on an unresponsive filesystem) until the test
+    # ends
+    repos = [str(init_repo(tmp_path.joinpath(name)))
+             for name in ('hung', 'a', 'b')]
+    hang = Event()
+    release = Event()
+    index_unstaged_changes = tracker.index_unstaged_changes
+
+    def _index_unstaged_changes(working_dir):
+        if hang.is_set() and working_dir.endswith('hung'):
+            release.wait(10)
+        return index_unstaged_changes(working_dir)
+
+    monkeypatch.setattr(tracker, 'index_unstaged_changes', _index_unstaged_changes)
+    yield repos, hang
+    release.set()
+
+
+# with a per-repository timeout, even a single worker can't get stuck
+# behind the hung repository
+@pytest.mark.parametrize('limit, jobs', [('timeout', 1), ('deadline', None)])
+def test_partial_results(hung_repos, limit, jobs):
+    repos, hang = hung_repos
+    hang.set()
+    hung, *others = repos
+    start = monotonic()
+    statuses = get_status(repos, jobs=jobs, **{limit: LIMIT})
+    assert monotonic() - start < LIMIT + 1
+    assert statuses[hung]['timed_out']
+    assert statuses[hung]['local_branch'] is None
+    for path in others:
+        assert not statuses[path]['timed_out']
+        assert statuses[path]['local_branch'] == 'master'
+
+
+def test_stale_status(hung_repos, tmp_path):
+    repos, hang = hung_repos
+    hung = repos[0]
+    cache = StatusCache(fpath=None)
+    # the repository's status is cached before it hangs...
+    get_status(repos, cache=cache)
+    hang.set()
+    # ...then it changes, so the cached status is no longer valid
+    tmp_path.joinpath('hung', 'new.txt').write_text('new\n')
+    statuses = get_status(repos, cache=cache, timeout=LIMIT)
+    assert statuses[hung]['timed_out']
+    assert statuses[hung]['local_branch'] == 'master'
+    assert statuses[hung]['n_untracked'] == 0
+    # the cached status itself isn't marked
+    assert not cache.last(hung, (2, 0, 'gitpython', None, False))['timed_out']
+    displayer = Displayer(statuses, plain=True)
+    displayer.format_status_display()
+    assert 'hung (timed out, showing last known status)' in displayer.full_template
+    assert '2 up-to-date, 1 with changes' in displayer.full_template
+
+
+def test_cli_exits(tmp_path):
+    # the process doesn't wait for the worker stuck on the hung repository
+    # before exiting
+    repos = [str(init_repo(tmp_path.joinpath(name))) for name in ('hung', 'a')]
+    log_dir = tmp_path.joinpath('log')
+    log_dir.mkdir()
+    store = RepoStore(log_dir.joinpath('tracked-repos.db'),
+                      log_dir.joinpath('tracked-repos'))
+    store.add(repos)
+    start = monotonic()
+    result = run_redirected(log_dir,
+                            ['status', '--timeout', str(LIMIT), '--no-daemon', '--plain'],
+                            setup=HANG_SETUP,
+                            timeout=30)
+    assert monotonic() - start < 10
+    assert result.returncode == 0, result.stderr
+    assert 'hung (timed out' in result.stdout
+
+
+def test_submodule_git_killed(tmp_path, real_git, monkeypatch):
+    # submodules' git subprocesses are killed when their jobs run out of
+    # time, too
+    sm_remote = init_repo(tmp_path.joinpath('sm-remote'))
+    repo = init_repo(tmp_path.joinpath('repo'))
+    git(repo, 'submodule', '-q', 'add', str(sm_remote), 'sm')
+    git(repo, 'commit', '-q', '-m', 'add submodule')
+    killed = Event()
+    single_repo_status = tracker._single_repo_status
+
+    def _single_repo_status(repo, verbose, follow_submodules, max_count=None):
+        if repo.working_dir.endswith('sm'):
+            try:
+                repo.git.execute(['sleep', '10'])
+            except GitCommandError:
+                killed.set()
+                raise
+        return single_repo_status(repo, verbose, follow_submodules, max_count)
+
+    monkeypatch.setattr(tracker, '_single_repo_status', _single_repo_status)
+    status = get_status([str(repo)], follow_submodules=1, timeout=LIMIT)[str(repo)]
+    assert status['submodules'] == {'sm': (None, SUBMODULE_TIMED_OUT_MSG)}
+    assert killed.wait(1)
+
+
+def test_git_killed(tmp_path):
+    repo = TimedRepo(init_repo(tmp_path.joinpath('repo')))
+    # commands run to completion are killed after the job's time limit...
+    start = monotonic()
+    with pytest.raises(GitCommandError):
+        Job(timeout=LIMIT).run(repo.git.execute, ['sleep', '10'])
+    assert monotonic() - start < LIMIT + 1
+    # ...and commands read from as they run are killed when it expires
+    job = Job(timeout=LIMIT)
+    proc = job.run(repo.git.execute, ['sleep', '10'], as_process=True)
+    job.expire()
+    assert proc.proc.wait(timeout=1) != 0
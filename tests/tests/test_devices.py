@@ -0,0 +1,92 @@
+import os
+from threading import Lock
+from time import sleep
+import pytest
+from gittracker.tracker import devices, tracker
+from gittracker.tracker.devices import DeviceLimiter, device_id
+from gittracker.tracker.durations import DurationLog
+from gittracker.tracker.tracker import get_status
+
+REPO_NAMES = ['commits-ahead', 'commits-behind', 'even-clean', 'even-dirty']
+
+
+@pytest.fixture
+def fake_devices(monkeypatch):
+    # repositories' devices are named by the first letter of their path
+    monkeypatch.setattr(devices, 'device_id', lambda path: path[1])
+    monkeypatch.setattr(devices, 'default_device_limit',
+                        lambda dev: 2 if dev == 's' else None)
+
+
+def test_device_id(tmp_path):
+    assert device_id(str(tmp_path)) == os.stat(tmp_path).st_dev
+
+
+def test_per_device_limits(fake_devices):
+    limiter = DeviceLimiter(8, device_jobs=2)
+    for path in ['/a1', '/a2', '/b1', '/a3', '/b2', '/b3']:
+        limiter.add(path)
+    # at most 2 per device, in the order added
+    assert limiter.ready() == ['/a1', '/a2', '/b1', '/b2']
+    assert limiter.ready() == []
+    limiter.done('/a2')
+    assert limiter.ready() == ['/a3']
+    assert limiter.pending() == ['/b3']
+
+
+def test_limit_tuning(fake_devices):
+    durations = DurationLog(fpath=None)
+    paths = [f'/s{i}' for i in range(20)]
+    for path in paths:
+        durations.record(path, 1.0)
+    limiter = DeviceLimiter(8, durations=durations)
+    for path in paths:
+        limiter.add(path)
+    device = limiter.devices['s']
+
+    def _finish(seconds):
+        for path in limiter.ready():
+            durations.record(path, seconds)
+            limiter.done(path)
+
+    # starts out at the default for the device's type, and doubles while
+    # repositories take as long as usual...
+    assert device.limit == 2
+    _finish(1.0)
+    assert device.limit == 4
+    # ...is halved when they slow down...
+    _finish(3.0)
+    assert device.limit == 2
+    # ...then grows 1 at a time, up to the number of workers
+    _finish(1.0)
+    assert device.limit == 3
+    # timeouts count as slowdowns
+    for path in limiter.ready():
+        limiter.done(path, timed_out=True)
+    assert device.limit == 1
+
+
+def test_get_status_device_jobs(mock_repo, monkeypatch):
+    # mock repositories are all on the same device
+    repos = [mock_repo(f'{name}.cfg') for name in REPO_NAMES]
+    lock = Lock()
+    running = []
+    max_running = 0
+    collect_status = tracker._collect_status
+
+    def _collect_status(path, **kwargs):
+        nonlocal max_running
+        with lock:
+            running.append(path)
+            max_running = max(max_running, len(running))
+        sleep(0.05)
+        try:
+            return collect_status(path, **kwargs)
+        finally:
+            with lock:
+                running.remove(path)
+
+    monkeypatch.setattr(tracker, '_collect_status', _collect_status)
+    statuses = get_status(repos, jobs=4, device_jobs=1)
+    assert list(statuses) == repos
+    assert max_running == 1
@@ -1,6 +1,43 @@
-# from gittracker.display.display import Displayer
+from gittracker.display.display import Displayer
 # from gittracker.display.templates import ANSI_SEQS, REPO_TEMPLATES
+from gittracker.tracker.tracker import get_status, iter_status
 
 
 def test_verbose_template_assignment():
     assert True
+
+
+def test_stream_display(mock_repo, verbosity, tmp_path):
+    # streamed output contains the same repository info and summary as
+    # buffered output, in the order repositories finish
+    repo_names = ['even-clean', 'even-dirty', 'commits-ahead',
+                  'head-detached-ahead-dirty']
+    repos = [mock_repo(f'{name}.cfg') for name in repo_names]
+    buffered_fpath = tmp_path.joinpath('buffered.txt')
+    displayer = Displayer(get_status(repos, verbosity), verbose=verbosity,
+                          outfile=buffered_fpath)
+    displayer.format_status_display()
+    displayer.display()
+    streamed_fpath = tmp_path.joinpath('streamed.txt')
+    streamed_repos = []
+
+    def _statuses():
+        for path, status in iter_status(repos, verbosity, jobs=2):
+            streamed_repos.append(path)
+            yield path, status
+
+    Displayer(_statuses(), verbose=verbosity,
+              outfile=streamed_fpath).stream_display()
+    assert sorted(streamed_repos) == sorted(repos)
+    buffered = buffered_fpath.read_text()
+    streamed = streamed_fpath.read_text()
+    summary = '4 tracked repositories: 1 up-to-date, 3 with changes'
+    assert summary in buffered
+    assert streamed.rstrip().endswith(summary)
+    # each repository's section is identical
+    sep = Displayer({}, verbose=verbosity).repo_display_sep
+    line_sep = '=' * displayer.display_width
+    buffered_repos = buffered.split(line_sep)[1].strip('\n').split(sep)
+    streamed_repos_fmt = streamed.split(line_sep)[1].strip('\n').split(sep)
+    assert sorted(buffered_repos) == sorted(streamed_repos_fmt)
+    assert len(buffered_repos) == len(repos)
@@ -0,0 +1,58 @@
+from threading import Lock
+import pytest
+from gittracker.tracker import tracker
+from gittracker.tracker.durations import DurationLog
+from gittracker.tracker.tracker import get_status
+
+REPO_NAMES = ['commits-ahead', 'commits-behind', 'even-clean', 'even-dirty',
+              'no-remote-clean', 'no-remote-dirty']
+
+
+@pytest.fixture
+def durations_fpath(tmp_path):
+    return tmp_path.joinpath('status-durations')
+
+
+def test_longest_first(durations_fpath):
+    durations = DurationLog(durations_fpath)
+    durations.record('/a', 1.0)
+    durations.record('/b', 3.0)
+    durations.record('/c', 2.0)
+    # running average of observed durations
+    durations.record('/c', 4.0)
+    assert durations.get('/c') == 3.0
+    # never-timed repositories first, then longest to shortest (ties
+    # keep their original order)
+    assert durations.order(['/a', '/b', '/new', '/c']) == ['/new', '/b', '/c', '/a']
+    durations.save()
+    # durations persist across runs, except those of repositories that
+    # weren't scheduled
+    reloaded = DurationLog(durations_fpath)
+    assert reloaded.get('/b') == 3.0
+    assert reloaded.order(['/a', '/b']) == ['/b', '/a']
+    reloaded.save()
+    assert DurationLog(durations_fpath).get('/c') is None
+
+
+def test_get_status_schedules_slowest_first(mock_repo, monkeypatch):
+    repos = [mock_repo(f'{name}.cfg') for name in REPO_NAMES]
+    durations = DurationLog(fpath=None)
+    for i, path in enumerate(repos):
+        durations.record(path, float(i))
+    started = []
+    lock = Lock()
+    collect_status = tracker._collect_status
+
+    def _collect_status(path, **kwargs):
+        with lock:
+            started.append(path)
+        return collect_status(path, **kwargs)
+
+    monkeypatch.setattr(tracker, '_collect_status', _collect_status)
+    statuses = get_status(repos, jobs=2, durations=durations)
+    # the 2 slowest repositories are started first...
+    assert set(started[:2]) == set(repos[-2:])
+    # ...but statuses are returned in the tracked order
+    assert list(statuses) == repos
+    # and each repository's new duration is recorded
+    assert all(durations.get(path) != i for i, path in enumerate(repos))
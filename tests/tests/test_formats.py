@@ -0,0 +1,96 @@
+import csv
+import json
+import pytest
+from gittracker import gittracker
+from gittracker.display.formats import CSV_FIELDS, status_record, write_records
+from gittracker.tracker.counts import CommitCount
+from gittracker.tracker.durations import DurationLog
+from gittracker.tracker.status import STATUS_FIELDS, is_clean
+from gittracker.tracker.tracker import get_status
+
+REPO_NAMES = ['even-clean', 'even-dirty', 'head-detached-ahead-dirty',
+              'submodule-multiple']
+
+
+@pytest.fixture
+def statuses(mock_repo):
+    repos = [mock_repo(f'{name}.cfg') for name in REPO_NAMES]
+    return get_status(repos, 3, 1)
+
+
+def _roundtrip(record):
+    # tuples (e.g., changed files) come back from JSON as lists
+    return json.loads(json.dumps(record))
+
+
+@pytest.mark.parametrize('fmt', ['json', 'ndjson'])
+def test_json_formats(statuses, tmp_path, fmt):
+    outfile = tmp_path.joinpath(f'status.{fmt}')
+    assert write_records(statuses, fmt, outfile=outfile) == len(statuses)
+    text = outfile.read_text()
+    if fmt == 'json':
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines()]
+    assert records == [_roundtrip(status_record(p, s)) for p, s in statuses.items()]
+    for record, (path, status) in zip(records, statuses.items()):
+        assert record['path'] == path
+        assert record['is_clean'] == is_clean(status)
+        assert list(record)[3:] == list(STATUS_FIELDS)
+    submodules = records[-1]['submodules']
+    assert submodules and all(set(sm) == {'path', 'message', 'status'} for sm in submodules)
+
+
+def test_csv_format(statuses, tmp_path):
+    outfile = tmp_path.joinpath('status.csv')
+    # also accepts (path, status) tuples, e.g., from `iter_status`
+    write_records(iter(statuses.items()), 'csv', outfile=outfile)
+    with open(outfile, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['path'] for row in rows] == list(statuses)
+    assert list(rows[0]) == list(CSV_FIELDS)
+    for row, status in zip(rows, statuses.values()):
+        assert row['is_clean'] == str(is_clean(status))
+        assert row['n_staged'] == str(status['n_staged'])
+        submodules = status['submodules']
+        assert row['n_submodules'] == ('' if submodules is None else str(len(submodules)))
+
+
+def test_truncated_counts(statuses, tmp_path):
+    # counts cut short by `max_count` are plain numbers in every format,
+    # flagged by "commits_truncated"
+    truncated, exact = list(statuses)[:2]
+    statuses[truncated]['n_commits_ahead'] = CommitCount(5, truncated=True)
+    statuses[truncated]['n_commits_behind'] = CommitCount(0)
+    statuses[exact]['n_commits_ahead'] = CommitCount(5)
+    json_out = tmp_path.joinpath('status.json')
+    csv_out = tmp_path.joinpath('status.csv')
+    write_records(statuses, 'json', outfile=json_out)
+    write_records(statuses, 'csv', outfile=csv_out)
+    records = json.loads(json_out.read_text())
+    with open(csv_out, newline='') as f:
+        rows = list(csv.DictReader(f))
+    for record, row, expected in zip(records, rows, (True, False)):
+        assert record['n_commits_ahead'] == 5 and row['n_commits_ahead'] == '5'
+        assert record['commits_truncated'] is expected
+        assert row['commits_truncated'] == str(expected)
+
+
+def test_bad_format(statuses):
+    with pytest.raises(ValueError):
+        write_records(statuses, 'xml')
+
+
+def test_quiet_json(mock_repo, tmp_path, monkeypatch):
+    # `-q` doesn't switch machine-readable formats to quick mode, whose
+    # counts are only true/false
+    repos = [mock_repo(f'{name}.cfg') for name in REPO_NAMES]
+    monkeypatch.setattr(gittracker, 'validate_tracked', lambda: None)
+    monkeypatch.setattr(gittracker, 'load_tracked_repos', lambda: repos)
+    monkeypatch.setattr(gittracker, 'DurationLog', lambda: DurationLog(fpath=None))
+    outfile = tmp_path.joinpath('status.json')
+    gittracker.track(verbose=1, fmt='json', outfile=str(outfile),
+                     use_cache=False, use_daemon=False)
+    records = json.loads(outfile.read_text())
+    expected = get_status(repos, 1)
+    assert records == [_roundtrip(status_record(p, s)) for p, s in expected.items()]
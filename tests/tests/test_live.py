@@ -0,0 +1,97 @@
+import os
+import re
+from io import StringIO
+import pytest
+from gittracker import gittracker
+from gittracker.display.live import LiveScreen, _clip
+from gittracker.tracker.cache import StatusCache
+from ..helpers.git_helpers import init_repo
+
+# cursor-positioning sequence written before each redrawn row
+ROW_RE = re.compile(r'\033\[(\d+);1H\033\[2K')
+
+
+@pytest.fixture
+def terminal_size(monkeypatch):
+    size = os.terminal_size((20, 10))
+    monkeypatch.setattr('gittracker.display.live.get_terminal_size', lambda: size)
+    return size
+
+
+def _redrawn_rows(output):
+    return [int(row) for row in ROW_RE.findall(output)]
+
+
+def test_differential_redraw(terminal_size):
+    out = StringIO()
+    screen = LiveScreen(out)
+    assert screen.render('a\nb\nc') == 3
+    assert '\033[2J' in out.getvalue()
+    out.seek(0)
+    out.truncate()
+    # only changed rows are rewritten, without clearing the screen
+    assert screen.render('a\nB\nc') == 1
+    assert _redrawn_rows(out.getvalue()) == [2]
+    assert '\033[2J' not in out.getvalue()
+    out.seek(0)
+    out.truncate()
+    # rows left over from a longer frame are erased
+    assert screen.render('a') == 0
+    assert out.getvalue().endswith('\033[2;1H\033[J')
+    # lines never wrap or scroll the screen
+    screen.render('\n'.join('x' * 30 for _ in range(20)))
+    assert len(screen.lines) == terminal_size.lines - 1
+    assert all(line == 'x' * terminal_size.columns + '\033[0m' for line in screen.lines)
+
+
+def test_clip():
+    red = '\033[31m'
+    # escape sequences don't take up columns
+    assert _clip(f'{red}abc\033[0m', 3) == f'{red}abc\033[0m'
+    assert _clip(f'{red}abcdef', 4) == f'{red}abcd\033[0m'
+    assert _clip('a\tb', 20) == 'a' + ' ' * 7 + 'b'
+    assert _clip('a\tb', 5) == 'a    \033[0m'
+
+
+def test_watch(tmp_path, real_git, monkeypatch, capsys):
+    # each refresh only re-checks repositories that changed, and only
+    # redraws the lines that changed
+    repos = [str(init_repo(tmp_path.joinpath(name))) for name in ('a', 'b')]
+    monkeypatch.setattr(gittracker, 'load_tracked_repos', lambda init_on_fail: repos)
+    monkeypatch.setattr(gittracker, 'strftime', lambda fmt: 'TIME')
+    frames = []
+
+    class _RecordingScreen(LiveScreen):
+        def render(self, text):
+            frames.append((text, super().render(text)))
+            if len(frames) == 2:
+                # change one repository before the next refresh
+                tmp_path.joinpath('b', 'untracked.txt').write_text('new\n')
+            elif len(frames) == 3:
+                raise KeyboardInterrupt
+
+    monkeypatch.setattr(gittracker, 'LiveScreen', _RecordingScreen)
+    monkeypatch.setattr(gittracker, 'sleep', lambda seconds: None)
+    # tall enough that no logo pushes the summary off the bottom
+    size = os.terminal_size((200, 100))
+    monkeypatch.setattr('gittracker.display.live.get_terminal_size', lambda: size)
+    cache = StatusCache(fpath=None)
+    status_kwargs = dict(verbose=2, follow_submodules=0, jobs=None,
+                         backend='gitpython', max_count=None, quick=False,
+                         profiler=None)
+    gittracker._watch(1, True, False, cache, status_kwargs)
+    (first, n_first), (second, n_second), (third, n_third) = frames
+    assert '(2 refreshed)' in first
+    assert '(0 refreshed)' in second and n_second == 1
+    # header, summary, and the changed repository's line
+    assert '(1 refreshed)' in third and n_third == 3
+    # the screen is cleared once, and the cursor restored at the end
+    output = capsys.readouterr().out
+    assert output.count('\033[2J') == 1
+    assert output.endswith('\033[?25h')
+
+
+def test_watch_submodules():
+    # submodules' states aren't part of the fingerprints `--watch` relies on
+    with pytest.raises(SystemExit, match='--submodules'):
+        gittracker.track(verbose=2, submodules=1, watch=1)
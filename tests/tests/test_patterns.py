@@ -0,0 +1,31 @@
+import pytest
+from gittracker.repofile.patterns import IgnorePatterns
+
+
+@pytest.mark.parametrize('pattern,ignored,not_ignored', [
+    ('node_modules', ['node_modules', 'a/b/node_modules'], ['node_modules2', 'a/node']),
+    ('build/', ['build', 'src/build'], ['builds']),
+    ('*.egg-info', ['pkg.egg-info', 'a/pkg.egg-info'], ['egg-info/a']),
+    ('/vendor', ['vendor'], ['a/vendor']),
+    ('a/b', ['a/b'], ['x/a/b', 'a/b/c']),
+    ('**/vendor/**', ['vendor/x', 'a/vendor/x/y'], ['vendor', 'a/vendor']),
+    ('a/**/c', ['a/c', 'a/b/c', 'a/b/b/c'], ['a/b', 'x/a/c']),
+    ('ca?he', ['cache', 'x/cashe'], ['caache']),
+    ('[._]venv', ['.venv', 'a/_venv'], ['venv', '-venv']),
+    ('tmp[!0-9]', ['tmpa'], ['tmp1']),
+])
+def test_patterns(pattern, ignored, not_ignored):
+    patterns = IgnorePatterns([pattern])
+    assert all(patterns.is_ignored(p) for p in ignored)
+    assert not any(patterns.is_ignored(p) for p in not_ignored)
+
+
+def test_negation_and_file(tmp_path):
+    fpath = tmp_path.joinpath('find-ignore')
+    fpath.write_text('# comment\n\nbuild*\n!build-keep\n')
+    # later patterns (e.g., from the command line) take precedence
+    patterns = IgnorePatterns.from_file(fpath, extra_patterns=['build-keep/old'])
+    assert patterns.is_ignored('build') and patterns.is_ignored('a/builds')
+    assert not patterns.is_ignored('build-keep')
+    assert patterns.is_ignored('build-keep/old')
+    assert not IgnorePatterns.from_file(tmp_path.joinpath('missing'))
@@ -0,0 +1,122 @@
+from gittracker.tracker.counts import parse_rev_list_count
+from gittracker.tracker.porcelain import parse_porcelain_v2
+from gittracker.tracker.tracker import get_status
+from ..helpers.git_helpers import clone_repo, commit_file, git, init_repo
+
+
+SHA = '72912c7442c84c978100248cb528179898d2a268'
+MODE_SHA_FIELDS = f'100644 100644 100644 {SHA} {SHA}'
+
+
+def _sorted_files(status):
+    for field in ('files_staged', 'files_not_staged', 'files_untracked'):
+        status[field] = sorted(status[field])
+    return status
+
+
+def test_parse_branch_and_changes():
+    output = '\0'.join([
+        f'# branch.oid {SHA}',
+        '# branch.head master',
+        '# branch.upstream origin/master',
+        '# branch.ab +2 -5',
+        f'1 .M N... {MODE_SHA_FIELDS} modified.txt',
+        f'1 A. N... {MODE_SHA_FIELDS} dir with spaces/added.txt',
+        f'1 D. N... {MODE_SHA_FIELDS} deleted.txt',
+        f'2 RM N... {MODE_SHA_FIELDS} R100 new name.txt',
+        'old name.txt',
+        '? untracked.txt',
+        ''
+    ]).encode()
+    status = parse_porcelain_v2(output, verbose=3)
+    assert status['local_branch'] == 'master'
+    assert status['remote_branch'] == 'origin/master'
+    assert status['n_commits_ahead'] == 2
+    assert status['n_commits_behind'] == 5
+    assert status['files_staged'] == [('A', 'dir with spaces/added.txt', None),
+                                      ('D', 'deleted.txt', None),
+                                      ('R', 'old name.txt', 'new name.txt')]
+    assert status['files_not_staged'] == [('M', 'modified.txt', None),
+                                          ('M', 'new name.txt', None)]
+    assert status['files_untracked'] == ['untracked.txt']
+    assert (status['n_staged'], status['n_not_staged'], status['n_untracked']) == (3, 2, 1)
+
+
+def test_parse_no_upstream_and_detached():
+    no_upstream = f'# branch.oid {SHA}\0# branch.head feature\0'.encode()
+    status = parse_porcelain_v2(no_upstream, verbose=2)
+    assert status['remote_branch'] == ''
+    assert status['n_commits_ahead'] is status['n_commits_behind'] is None
+    assert status['files_staged'] is None
+
+    detached = f'# branch.oid {SHA}\0# branch.head (detached)\0'.encode()
+    status = parse_porcelain_v2(detached, verbose=2)
+    assert status['is_detached']
+    assert status['hexsha'] == SHA[:7]
+    assert status['local_branch'] is None
+
+
+def test_parse_empty_repo():
+    output = b'# branch.oid (initial)\0# branch.head master\0'
+    assert parse_porcelain_v2(output) is None
+
+
+def test_matches_gitpython_backend(tmp_path, real_git, verbosity):
+    remote = init_repo(tmp_path.joinpath('remote'), n_commits=2)
+    repo = clone_repo(remote, tmp_path.joinpath('local'))
+    commit_file(remote, 'remote-only.txt', 'x\n')
+    git(repo, 'fetch', '-q')
+    commit_file(repo, 'local-only.txt', 'y\n')
+    # staged rename, staged new file, unstaged modification, untracked file
+    git(repo, 'mv', 'file0.txt', 'renamed.txt')
+    repo.joinpath('new.txt').write_text('new\n')
+    git(repo, 'add', 'new.txt')
+    repo.joinpath('file1.txt').write_text('changed\n')
+    repo.joinpath('untracked').mkdir()
+    repo.joinpath('untracked', 'file.txt').write_text('?\n')
+
+    gitpython = get_status([str(repo)], verbosity, backend='gitpython')
+    porcelain = get_status([str(repo)], verbosity, backend='porcelain')
+    gitpython, porcelain = gitpython[str(repo)], porcelain[str(repo)]
+    assert porcelain['n_commits_ahead'] == porcelain['n_commits_behind'] == 1
+    if verbosity == 3:
+        gitpython, porcelain = _sorted_files(gitpython), _sorted_files(porcelain)
+    assert porcelain == gitpython
+
+
+def test_detached_matches_gitpython_backend(tmp_path, real_git):
+    repo = init_repo(tmp_path.joinpath('repo'), n_commits=3)
+    git(repo, 'checkout', '-q', 'HEAD~1')
+    commit_file(repo, 'detached.txt', 'z\n')
+    gitpython = get_status([str(repo)], 2, backend='gitpython')
+    porcelain = get_status([str(repo)], 2, backend='porcelain')
+    assert porcelain == gitpython
+    assert porcelain[str(repo)]['detached_commits'] == 1
+
+
+def test_max_count_matches_gitpython_backend(tmp_path, real_git):
+    remote = init_repo(tmp_path.joinpath('remote'))
+    repo = clone_repo(remote, tmp_path.joinpath('local'))
+    for i in range(3):
+        commit_file(remote, f'remote{i}.txt', 'x\n')
+        commit_file(repo, f'local{i}.txt', 'y\n')
+    git(repo, 'fetch', '-q')
+    for max_count in (2, 6, 7):
+        gitpython = get_status([str(repo)], 2, backend='gitpython',
+                               max_count=max_count)[str(repo)]
+        porcelain = get_status([str(repo)], 2, backend='porcelain',
+                               max_count=max_count)[str(repo)]
+        assert porcelain == gitpython
+        n_ahead, n_behind = porcelain['n_commits_ahead'], porcelain['n_commits_behind']
+        assert n_ahead + n_behind == min(max_count, 6)
+        assert n_ahead.truncated is (max_count <= 6)
+
+
+def test_truncated_sides():
+    # only a side with commits counted can have been cut off by max_count
+    n_ahead, n_behind = parse_rev_list_count('10\t0\n', max_count=10)
+    assert f'{n_ahead}' == '10+' and f'{n_behind}' == '0'
+    n_ahead, n_behind = parse_rev_list_count('4\t6\n', max_count=10)
+    assert n_ahead.truncated and n_behind.truncated
+    n_ahead, n_behind = parse_rev_list_count('4\t5\n', max_count=10)
+    assert not n_ahead.truncated and not n_behind.truncated
@@ -0,0 +1,51 @@
+import json
+import pytest
+from gittracker.tracker.profile import PHASES, TOTAL, Profiler, phase
+from gittracker.tracker.tracker import get_status
+from ..helpers.git_helpers import clone_repo, commit_file, git, init_repo
+
+
+def test_phase_disabled():
+    # phases outside of profiled jobs aren't timed
+    profiler = Profiler()
+    with phase('staged'):
+        pass
+    assert profiler.timings == {}
+    # ...and ones inside are, even if the job raises
+    with pytest.raises(ValueError):
+        profiler.call('repo', TOTAL, _failing_job)
+    assert set(profiler.timings['repo']) == {'staged', TOTAL}
+
+
+def _failing_job():
+    with phase('staged'):
+        raise ValueError
+
+
+@pytest.mark.parametrize('backend', ['gitpython', 'porcelain'])
+def test_profile_real_repos(tmp_path, real_git, backend):
+    remote = init_repo(tmp_path.joinpath('remote'), n_commits=2)
+    repo = clone_repo(remote, tmp_path.joinpath('repo'))
+    commit_file(repo, 'local.txt', 'local\n')
+    repo.joinpath('untracked.txt').write_text('untracked\n')
+    git(repo, 'submodule', 'add', '-q', str(remote), 'sub')
+    repo = str(repo)
+
+    profiler = Profiler()
+    profiled = get_status([repo], 3, 1, backend=backend, profiler=profiler)
+    # profiling doesn't change the statuses
+    assert profiled == get_status([repo], 3, 1, backend=backend)
+    timings = profiler.timings[repo]
+    if backend == 'gitpython':
+        expected = {'head', 'ahead_behind', 'staged', 'unstaged', 'untracked'}
+    else:
+        expected = {'porcelain'}
+    # submodules' jobs are recorded under the top-level repository
+    assert set(timings) == {TOTAL, 'submodules', *expected}
+    assert all(seconds > 0 for seconds in timings.values())
+    assert sum(timings[name] for name in expected) <= timings[TOTAL]
+
+    assert repo in profiler.format_report()
+    report = json.loads(json.dumps(profiler.to_dict()))
+    assert report['repos'][0]['path'] == repo
+    assert list(report['phase_totals']) == [*(p for p in PHASES if p in timings), TOTAL]
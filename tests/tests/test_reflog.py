@@ -0,0 +1,32 @@
+from git import Repo
+from gittracker.tracker.reflog import detached_head_origin, iter_reflog_reverse
+from ..helpers.git_helpers import commit_file, git, init_repo
+
+
+def test_iter_reflog_reverse(tmp_path):
+    reflog_path = tmp_path.joinpath('HEAD')
+    lines = [f'entry {i} ' + 'x' * (i % 13) for i in range(200)]
+    reflog_path.write_text('\n'.join(lines) + '\n')
+    # block boundaries fall mid-line
+    for block_size in (1, 7, 64, 100_000):
+        assert list(iter_reflog_reverse(str(reflog_path), block_size)) == \
+               [line.encode() for line in reversed(lines)]
+
+
+def test_detached_head_origin(tmp_path):
+    repo = init_repo(tmp_path.joinpath('repo'), n_commits=3)
+    git(repo, 'checkout', '-q', '-b', 'feature')
+    commit_file(repo, 'feature.txt', 'x\n')
+    ref_sha = git(repo, 'rev-parse', 'HEAD~1')
+    git(repo, 'checkout', '-q', ref_sha)
+    for i in range(3):
+        commit_file(repo, f'detached{i}.txt', 'x\n')
+    assert detached_head_origin(str(repo)) == ('feature', ref_sha[:7], 3)
+    # same result GitPython's full reflog parse gives
+    log_entries = Repo(str(repo)).head.log()[::-1]
+    n_new = next(i for i, entry in enumerate(log_entries)
+                 if entry.message.startswith('checkout: moving from'))
+    assert n_new == 3
+    # no reflog
+    repo.joinpath('.git', 'logs', 'HEAD').unlink()
+    assert detached_head_origin(str(repo)) is None
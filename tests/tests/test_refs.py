@@ -0,0 +1,81 @@
+from git import Repo
+from gittracker.tracker.refs import (RefResolver, read_config,
+                                     resolve_branch_info, upstream_ref)
+from ..helpers.git_helpers import clone_repo, commit_file, git, init_repo
+
+
+def test_read_config(tmp_path):
+    config_path = tmp_path.joinpath('config')
+    config_path.write_text(
+        '[core]\n'
+        '\tbare = false\n'
+        '; comment\n'
+        '[Branch "Feature/X"]\n'
+        '\tremote = origin\n'
+        '\tMerge = "refs/heads/feature/x"\n'
+        '[branch "main"] remote = upstream\n'
+    )
+    config = read_config(str(config_path))
+    assert config['core'] == {'bare': 'false'}
+    assert config['branch.Feature/X'] == {'remote': 'origin',
+                                          'merge': 'refs/heads/feature/x'}
+    assert upstream_ref(config, 'Feature/X') == 'refs/remotes/origin/feature/x'
+    # missing "merge"
+    assert upstream_ref(config, 'main') is None
+    assert read_config(str(tmp_path.joinpath('missing'))) == {}
+
+
+def test_resolve_loose_and_packed_refs(tmp_path):
+    repo = init_repo(tmp_path.joinpath('repo'), n_commits=2)
+    for i in range(50):
+        git(repo, 'branch', f'branch-{i:02d}', f'HEAD~{i % 2}')
+        # annotated tags add "peeled" lines to packed-refs
+        git(repo, 'tag', '-a', f'tag-{i:02d}', '-m', 'tag')
+    git(repo, 'pack-refs', '--all')
+    # loose ref shadowing a packed one
+    commit_file(repo, 'new.txt', 'x\n')
+    git(repo, 'branch', '-f', 'branch-10')
+    resolver = RefResolver(str(repo))
+    refs = git(repo, 'for-each-ref', '--format=%(objectname) %(refname)')
+    for line in refs.splitlines():
+        hexsha, ref = line.split()
+        assert resolver.resolve(ref) == hexsha
+    assert resolver.resolve('refs/heads/missing') is None
+    assert resolver.resolve('refs/heads/branch-100') is None
+
+
+def test_branch_info_matches_gitpython(tmp_path):
+    remote = init_repo(tmp_path.joinpath('remote'))
+    local = clone_repo(remote, tmp_path.joinpath('local'))
+    commit_file(local, 'ahead.txt', 'x\n')
+    git(local, 'pack-refs', '--all')
+    repo = Repo(str(local))
+    branch = resolve_branch_info(str(local))
+    assert not branch.is_detached
+    assert branch.hexsha == repo.head.commit.hexsha
+    assert branch.local_branch == repo.active_branch.name
+    assert branch.remote_branch == repo.active_branch.tracking_branch().name
+    assert branch.remote_hexsha == repo.active_branch.tracking_branch().commit.hexsha
+    # worktree with its own HEAD, sharing refs & config
+    git(local, 'branch', '--track', 'other', 'origin/master')
+    worktree = tmp_path.joinpath('worktree')
+    git(local, 'worktree', 'add', '-q', str(worktree), 'other')
+    branch = resolve_branch_info(str(worktree))
+    assert (branch.local_branch, branch.remote_branch) == ('other', 'origin/master')
+    assert branch.hexsha == branch.remote_hexsha
+    # detached HEAD
+    git(local, 'checkout', '-q', '--detach', 'HEAD~1')
+    branch = resolve_branch_info(str(local))
+    assert branch.is_detached and branch.hexsha == repo.head.commit.hexsha
+
+
+def test_empty_and_unsupported(tmp_path):
+    empty = tmp_path.joinpath('empty')
+    empty.mkdir()
+    git(empty, 'init', '-q')
+    branch = resolve_branch_info(str(empty))
+    assert branch.hexsha is None and branch.local_branch == 'master'
+    # refs stored in a reftable can't be read directly
+    with open(empty.joinpath('.git', 'config'), 'a') as f:
+        f.write('[extensions]\n\trefStorage = reftable\n')
+    assert resolve_branch_info(str(empty)) is None
@@ -0,0 +1,122 @@
+import os
+import pytest
+from gittracker.repofile.patterns import IgnorePatterns
+from gittracker.repofile.scanner import DirSnapshot, RepoScanner
+
+REPOS = ['a', 'b/c', 'b/d/e', 'f/g/h/i', 'j', 'k/.hidden/l', 'k/skip/m', 'n']
+
+
+def _make_tree(root):
+    for repo in REPOS:
+        root.joinpath(repo, '.git').mkdir(parents=True)
+        # repositories' subdirectories (including nested repositories)
+        # aren't searched
+        root.joinpath(repo, 'src', 'nested', '.git').mkdir(parents=True)
+    # many non-repository directories
+    for i in range(50):
+        root.joinpath('f', f'dir{i}', 'sub').mkdir(parents=True)
+    # `.git` file (not a directory) doesn't make a repository
+    root.joinpath('o').mkdir()
+    root.joinpath('o', '.git').write_text('gitdir: elsewhere\n')
+    # symlinks to directories aren't followed
+    os.symlink(root.joinpath('f'), root.joinpath('p'))
+
+
+def _walk(root, dir_filter):
+    # reference implementation (previous `os.walk`-based search)
+    found = []
+    for dirpath, dirs, _ in os.walk(root):
+        if '.git' in dirs:
+            found.append(dirpath)
+            dirs[:] = []
+        dirs[:] = list(filter(dir_filter, dirs))
+    return sorted(found)
+
+
+@pytest.mark.parametrize('jobs', [1, 8])
+def test_scan_matches_walk(tmp_path, jobs):
+    _make_tree(tmp_path)
+    root = str(tmp_path)
+
+    def dir_filter(name): return not name.startswith('.') and name != 'skip'
+
+    tracked = {os.path.join(root, 'j')}
+    found, already_tracked = RepoScanner(dir_filter=dir_filter,
+                                         is_tracked=tracked.__contains__,
+                                         jobs=jobs).scan(root)
+    expected = _walk(root, dir_filter)
+    assert found == [p for p in expected if p not in tracked]
+    assert already_tracked == sorted(tracked)
+    assert [os.path.relpath(p, root) for p in expected] == sorted(
+        r for r in REPOS if '.hidden' not in r and 'skip' not in r
+    )
+
+
+def test_scan_errors(tmp_path):
+    _make_tree(tmp_path)
+    errors = []
+    missing = str(tmp_path.joinpath('missing'))
+    assert RepoScanner(onerror=errors.append).scan(missing) == ([], [])
+    assert isinstance(errors[0], FileNotFoundError)
+
+    def _raise(e): raise e
+
+    with pytest.raises(FileNotFoundError):
+        RepoScanner(jobs=4, onerror=_raise).scan(missing)
+
+
+def test_incremental_scan(tmp_path):
+    _make_tree(tmp_path)
+    root = str(tmp_path)
+
+    def _age_dirs():
+        # directories modified just before a search are always re-listed
+        for dirpath, _, _ in os.walk(root):
+            os.utime(dirpath, (0, 1_000_000))
+
+    _age_dirs()
+    first = RepoScanner(snapshot={})
+    found = first.scan(root)[0]
+    assert len(found) == len(REPOS)
+
+    # nothing changed -- only the top-level directory is stat-ed
+    second = RepoScanner(snapshot=first.new_snapshot)
+    assert second.scan(root)[0] == found
+    assert second.n_listed == 0
+
+    # new clone deep inside otherwise unchanged directories
+    tmp_path.joinpath('f', 'dir7', 'sub', 'new', '.git').mkdir(parents=True)
+    os.utime(tmp_path.joinpath('f', 'dir7', 'sub', 'new'), (0, 1_000_000))
+    os.utime(tmp_path.joinpath('f', 'dir7', 'sub'), (0, 2_000_000))
+    third = RepoScanner(jobs=4, snapshot=second.new_snapshot)
+    new_repo = str(tmp_path.joinpath('f', 'dir7', 'sub', 'new'))
+    assert third.scan(root)[0] == sorted(found + [new_repo])
+    assert third.n_listed == 2
+
+
+def test_snapshot_save(tmp_path):
+    fpath = tmp_path.joinpath('find-snapshot')
+    snapshot = DirSnapshot(fpath)
+    assert snapshot.entries == {}
+    snapshot.save('/a', {'/a': 1, '/a/b': 2})
+    snapshot.save('/ab', {'/ab': 3})
+    # entries from a new search replace those under the same directory
+    snapshot.save('/a', {'/a': 4})
+    assert DirSnapshot(fpath).entries == {'/a': 4, '/ab': 3}
+
+
+def test_scan_limits(tmp_path):
+    _make_tree(tmp_path)
+    root = str(tmp_path)
+
+    def _scan(**kwargs):
+        found = RepoScanner(jobs=4, **kwargs).scan(root)[0]
+        return [os.path.relpath(p, root) for p in found]
+
+    all_repos = sorted(REPOS)
+    assert _scan(one_file_system=True) == all_repos
+    assert _scan(max_depth=0) == []
+    assert _scan(max_depth=1) == ['a', 'j', 'n']
+    assert _scan(max_depth=3) == [r for r in all_repos if r.count('/') < 3]
+    patterns = IgnorePatterns(['/b/d', 'h', '.hidden', '!k/.hidden'])
+    assert _scan(patterns=patterns) == ['a', 'b/c', 'j', 'k/.hidden/l', 'k/skip/m', 'n']
@@ -0,0 +1,53 @@
+import pickle
+import tracemalloc
+import pytest
+from gittracker.tracker.status import STATUS_FIELDS, RepoStatus, intern_path, new_status
+
+# documented per-repository footprint of an empty `RepoStatus` (168 bytes
+# on 64-bit CPython), with a little slack for allocator overhead
+MAX_STATUS_BYTES = 184
+
+
+def test_dict_compatible():
+    status = new_status()
+    assert list(status.keys()) == list(STATUS_FIELDS)
+    assert status == {**dict.fromkeys(STATUS_FIELDS), 'is_detached': False,
+                      'timed_out': False}
+    status['n_staged'] = 2
+    assert status['n_staged'] == status.get('n_staged') == 2
+    assert status == {**status.to_dict()}
+    assert status != new_status()
+    # fields can't be added
+    with pytest.raises(KeyError):
+        status['n_stashed'] = 1
+    assert 'n_stashed' not in status and status.get('n_stashed') is None
+    # copies & pickled statuses are independent & equal
+    copied = status.copy()
+    copied['n_staged'] = 3
+    assert status['n_staged'] == 2
+    assert pickle.loads(pickle.dumps(status)) == status
+
+
+def test_interned_paths():
+    path = '/tmp/' + ''.join(['some', '-repo'])
+    assert intern_path(path) is intern_path(''.join(['/tmp/some', '-repo']))
+
+
+def test_status_footprint():
+    # statuses for a large number of repositories stay within the
+    # documented footprint, well under that of equivalent dicts
+    n_repos = 10_000
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        statuses = [RepoStatus() for _ in range(n_repos)]
+        status_bytes = (tracemalloc.get_traced_memory()[0] - baseline) / n_repos
+        del statuses
+        baseline = tracemalloc.get_traced_memory()[0]
+        dicts = [RepoStatus().to_dict() for _ in range(n_repos)]
+        dict_bytes = (tracemalloc.get_traced_memory()[0] - baseline) / n_repos
+        del dicts
+    finally:
+        tracemalloc.stop()
+    assert status_bytes <= MAX_STATUS_BYTES
+    assert status_bytes < dict_bytes / 2
@@ -0,0 +1,44 @@
+from time import perf_counter
+from gittracker.repofile.store import RepoStore
+
+
+def _store(tmp_path):
+    return RepoStore(tmp_path.joinpath('tracked-repos.db'),
+                     tmp_path.joinpath('tracked-repos'))
+
+
+def test_migrates_legacy_file_once(tmp_path):
+    legacy = tmp_path.joinpath('tracked-repos')
+    legacy.write_text('/repos/b\n/repos/a\n/repos/b\n\n')
+    assert _store(tmp_path).paths() == ['/repos/b', '/repos/a']
+    # legacy file is kept, but not re-imported
+    legacy.write_text('/repos/c\n')
+    store = _store(tmp_path)
+    assert legacy.is_file()
+    assert store.paths() == ['/repos/b', '/repos/a']
+
+
+def test_add_remove_update(tmp_path):
+    store = _store(tmp_path)
+    assert store.paths() == []
+    assert store.add(['/repos/b', '/repos/a', '/repos/b']) == ['/repos/b', '/repos/a']
+    assert store.add(['/repos/a', '/repos/c']) == ['/repos/c']
+    assert '/repos/c' in store and len(store) == 3
+    assert store.remove(['/repos/a', '/repos/d']) == ['/repos/a']
+    # replaced paths keep their place in the order
+    store.update(replacements=[('/repos/b', '/repos/e')], removals=['/repos/c'])
+    assert store.paths() == ['/repos/e']
+    # replacing a path with an already tracked path doesn't duplicate it
+    store.add(['/repos/f'])
+    store.update(replacements=[('/repos/f', '/repos/e')])
+    assert store.paths() == ['/repos/e']
+
+
+def test_bulk_add(tmp_path):
+    # adding thousands of repositories is a single transaction
+    store = _store(tmp_path)
+    paths = [f'/repos/{i:05}' for i in range(5000)]
+    start = perf_counter()
+    assert store.add(paths) == paths
+    assert perf_counter() - start < 5
+    assert store.paths() == paths
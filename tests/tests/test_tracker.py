@@ -1,8 +1,15 @@
 import pytest
 from git import InvalidGitRepositoryError
+from gittracker.tracker.status import BACKENDS
 from gittracker.tracker.tracker import get_status
+from ..helpers.git_helpers import clone_repo, git, init_repo
 from ..helpers.tracker_helpers import matches_expected_output
 
+# fields checked to determine whether a repository is clean at
+# verbosity level 1 (see `Displayer._format_simple`)
+DIRTY_FIELDS = ('is_detached', 'n_commits_ahead', 'n_commits_behind',
+                'n_staged', 'n_not_staged', 'n_untracked')
+
 
 # NOTE: "verbosity" and "submodules" parameters are verbosity levels and
 # presence/absence of submodule info, and are dynamically parametrized by
@@ -105,6 +112,101 @@ def test_empty(mock_repo, verbosity):
         get_status([repo], verbosity)
 
 
+def test_multiple_repos_concurrent(mock_repo, verbosity):
+    # statuses collected concurrently are returned in the tracked order,
+    # each matching the status collected for that repository on its own
+    repo_names = ['even-dirty', 'commits-ahead', 'no-remote-clean',
+                  'head-detached-ahead-dirty', 'commits-behind', 'even-clean']
+    repos = [mock_repo(f'{name}.cfg') for name in repo_names]
+    output = get_status(repos, verbosity, jobs=4)
+    assert list(output.keys()) == repos
+    for name, repo in zip(repo_names, repos):
+        assert matches_expected_output(name, output[repo], verbosity)
+
+
+def test_commits_ahead_behind_max_count(mock_repo):
+    # commit counts that reach the limit are reported as lower bounds
+    repo = mock_repo('commits-ahead-behind.cfg')
+    output = get_status([repo], 2, max_count=6)[repo]
+    assert (output['n_commits_ahead'], output['n_commits_behind']) == (4, 2)
+    assert f"{output['n_commits_ahead']}" == '4+'
+    assert f"{output['n_commits_behind']}" == '2+'
+    # counts below the limit are exact
+    output = get_status([repo], 2, max_count=100)[repo]
+    assert matches_expected_output('commits-ahead-behind', output, 2)
+    assert f"{output['n_commits_behind']}" == '8'
+
+
+def test_quick_status(mock_repo):
+    # quick mode reaches the same clean/dirty verdict as full status
+    repo_names = ['even-clean', 'even-dirty', 'commits-ahead',
+                  'commits-behind', 'commits-ahead-behind', 'no-remote-clean',
+                  'no-remote-dirty', 'head-detached-even-clean',
+                  'head-detached-ahead-dirty']
+    repos = [mock_repo(f'{name}.cfg') for name in repo_names]
+    full = get_status(repos, 1)
+    quick = get_status(repos, 1, quick=True)
+    for repo in repos:
+        is_dirty = any(full[repo][k] for k in DIRTY_FIELDS)
+        assert any(quick[repo][k] for k in DIRTY_FIELDS) == is_dirty
+
+
+def test_quick_status_real_repo(tmp_path, real_git):
+    # each signal is detected on its own (and stops the checks)
+    remote = init_repo(tmp_path.joinpath('remote'))
+    local = clone_repo(remote, tmp_path.joinpath('local'))
+    repo = str(local)
+
+    def _quick_status():
+        return get_status([repo], 1, quick=True)[repo]
+
+    status = _quick_status()
+    assert not any(status[k] for k in DIRTY_FIELDS)
+    assert status['local_branch'] == 'master'
+    # untracked files (but not ignored ones)
+    local.joinpath('.git', 'info', 'exclude').write_text('ignored/\n')
+    local.joinpath('ignored').mkdir()
+    local.joinpath('ignored', 'file.txt').write_text('x\n')
+    assert not any(_quick_status()[k] for k in DIRTY_FIELDS)
+    local.joinpath('untracked').mkdir()
+    local.joinpath('untracked', 'file.txt').write_text('x\n')
+    assert _quick_status()['n_untracked'] is True
+    # unstaged changes are found before untracked files are checked
+    local.joinpath('file0.txt').write_text('modified\n')
+    status = _quick_status()
+    assert status['n_not_staged'] is True and status['n_untracked'] is None
+    # staged changes
+    git(repo, 'add', 'file0.txt')
+    status = _quick_status()
+    assert status['n_staged'] is True and status['n_not_staged'] is None
+    # commits ahead of the remote
+    git(repo, 'commit', '-qm', 'modify')
+    status = _quick_status()
+    assert status['n_commits_ahead'] == 1 and status['n_staged'] is None
+    assert f"{status['n_commits_ahead']}" == '1+'
+    # upstream branch deleted on the remote and pruned locally
+    git(repo, 'update-ref', '-d', 'refs/remotes/origin/master')
+    status = _quick_status()
+    assert status['remote_branch'] == '' and status['n_commits_ahead'] is None
+    # detached HEAD
+    git(repo, 'checkout', '-q', '--detach')
+    assert _quick_status()['is_detached']
+
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_pruned_upstream(tmp_path, real_git, backend):
+    # an upstream branch deleted on the remote and pruned locally counts
+    # as no remote, rather than failing to count commits ahead/behind it
+    remote = init_repo(tmp_path.joinpath('remote'))
+    repo = str(clone_repo(remote, tmp_path.joinpath('local')))
+    git(repo, 'update-ref', '-d', 'refs/remotes/origin/master')
+    status = get_status([repo], 2, backend=backend)[repo]
+    assert status['local_branch'] == 'master'
+    assert status['remote_branch'] == ''
+    assert status['n_commits_ahead'] is None and status['n_commits_behind'] is None
+
+
 # =========================== SUBMODULE TESTS ===========================
 def test_submodule_single(mock_repo, verbosity, submodules):
     # repository with a single submodule (both repo and submodule are
@@ -146,3 +248,34 @@ def test_submodule_not_initialized(mock_repo, verbosity, submodules):
                                    output[repo],
                                    verbosity,
                                    submodules)
+
+
+def test_submodules_concurrent(mock_repo):
+    # submodules are collected on the shared worker pool and put back in
+    # their superprojects' statuses in order
+    repo_names = ['submodule-multiple', 'submodule-single', 'even-clean',
+                  'submodule-detached', 'submodule-not-initialized']
+    repos = [mock_repo(f'{name}.cfg') for name in repo_names]
+    output = get_status(repos, 3, 1, jobs=4)
+    assert list(output.keys()) == repos
+    for name, repo in zip(repo_names, repos):
+        assert matches_expected_output(name, output[repo], 3, True)
+
+
+def test_nested_submodules_real_repo(tmp_path, real_git):
+    # submodules of submodules are followed up to the requested depth
+    inner = init_repo(tmp_path.joinpath('inner'))
+    middle = init_repo(tmp_path.joinpath('middle'))
+    git(middle, 'submodule', 'add', '-q', str(inner), 'inner')
+    git(middle, 'commit', '-qm', 'add inner')
+    outer = init_repo(tmp_path.joinpath('outer'))
+    git(outer, 'submodule', 'add', '-q', str(middle), 'middle')
+    git(outer, 'commit', '-qm', 'add middle')
+    git(outer, 'submodule', 'update', '-q', '--init', '--recursive')
+    repo = str(outer)
+
+    middle_info, msg = get_status([repo], 3, 1, jobs=4)[repo]['submodules']['middle']
+    assert msg is None and middle_info['submodules'] is None
+    middle_info, _ = get_status([repo], 3, 2, jobs=4)[repo]['submodules']['middle']
+    inner_info, msg = middle_info['submodules']['inner']
+    assert msg is None and inner_info['is_detached']
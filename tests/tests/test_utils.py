@@ -0,0 +1,37 @@
+import pytest
+from gittracker.utils.exceptions import NoGitdirError, RepoNotFoundError
+from gittracker.utils.utils import MIN_CONCURRENT_CHECKS, find_invalid_repos, validate_repo
+
+
+def test_find_invalid_repos(tmp_path):
+    repos = []
+    for i in range(MIN_CONCURRENT_CHECKS * 2):
+        repo = tmp_path.joinpath(f'repo{i}')
+        repo.mkdir()
+        if i % 2:
+            repo.joinpath('.git').mkdir()
+        else:
+            # worktrees & submodules have a `.git` file
+            repo.joinpath('.git').write_text('gitdir: elsewhere\n')
+        repos.append(str(repo))
+    no_gitdir = tmp_path.joinpath('not-a-repo')
+    no_gitdir.mkdir()
+    missing = str(tmp_path.joinpath('missing'))
+    repos[3:3] = [missing, str(no_gitdir)]
+
+    for paths in (repos, repos[:5]):
+        invalid = find_invalid_repos(paths)
+        assert list(invalid) == [missing, str(no_gitdir)]
+        assert isinstance(invalid[missing], RepoNotFoundError)
+        assert isinstance(invalid[str(no_gitdir)], NoGitdirError)
+
+
+def test_dangling_gitdir_symlink(tmp_path):
+    # adding and re-validating a repository agree on whether a `.git`
+    # symlink whose target is missing counts
+    repo = tmp_path.joinpath('repo')
+    repo.mkdir()
+    repo.joinpath('.git').symlink_to(tmp_path.joinpath('missing'))
+    assert isinstance(find_invalid_repos([str(repo)])[str(repo)], NoGitdirError)
+    with pytest.raises(NoGitdirError):
+        validate_repo(str(repo))